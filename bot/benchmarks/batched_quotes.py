@@ -0,0 +1,99 @@
+import time
+import asyncio
+import argparse
+from common import printTable
+from utils.stocker.MarketData import MarketDataService
+from utils.stocker.Providers import FixtureProvider
+from utils.stocker.TickerIndex import TickerIndex
+
+"""
+==============================================================================================================
+Pricing a portfolio with one provider call per ticker and with batched get_quotes downloads.
+
+The provider makes up every stock and takes a modelled Yahoo round trip for each call, plus a little more for
+every ticker in a batch. The first tickers of assets/tickers.txt are priced the way /portfolio view did before,
+one get_stock after another and gathered on the thread pool, then with get_quotes. The token bucket is off unless
+--rate is given, so only the calls are compared.
+
+    python bot/benchmarks/batched_quotes.py
+    python bot/benchmarks/batched_quotes.py --tickers 50 --rtt-ms 150 --per-ticker-ms 2
+==============================================================================================================
+"""
+
+class RoundTripProvider(FixtureProvider):
+    def __init__(self, rtt: float, per_ticker: float) -> None:
+        super().__init__(latency=rtt, synthesize=True)
+        self.per_ticker: float = per_ticker # Seconds every ticker adds to a batched download
+
+    def get_quotes(self, tickers: list[str], period: str, interval: str) -> dict[str, dict]:
+        time.sleep(self.per_ticker * len(tickers))
+        return super().get_quotes(tickers, period, interval)
+
+# This function is used to time a pricing path, with the provider calls it made and the tickers it priced
+async def timed(name: str, provider: RoundTripProvider, path) -> list:
+    calls = provider.calls
+    started = time.perf_counter()
+    priced = await path()
+    return [name, (time.perf_counter() - started) * 1000, provider.calls - calls, len(priced)]
+
+async def run(args: argparse.Namespace) -> tuple[list, list]:
+    tickers = list(TickerIndex.from_file().order)[:args.tickers]
+    provider = RoundTripProvider(args.rtt_ms / 1000, args.per_ticker_ms / 1000)
+    service = MarketDataService(max_workers=args.workers, provider=provider, rate=args.rate)
+
+    for ticker in tickers:
+        provider.load(ticker) # Make up the stocks before anything is timed
+
+    async def sequential():
+        return {ticker: await service.get_stock(ticker) for ticker in tickers}
+
+    async def gathered():
+        return dict(zip(tickers, await asyncio.gather(*(service.get_stock(ticker) for ticker in tickers))))
+
+    rows = []
+
+    try:
+        rows.append(await timed("per-ticker, one after another", provider, sequential))
+        service.cache.clear()
+        rows.append(await timed(f"per-ticker, gathered on {args.workers} workers", provider, gathered))
+        service.cache.clear()
+        rows.append(await timed("get_quotes, one batch", provider, lambda: service.get_quotes(tickers)))
+        rows.append(await timed("get_quotes, all cached", provider, lambda: service.get_quotes(tickers)))
+        service.cache.clear()
+
+        service.batch_size = max(len(tickers) // 3 + 1, 1)
+        rows.append(await timed(f"get_quotes, batch_size {service.batch_size}", provider, lambda: service.get_quotes(tickers)))
+        service.cache.clear()
+        service.batch_size = args.batch_size
+
+        await service.get_quotes(tickers[:len(tickers) // 2])
+        rows.append(await timed(f"get_quotes, {len(tickers) // 2} of {len(tickers)} cached", provider, lambda: service.get_quotes(tickers)))
+        service.cache.clear()
+
+        # The same portfolio priced by many commands at once
+        calls = provider.calls
+        await asyncio.gather(*(service.get_quotes(tickers) for _ in range(args.concurrent)))
+        concurrent = [[args.concurrent, len(tickers), provider.calls - calls, service.coalesced]]
+        return rows, concurrent
+    finally:
+        await service.close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times pricing a portfolio with per-ticker calls and with batched quote downloads.")
+    parser.add_argument("--tickers", type=int, default=50, help="stocks in the portfolio")
+    parser.add_argument("--rtt-ms", type=float, default=150, help="modelled round trip of a provider call")
+    parser.add_argument("--per-ticker-ms", type=float, default=2, help="time every ticker adds to a batched download")
+    parser.add_argument("--workers", type=int, default=4, help="market_data_workers")
+    parser.add_argument("--batch-size", type=int, default=100, help="quote_batch_size")
+    parser.add_argument("--rate", type=float, default=0, help="upstream calls per second of the token bucket, 0 turns it off")
+    parser.add_argument("--concurrent", type=int, default=20, help="get_quotes calls over the same tickers at once")
+    args = parser.parse_args(argv)
+
+    rows, concurrent = asyncio.run(run(args))
+
+    printTable(["path", "ms", "upstream calls", "priced"], rows)
+    print()
+    printTable(["concurrent get_quotes", "tickers", "upstream calls", "coalesced"], concurrent)
+
+if __name__ == "__main__":
+    main()
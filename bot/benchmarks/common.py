@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+from contextlib import contextmanager, redirect_stdout
+from typing import Awaitable, Callable, Iterator
+
+bot_folder = os.path.dirname(os.path.dirname(os.path.realpath(__file__))) # The folder bot.py is in
+sys.path.insert(0, bot_folder)
+
+from utils.logger import log_pipeline
+
+"""
+==============================================================================================================
+Helpers shared by the micro benchmarks of this folder.
+
+Every benchmark runs in a temporary folder laid out like the repository, with the migrations and a logs folder,
+so it never touches the real databases. Each one compares the code before a change with the code after it on
+the same data and prints one table, run them from the repository folder:
+
+    python bot/benchmarks/portfolio_summary.py
+==============================================================================================================
+"""
+
+repository_folder = os.path.dirname(bot_folder) # The folder the bot runs from, database/ is in it
+
+# This function is used to run a benchmark in a temporary folder the bot can run from
+@contextmanager
+def workingFolder(keep: bool = False) -> Iterator[str]:
+    folder = tempfile.mkdtemp(prefix="bot-benchmark-")
+    shutil.copytree(os.path.join(repository_folder, "database", "migrations"), os.path.join(folder, "database", "migrations"))
+    os.makedirs(os.path.join(folder, "logs"))
+    current_folder = os.getcwd()
+    os.chdir(folder)
+
+    try:
+        yield folder
+    finally:
+        os.chdir(current_folder)
+        log_pipeline.stop() # Write the queued log records before the folder goes away
+
+        if keep:
+            print(f"kept {folder}")
+        else:
+            shutil.rmtree(folder, ignore_errors=True)
+
+# This function is used to fill database/users.db with generate_dataset.py, its progress is not printed
+def generateUsers(*arguments: str):
+    from benchmarks import generate_dataset
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        generate_dataset.main([os.path.join("database", "users.db"), "--force", *arguments])
+
+# This function is used to time a coroutine, the median of the runs is returned in milliseconds
+async def measure(run: Callable[[], Awaitable], repeat: int = 20, warmup: int = 2) -> float:
+    for _ in range(warmup):
+        await run()
+
+    times = []
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        times.append((time.perf_counter() - started) * 1000)
+
+    return statistics.median(times)
+
+# This function is used to time a function that is not a coroutine, the median of the runs is returned in milliseconds
+def measureSync(run: Callable[[], object], repeat: int = 20, warmup: int = 2) -> float:
+    for _ in range(warmup):
+        run()
+
+    times = []
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - started) * 1000)
+
+    return statistics.median(times)
+
+# This function is used to print rows as an aligned table
+def printTable(headers: list[str], rows: list[list]):
+    cells = [headers] + [[value if isinstance(value, str) else f"{value:,.3f}" if isinstance(value, float) else f"{value:,}" for value in row] for row in rows]
+    widths = [max(len(row[column]) for row in cells) for column in range(len(headers))]
+
+    for index, row in enumerate(cells):
+        print("  ".join(cell.rjust(width) if column else cell.ljust(width) for column, (cell, width) in enumerate(zip(row, widths))))
+
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
@@ -0,0 +1,105 @@
+import os
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import datetime
+from common import workingFolder, measure, printTable
+from utils.db_manager.manager import migration_pattern
+from utils.db_manager.user_manager import UserManager
+from utils.stocker.PortfolioTypes import date_format, toEpoch
+
+"""
+==============================================================================================================
+Listing orders before and after the created_at epoch columns.
+
+A users.db is made at schema version 2, before created_at existed, with the orders of one ticker created at
+random times over three years. Starting UserManager migrates it and backfills created_at, which is timed and
+checked against toEpoch. Then the orders are listed the way the cog did before, every row fetched and sorted
+on the date string in Python, and with ORDER BY created_at with and without a LIMIT.
+
+    python bot/benchmarks/epoch_columns.py
+    python bot/benchmarks/epoch_columns.py --orders 50000 --limit 25
+==============================================================================================================
+"""
+
+# This function is used to make a users.db at schema version 2 with the orders of one ticker
+def makeDatabase(orders: int, seed: int):
+    folder = os.path.join("database", "migrations", "users")
+    connection = sqlite3.connect(os.path.join("database", "users.db"))
+    connection.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied TEXT NOT NULL)")
+
+    for file in sorted(os.listdir(folder)):
+        match = migration_pattern.match(file)
+
+        if match and int(match.group(1)) <= 2:
+            with open(os.path.join(folder, file), encoding="utf-8") as f:
+                connection.executescript(f.read())
+
+            connection.execute("INSERT INTO schema_version (version, name, applied) VALUES (?, ?, 'benchmark')", (int(match.group(1)), match.group(2)))
+
+    rng = random.Random(seed)
+    since = datetime.datetime(2021, 1, 1)
+    connection.execute("INSERT INTO Users (user_id, created) VALUES (1, ?)", (since.strftime(date_format),))
+    connection.execute("INSERT INTO Portfolios (user_id, portfolio_id, name, created) VALUES (1, 0, 'Portfolio 0', ?)", (since.strftime(date_format),))
+    connection.execute("INSERT INTO Stocks (user_id, portfolio_key, ticker, created) VALUES (1, 1, 'AAPL', ?)", (since.strftime(date_format),))
+    connection.executemany(
+        "INSERT INTO Orders (user_id, portfolio_key, stock_key, ticker, order_id, quantity, price, created, status, type) VALUES (1, 1, 1, 'AAPL', ?, 1, 100.0, ?, 'Filled', 'Buy')",
+        [(order_id, (since + datetime.timedelta(seconds=rng.randint(0, 3 * 365 * 86400))).strftime(date_format)) for order_id in range(orders)]
+    )
+    connection.commit()
+    connection.close()
+
+async def run(args: argparse.Namespace) -> tuple[list, list]:
+    makeDatabase(args.orders, args.seed)
+
+    started = time.perf_counter()
+    database = UserManager()
+    await database.start("users.db", "users", "BenchmarkUsers", "benchmark", 2) # Applies migration 3 and backfills created_at
+    migrated = (time.perf_counter() - started) * 1000
+
+    try:
+        async with database.read("SELECT created, created_at FROM Orders") as cursor:
+            rows = await cursor.fetchall()
+
+        mismatches = sum(1 for created, created_at in rows if toEpoch(created) != created_at)
+        newest = max(created_at for _, created_at in rows)
+
+        # This function is used to list the orders the way the cog did before, sorting the date strings
+        async def before():
+            async with database.read("SELECT * FROM Orders WHERE user_id = ? AND portfolio_key = ? AND ticker = ?", (1, 1, "AAPL",)) as cursor:
+                return sorted(await cursor.fetchall(), key=lambda order: order["created"], reverse=True)
+
+        paths = [
+            ("before: fetch all, sorted() on created", before),
+            ("after: ORDER BY created_at", lambda: database.get_orders(1, 0, "AAPL")),
+            (f"after: ORDER BY created_at LIMIT {args.limit}", lambda: database.get_orders(1, 0, "AAPL", args.limit))
+        ]
+        listing = []
+
+        for name, path in paths:
+            first = (await path())[0]
+            listing.append([name, await measure(path, args.repeat), "yes" if first["created_at"] == newest else "no"])
+
+        return [[args.orders, migrated, mismatches]], listing
+    finally:
+        await database.close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times the created_at backfill and the order listing before and after it.")
+    parser.add_argument("--orders", type=int, default=50_000, help="orders of the ticker")
+    parser.add_argument("--limit", type=int, default=25, help="rows of the limited listing")
+    parser.add_argument("--repeat", type=int, default=5, help="times each listing is timed, the median is shown")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the order times")
+    args = parser.parse_args(argv)
+
+    with workingFolder():
+        backfill, listing = asyncio.run(run(args))
+
+    printTable(["orders", "migration + backfill ms", "mismatches"], backfill)
+    print()
+    printTable(["listing", "ms", "newest first"], listing)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import functools
+import statistics
+import threading
+import urllib.request
+import http.server
+from io import BytesIO
+from types import SimpleNamespace
+from common import printTable
+import utils.stocker.FearGreed as fear_greed
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+
+"""
+==============================================================================================================
+/feargreed with a new Firefox for every capture, and with the one browser kept by FearGreedCapture.
+
+There is no browser to benchmark against here, so Firefox is replaced by a stand-in that takes a modelled start
+up and screenshot time and loads a local page with the index element over HTTP. The old flow started a browser
+for every call and slept a second on the event loop. Each flow answers the same requests one after another and
+all at once.
+
+    python bot/benchmarks/fear_greed.py
+    python bot/benchmarks/fear_greed.py --requests 20 --start-ms 1500 --screenshot-ms 50
+==============================================================================================================
+"""
+
+PAGE = '<div><span name="fng-index">62 Greed</span></div>'
+
+class StandInElement:
+    def __init__(self, screenshot: float) -> None:
+        self.screenshot: float = screenshot
+
+    def find_element(self, by: str, value: str) -> "StandInElement":
+        return self
+
+    @property
+    def screenshot_as_png(self) -> bytes:
+        time.sleep(self.screenshot)
+        return b"\x89PNG" + os.urandom(8)
+
+class StandInFirefox:
+    start: float = 1.5 # Seconds Firefox takes to start
+    screenshot: float = 0.05 # Seconds a screenshot takes
+    starts: int = 0
+
+    def __init__(self, service=None, options=None) -> None:
+        time.sleep(self.start)
+        StandInFirefox.starts += 1
+        self.html: str = ""
+
+    def set_window_size(self, width: int, height: int):
+        pass
+
+    def maximize_window(self):
+        pass
+
+    def set_page_load_timeout(self, timeout: float):
+        pass
+
+    def get(self, url: str):
+        self.html = urllib.request.urlopen(url).read().decode()
+
+    def find_element(self, by: str, value: str) -> StandInElement:
+        if value not in self.html:
+            raise NoSuchElementException(value)
+
+        return StandInElement(self.screenshot)
+
+    def quit(self):
+        pass
+
+# This function is used to capture the index the way getFearGreedIndex did before, a new browser every call
+async def oldCapture(url: str) -> BytesIO | None:
+    driver = StandInFirefox()
+    driver.maximize_window()
+    driver.get(url)
+    await asyncio.sleep(1)
+
+    screenshot = driver.find_element(By.NAME, "fng-index").find_element(By.XPATH, "..").screenshot_as_png
+    driver.quit()
+    return BytesIO(screenshot)
+
+# This function is used to serve the page with the index element, the url of the page is returned
+def servePage() -> str:
+    folder = tempfile.mkdtemp()
+
+    with open(os.path.join(folder, "index.html"), "w", encoding="utf-8") as f:
+        f.write(PAGE)
+
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=folder)
+    handler.func.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/index.html"
+
+# This function is used to get the median and the 99th percentile of some times in ms
+def percentiles(times: list[float]) -> tuple[float, float]:
+    times = sorted(times)
+    return statistics.median(times) * 1000, times[min(len(times) - 1, int(len(times) * 0.99))] * 1000
+
+async def run(name: str, get, requests: int) -> list:
+    async def timed():
+        started = time.perf_counter()
+        await get()
+        return time.perf_counter() - started
+
+    StandInFirefox.starts = 0
+    sequential = [await timed() for _ in range(requests)]
+
+    started = time.perf_counter()
+    concurrent = await asyncio.gather(*(timed() for _ in range(requests)))
+    wall = time.perf_counter() - started
+
+    return [name, *percentiles(sequential), *percentiles(concurrent), wall * 1000, StandInFirefox.starts]
+
+async def runAll(args: argparse.Namespace) -> list:
+    url = servePage()
+    rows = [await run("old, a browser every call", lambda: oldCapture(url), args.requests)]
+
+    for ttl in (args.ttl, 0):
+        capture = fear_greed.FearGreedCapture(url, ttl=ttl)
+
+        try:
+            rows.append(await run(f"FearGreedCapture, ttl {ttl:g}s", capture.get, args.requests))
+        finally:
+            await capture.close()
+
+    return rows
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times Fear & Greed captures with a browser every call and with one kept browser.")
+    parser.add_argument("--requests", type=int, default=20, help="requests made one after another, then all at once")
+    parser.add_argument("--start-ms", type=float, default=1500, help="modelled Firefox start up")
+    parser.add_argument("--screenshot-ms", type=float, default=50, help="modelled screenshot")
+    parser.add_argument("--ttl", type=float, default=300, help="fear_greed_ttl")
+    args = parser.parse_args(argv)
+
+    StandInFirefox.start = args.start_ms / 1000
+    StandInFirefox.screenshot = args.screenshot_ms / 1000
+    fear_greed.webdriver = SimpleNamespace(Firefox=StandInFirefox) # No browser needed
+
+    rows = asyncio.run(runAll(args))
+
+    printTable(["flow", "sequential p50 ms", "p99 ms", "concurrent p50 ms", "p99 ms", "concurrent wall ms", "browser starts"], rows)
+
+if __name__ == "__main__":
+    main()
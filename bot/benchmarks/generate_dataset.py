@@ -0,0 +1,388 @@
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import datetime
+from bisect import bisect
+
+bot_folder = os.path.dirname(os.path.dirname(os.path.realpath(__file__))) # The folder bot.py is in
+sys.path.insert(0, bot_folder)
+
+from utils.db_manager.manager import migration_pattern
+from utils.stocker.PortfolioTypes import date_format
+from utils.stocker.TickerIndex import TickerIndex
+
+"""
+==============================================================================================================
+Synthetic dataset generator, it fills a users.db with made up users to benchmark UserManager at scale.
+
+Every user gets portfolios, stocks, orders, dividends, options, watchlists and watched stocks, numbered the
+way UserManager numbers them and linked by keys that respect the schema's foreign keys. Tickers come from
+assets/tickers.txt with a Zipf distribution, so a few tickers are held by most users like in a real bot.
+Rows are inserted with executemany in large transactions while the indexes are dropped, then the indexes
+are built once at the end. The same seed and options always give the same database.
+
+    python bot/benchmarks/generate_dataset.py users.db --users 100000 --portfolios 2 --orders 50
+==============================================================================================================
+"""
+
+# ========================================================================================================================================================================
+# Constants
+# ========================================================================================================================================================================
+
+repository_folder = os.path.dirname(bot_folder) # The folder the bot runs from, database/ is in it
+migrations_folder = os.path.join(repository_folder, "database", "migrations", "users")
+
+# Columns filled for every table, in insert order
+COLUMNS = {
+    "Users": ("user_id", "created", "created_at"),
+    "Portfolios": ("portfolio_key", "user_id", "portfolio_id", "name", "description", "created", "created_at"),
+    "Stocks": ("stock_key", "user_id", "portfolio_key", "ticker", "created", "created_at"),
+    "Orders": ("user_id", "portfolio_key", "stock_key", "order_id", "ticker", "quantity", "price", "created", "created_at", "status", "type", "gain_loss"),
+    "Dividends": ("user_id", "portfolio_key", "stock_key", "dividend_id", "ticker", "dividend", "created", "created_at"),
+    "Options": ("user_id", "portfolio_key", "stock_key", "option_id", "ticker", "strike", "quantity", "premium", "created", "created_at", "expires", "expires_at", "result", "type", "gain_loss"),
+    "Watchlists": ("watchlist_key", "user_id", "watchlist_id", "name", "description", "created", "created_at"),
+    "Watching": ("user_id", "watchlist_key", "ticker", "created", "created_at")
+}
+
+# Parents first, so the foreign keys hold after every flush
+TABLE_ORDER = tuple(COLUMNS)
+
+first_user_id = 100_000_000_000_000_000 # Discord ids are 18 digit snowflakes
+
+# ========================================================================================================================================================================
+# Ticker Distribution
+# ========================================================================================================================================================================
+
+class TickerDistribution:
+    def __init__(self, tickers: list[str], skew: float, rng: random.Random) -> None:
+        self.tickers: list[str] = tickers
+        self.rng: random.Random = rng
+        self.cumulative: list[float] = [] # Running total of the Zipf weights, the first ticker of the file is the most held
+        total = 0.0
+
+        for rank in range(len(tickers)):
+            total += 1 / (rank + 1) ** skew
+            self.cumulative.append(total)
+
+        self.total: float = total
+
+        # Every ticker trades around its own price
+        self.prices: dict[str, float] = {ticker: round(rng.lognormvariate(4, 1), 2) for ticker in tickers}
+
+    # This function is used to draw one ticker
+    def draw(self) -> str:
+        return self.tickers[bisect(self.cumulative, self.rng.random() * self.total, hi=len(self.tickers) - 1)]
+
+    # This function is used to draw different tickers, fewer when there are not that many
+    def draw_distinct(self, count: int) -> list[str]:
+        count = min(count, len(self.tickers))
+        drawn: dict[str, None] = {} # Keeps the order they were drawn in
+        attempts = 0
+
+        while len(drawn) < count and attempts < count * 20:
+            drawn[self.draw()] = None
+            attempts += 1
+
+        # Popular tickers can keep coming back, fill the rest without the skew
+        while len(drawn) < count:
+            drawn[self.rng.choice(self.tickers)] = None
+
+        return list(drawn)
+
+# ========================================================================================================================================================================
+# Generator
+# ========================================================================================================================================================================
+
+"""
+The rows of every table wait in a buffer and are inserted with one executemany when the buffer is full. Keys are
+counted here instead of by SQLite, so the children can be written before their parents are flushed.
+"""
+
+class DatasetGenerator:
+    def __init__(self, connection: sqlite3.Connection, args: argparse.Namespace, tickers: list[str]) -> None:
+        self.connection: sqlite3.Connection = connection
+        self.args: argparse.Namespace = args
+        self.rng: random.Random = random.Random(args.seed)
+        self.tickers: TickerDistribution = TickerDistribution(tickers, args.skew, self.rng)
+        self.buffers: dict[str, list[tuple]] = {table: [] for table in TABLE_ORDER}
+        self.statements: dict[str, str] = {
+            table: f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})" for table, columns in COLUMNS.items()
+        }
+        self.counts: dict[str, int] = {table: 0 for table in TABLE_ORDER} # Rows inserted by table
+        self.pending: int = 0 # Rows inserted since the last commit
+        self.started: float = time.perf_counter()
+
+        # Keys of the parent tables
+        self.portfolio_key: int = 0
+        self.stock_key: int = 0
+        self.watchlist_key: int = 0
+
+        # Times are made up in local time like the bot's timestamps, between "since" and "until"
+        self.until: datetime.datetime = datetime.datetime.strptime(args.until, "%Y-%m-%d")
+        self.since: datetime.datetime = self.until - datetime.timedelta(days=365 * args.years)
+        self.span: float = (self.until - self.since).total_seconds()
+        self.days: dict[int, tuple[str, int | None]] = {} # Date string and local midnight epoch of each day after "since"
+
+    # This function is used to turn seconds after "since" into the created string and its epoch
+    def timestamp(self, offset: float) -> tuple[str, int]:
+        offset = int(offset)
+        day, seconds = divmod(offset, 86400)
+        cached = self.days.get(day)
+
+        if cached is None:
+            midnight = self.since + datetime.timedelta(days=day)
+            start = int(midnight.timestamp())
+            length = int((midnight + datetime.timedelta(days=1)).timestamp()) - start
+            cached = self.days[day] = (midnight.strftime("%m-%d-%Y"), start if length == 86400 else None) # Days the clocks change on are worked out in full
+
+        date, start = cached
+
+        if start is None:
+            moment = self.since + datetime.timedelta(seconds=offset)
+            return moment.strftime(date_format), int(moment.timestamp())
+
+        # Formatting the time by hand is several times faster than strftime, and the same as date_format
+        hour, rest = divmod(seconds, 3600)
+        minute, second = divmod(rest, 60)
+        return f"{date} {hour % 12 or 12:02d}:{minute:02d}:{second:02d} {'AM' if hour < 12 else 'PM'}", start + seconds
+
+    # This function is used to queue a row, the buffer is written once it is full
+    def add(self, table: str, row: tuple):
+        buffer = self.buffers[table]
+        buffer.append(row)
+
+        if len(buffer) >= self.args.batch_size:
+            self.flush()
+
+    # This function is used to write every buffer, parents first
+    def flush(self):
+        for table in TABLE_ORDER:
+            buffer = self.buffers[table]
+
+            if buffer:
+                self.connection.executemany(self.statements[table], buffer)
+                self.counts[table] += len(buffer)
+                self.pending += len(buffer)
+                buffer.clear()
+
+        if self.pending >= self.args.transaction_rows:
+            self.commit()
+
+    # This function is used to commit the open transaction, and start the next one unless it was the last
+    def commit(self, last: bool = False):
+        self.connection.execute("COMMIT")
+        self.pending = 0
+
+        if not last:
+            self.connection.execute("BEGIN")
+
+        total = sum(self.counts.values())
+        elapsed = time.perf_counter() - self.started
+        print(f"{total:>12,} rows, {self.counts['Orders']:>12,} orders, {elapsed:7.1f}s, {total / elapsed:>10,.0f} rows/s", flush=True)
+
+    # This function is used to generate every user
+    def generate(self):
+        self.connection.execute("BEGIN")
+
+        for index in range(self.args.users):
+            self.generate_user(first_user_id + index)
+
+        self.flush()
+        self.commit(last=True)
+
+    # This function is used to generate one user with everything it owns
+    def generate_user(self, user_id: int):
+        rng = self.rng
+        args = self.args
+        joined = rng.random() * self.span * 0.5 # Users joined during the first half, so they have time to trade
+        created, created_at = self.timestamp(joined)
+        self.add("Users", (user_id, created, created_at))
+
+        for portfolio_id in range(args.portfolios):
+            self.generate_portfolio(user_id, portfolio_id, joined)
+
+        for watchlist_id in range(args.watchlists):
+            self.watchlist_key += 1
+            opened = joined + rng.random() * (self.span - joined) * 0.1
+            created, created_at = self.timestamp(opened)
+            self.add("Watchlists", (self.watchlist_key, user_id, watchlist_id, f"Watchlist {watchlist_id}", "No description provided.", created, created_at))
+
+            for ticker in self.tickers.draw_distinct(args.watching):
+                created, created_at = self.timestamp(opened + rng.random() * (self.span - opened))
+                self.add("Watching", (user_id, self.watchlist_key, ticker, created, created_at))
+
+    # This function is used to generate one portfolio with its stocks, orders, dividends and options
+    def generate_portfolio(self, user_id: int, portfolio_id: int, joined: float):
+        rng = self.rng
+        args = self.args
+        self.portfolio_key += 1
+        portfolio_key = self.portfolio_key
+        opened = joined + rng.random() * (self.span - joined) * 0.1
+        created, created_at = self.timestamp(opened)
+        self.add("Portfolios", (portfolio_key, user_id, portfolio_id, f"Portfolio {portfolio_id}", "No description provided.", created, created_at))
+
+        # Every stock is added with its first order
+        tickers = self.tickers.draw_distinct(args.stocks)
+        stock_keys: list[int] = []
+
+        for ticker in tickers:
+            self.stock_key += 1
+            stock_keys.append(self.stock_key)
+
+        # Orders are numbered per ticker in the order they were made, oldest first
+        order_ids = [0] * len(tickers)
+        times = sorted(opened + rng.random() * (self.span - opened) for _ in range(args.orders))
+
+        for offset in times:
+            stock = int(rng.random() * len(tickers))
+            ticker = tickers[stock]
+            created, created_at = self.timestamp(offset)
+
+            if order_ids[stock] == 0:
+                self.add("Stocks", (stock_keys[stock], user_id, portfolio_key, ticker, created, created_at))
+
+            sell = order_ids[stock] > 0 and rng.random() < args.sell_ratio
+            price = round(self.tickers.prices[ticker] * rng.uniform(0.7, 1.3), 2)
+            status = "Pending" if rng.random() < 0.05 else "Filled"
+            self.add("Orders", (user_id, portfolio_key, stock_keys[stock], order_ids[stock], ticker, rng.randint(1, 100), price, created, created_at, status, "Sell" if sell else "Buy", 0))
+            order_ids[stock] += 1
+
+        # Stocks that never got an order were still added
+        for stock, ticker in enumerate(tickers):
+            if order_ids[stock] == 0:
+                created, created_at = self.timestamp(opened)
+                self.add("Stocks", (stock_keys[stock], user_id, portfolio_key, ticker, created, created_at))
+
+        # Dividends and options are numbered per portfolio
+        for dividend_id, offset in enumerate(sorted(opened + rng.random() * (self.span - opened) for _ in range(args.dividends))):
+            stock = int(rng.random() * len(tickers))
+            created, created_at = self.timestamp(offset)
+            self.add("Dividends", (user_id, portfolio_key, stock_keys[stock], dividend_id, tickers[stock], round(rng.uniform(0.05, 5) * rng.randint(1, 100), 2), created, created_at))
+
+        for option_id, offset in enumerate(sorted(opened + rng.random() * (self.span - opened) for _ in range(args.options))):
+            stock = int(rng.random() * len(tickers))
+            ticker = tickers[stock]
+            created, created_at = self.timestamp(offset)
+            expires, expires_at = self.timestamp(offset + rng.randint(7, 365) * 86400)
+            strike = round(self.tickers.prices[ticker] * rng.uniform(0.8, 1.2), 2)
+            result = rng.choice(("Filled", "Filled", "Pending", "Expired"))
+            self.add("Options", (user_id, portfolio_key, stock_keys[stock], option_id, ticker, strike, rng.randint(1, 10), round(strike * rng.uniform(0.01, 0.1), 2), created, created_at, expires, expires_at, result, rng.choice(("call", "put")), 0))
+
+# ========================================================================================================================================================================
+# Database
+# ========================================================================================================================================================================
+
+# This function is used to apply the users migrations and record them the way DatabaseManager does
+def applyMigrations(connection: sqlite3.Connection):
+    connection.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied TEXT NOT NULL)")
+    migrations = []
+
+    for file in os.listdir(migrations_folder):
+        match = migration_pattern.match(file)
+
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(migrations_folder, file)))
+
+    for version, name, path in sorted(migrations):
+        with open(path, encoding="utf-8") as f:
+            connection.executescript(f"BEGIN;\n{f.read()}\nCOMMIT;")
+
+        connection.execute("INSERT INTO schema_version (version, name, applied) VALUES (?, ?, ?)", (version, name, datetime.datetime.now().strftime(date_format)))
+
+# This function is used to drop the indexes so the rows are inserted faster, their SQL is returned to build them again
+def dropIndexes(connection: sqlite3.Connection) -> list[str]:
+    indexes = connection.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchall()
+
+    for name, _ in indexes:
+        connection.execute(f"DROP INDEX {name}")
+
+    return [sql for _, sql in indexes]
+
+# This function is used to read the tickers the orders are drawn from, in the order of the file, biggest companies first
+def readTickers(count: int) -> list[str]:
+    tickers = list(TickerIndex.from_file().order)
+    return tickers[:count] if count > 0 else tickers
+
+# This function is used to read the command line
+def parseArguments(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fills a users.db with made up users, portfolios, orders, dividends, options and watchlists to benchmark UserManager at scale.")
+    parser.add_argument("output", help="database file to create, like database/users.db")
+    parser.add_argument("--users", type=int, default=10_000, help="users to create")
+    parser.add_argument("--portfolios", type=int, default=2, help="portfolios of each user")
+    parser.add_argument("--stocks", type=int, default=10, help="stocks held in each portfolio")
+    parser.add_argument("--orders", type=int, default=50, help="orders in each portfolio")
+    parser.add_argument("--dividends", type=int, default=5, help="dividends in each portfolio")
+    parser.add_argument("--options", type=int, default=2, help="options in each portfolio")
+    parser.add_argument("--watchlists", type=int, default=1, help="watchlists of each user")
+    parser.add_argument("--watching", type=int, default=10, help="stocks watched in each watchlist")
+    parser.add_argument("--sell-ratio", type=float, default=0.25, help="chance that an order after the first of a stock is a sell")
+    parser.add_argument("--tickers", type=int, default=0, help="tickers of assets/tickers.txt to draw from, the first ones, 0 for all")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the ticker distribution, 0 draws every ticker as often")
+    parser.add_argument("--until", default="2025-01-01", help="date the made up history ends at, as YYYY-MM-DD")
+    parser.add_argument("--years", type=float, default=5, help="years of history before --until")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random data, the same seed gives the same database")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="rows inserted by each executemany")
+    parser.add_argument("--transaction-rows", type=int, default=2_000_000, help="rows inserted before each commit")
+    parser.add_argument("--check", action="store_true", help="check every foreign key at the end")
+    parser.add_argument("--force", action="store_true", help="replace the output file if it exists")
+    return parser.parse_args(argv)
+
+def main(argv: list[str] | None = None):
+    args = parseArguments(argv)
+
+    if args.portfolios > 0 and args.stocks < 1:
+        sys.exit("every portfolio needs at least one stock for its orders, dividends and options")
+
+    if os.path.exists(args.output):
+        if not args.force:
+            sys.exit(f"'{args.output}' already exists, use --force to replace it")
+
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(args.output + suffix):
+                os.remove(args.output + suffix)
+
+    tickers = readTickers(args.tickers)
+    started = time.perf_counter()
+    connection = sqlite3.connect(args.output, isolation_level=None) # Transactions are started and committed here
+
+    try:
+        applyMigrations(connection)
+        indexes = dropIndexes(connection)
+
+        # Nothing else uses the file while it is built, a crash only loses a database that can be made again
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("PRAGMA cache_size = -262144") # 256 MB
+        connection.execute("PRAGMA temp_store = MEMORY")
+
+        generator = DatasetGenerator(connection, args, tickers)
+        generator.generate()
+        inserted = time.perf_counter()
+
+        print(f"building {len(indexes)} indexes", flush=True)
+        connection.execute("BEGIN")
+
+        for sql in indexes:
+            connection.execute(sql)
+
+        connection.execute("COMMIT")
+        connection.execute("ANALYZE") # The query planner gets the row counts of the new tables
+        indexed = time.perf_counter()
+
+        if args.check:
+            violations = connection.execute("PRAGMA foreign_key_check").fetchall()
+            print(f"{len(violations)} foreign key violations")
+
+        connection.execute("PRAGMA journal_mode = WAL") # The mode the bot opens it in
+    finally:
+        connection.close()
+
+    counts = ", ".join(f"{count:,} {table.lower()}" for table, count in generator.counts.items())
+    print(f"created {counts}")
+    print(f"inserted in {inserted - started:.1f}s, indexed in {indexed - inserted:.1f}s, {os.path.getsize(args.output) / 1024 / 1024:,.0f} MB at {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import time
+import random
+import asyncio
+import argparse
+import threading
+from common import workingFolder, printTable
+from utils.db_manager.history_manager import HistoryManager
+from utils.stocker.MarketData import MarketDataService
+from utils.stocker.Providers import historyFromBars
+from utils.stocker.TickerIndex import TickerIndex
+
+"""
+==============================================================================================================
+Price history downloaded in full for every request, and kept in the history store with only missing bars
+downloaded.
+
+Every ticker is listed on a random day 2k to 12k trading days ago and has a daily bar for every day since. The
+provider takes a modelled round trip for every call plus a little more for every bar it sends, and counts the
+bars. The same requests for the first tickers of assets/tickers.txt are made without the store, the way get_stock
+worked before, and through get_history with a cold store, a warm one, the next day, and a short period first.
+
+    python bot/benchmarks/history_store.py
+    python bot/benchmarks/history_store.py --tickers 100 --rtt-ms 150 --per-bar-us 20
+==============================================================================================================
+"""
+
+DAY = 86400
+
+class ListingProvider:
+    name = "listing"
+
+    def __init__(self, tickers: list[str], rtt: float, per_bar: float, seed: int) -> None:
+        rng = random.Random(seed)
+        self.now: int = int(time.time()) // DAY * DAY
+        self.listed: dict[str, int] = {ticker: self.now - rng.randint(2000, 12000) * DAY for ticker in tickers} # Day each ticker was listed
+        self.rtt: float = rtt # Seconds every call takes
+        self.per_bar: float = per_bar # Seconds every bar sent adds
+        self.lock: threading.Lock = threading.Lock() # Calls come from several pool threads
+        self.calls: int = 0
+        self.bars: int = 0 # Bars sent
+
+    def get_history(self, ticker: str, start: int | None, end: int | None, interval: str) -> list[tuple]:
+        first = self.listed[ticker] if start is None else max(start, self.listed[ticker])
+        first = -(-first // DAY) * DAY # The first whole day in the range
+        bars = [(day, 1.0, 2.0, 0.5, 1.5, 100) for day in range(first, end if end is not None else self.now + 1, DAY)]
+
+        with self.lock:
+            self.calls += 1
+            self.bars += len(bars)
+
+        time.sleep(self.rtt + self.per_bar * len(bars))
+        return bars
+
+    def get_stock(self, ticker: str, period: str, interval: str) -> tuple:
+        return historyFromBars(self.get_history(ticker, None, None, interval)), self.get_info(ticker)
+
+    def get_info(self, ticker: str) -> dict:
+        return {"symbol": ticker}
+
+async def run(args: argparse.Namespace) -> list:
+    tickers = list(TickerIndex.from_file().order)[:args.tickers]
+    provider = ListingProvider(tickers, args.rtt_ms / 1000, args.per_bar_us / 1e6, args.seed)
+    rows = []
+
+    # This function is used to time the same request for every ticker at once, with the calls and bars it downloaded
+    async def timed(name: str, request):
+        calls, bars = provider.calls, provider.bars
+        started = time.perf_counter()
+        await asyncio.gather(*(request(ticker) for ticker in tickers))
+        rows.append([name, (time.perf_counter() - started) * 1000, provider.calls - calls, provider.bars - bars])
+
+    before = MarketDataService(max_workers=args.workers, provider=provider, rate=0)
+    before.cache.ttl = lambda: 0 # A new day, every request downloads again
+    await timed("before: get_stock 'max'", lambda ticker: before.get_stock(ticker, "max"))
+    await before.close()
+
+    history = HistoryManager()
+    await history.start("history.db", "history", "BenchmarkHistory", "benchmark", 4)
+    service = MarketDataService(max_workers=args.workers, provider=provider, rate=0)
+    service.history = history
+
+    try:
+        await timed("cold store, 'max' (download + write)", lambda ticker: service.get_history(ticker, "max"))
+        await timed("warm store, 'max'", lambda ticker: service.get_history(ticker, "max"))
+        await timed("warm store, '1y'", lambda ticker: service.get_history(ticker, "1y"))
+
+        # The next day only the newest bars are downloaded
+        async with history.transaction():
+            await history.connection.execute("UPDATE Coverage SET updated = updated - ?", (DAY,))
+
+        await timed("next day, 'max' (tail only)", lambda ticker: service.get_history(ticker, "max"))
+
+        async with history.transaction():
+            await history.connection.execute("DELETE FROM Bars")
+            await history.connection.execute("DELETE FROM Coverage")
+
+        await timed("cold store, '1y'", lambda ticker: service.get_history(ticker, "1y"))
+        await timed("then '5y' (head only)", lambda ticker: service.get_history(ticker, "5y"))
+        return rows
+    finally:
+        await service.close()
+        await history.close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times price history requests without and with the history store.")
+    parser.add_argument("--tickers", type=int, default=100, help="tickers requested at the same time")
+    parser.add_argument("--rtt-ms", type=float, default=150, help="modelled round trip of a provider call")
+    parser.add_argument("--per-bar-us", type=float, default=20, help="time every bar adds to a download")
+    parser.add_argument("--workers", type=int, default=8, help="market_data_workers")
+    parser.add_argument("--seed", type=int, default=3, help="seed of the listing days")
+    args = parser.parse_args(argv)
+
+    with workingFolder():
+        rows = asyncio.run(run(args))
+
+    printTable(["requests for every ticker", "ms", "upstream calls", "bars downloaded"], rows)
+
+if __name__ == "__main__":
+    main()
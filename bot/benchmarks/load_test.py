@@ -0,0 +1,573 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import logging
+import argparse
+import datetime
+import platform
+import tempfile
+import discord
+from typing import Callable
+
+bot_folder = os.path.dirname(os.path.dirname(os.path.realpath(__file__))) # The folder bot.py is in
+sys.path.insert(0, bot_folder)
+
+from utils.logger import log_pipeline
+from utils.metrics import current_command
+from utils.stocker.PortfolioTypes import UserOrder, UserOption
+
+"""
+==============================================================================================================
+Offline load test, it measures how many commands the bot can answer and how fast.
+
+The cogs of DiscordBot are loaded without connecting to Discord. A temporary users.db is seeded with made up
+users, portfolios and orders, market data comes from the fixture provider, and simulated users run a mix of
+commands at the same time through fake contexts. The same seed always replays the same commands. Runs that failed
+are counted as errors and left out of the latencies, an error embed is not the traffic being measured.
+
+    python bot/benchmarks/load_test.py --users 50 --duration 30 --mix view=40,buy=20,list=20,options=20
+    python bot/benchmarks/load_test.py --compare bot/benchmarks/results/before.json
+    python bot/benchmarks/load_test.py --database users.db --users 200
+==============================================================================================================
+"""
+
+# ========================================================================================================================================================================
+# Constants
+# ========================================================================================================================================================================
+
+repository_folder = os.path.dirname(bot_folder) # The folder the bot runs from, database/ is in it
+results_folder = os.path.join(bot_folder, "benchmarks", "results") # Where the results are saved by default
+
+# Default share of each command in the mix
+DEFAULT_MIX = "view=30,buy=15,sell=10,list=20,dividends=15,options=10"
+
+# This function is used to pick a portfolio of a simulated user
+def pickPortfolio(user: "SimulatedUser", rng: random.Random) -> int:
+    return rng.choice(user.portfolios)
+
+# This function is used to pick a stock the simulated user holds in a portfolio, any ticker when it holds none
+def pickHeld(user: "SimulatedUser", rng: random.Random, portfolio: int, tickers: list[str]) -> str:
+    held = user.held.get(portfolio)
+    return rng.choice(sorted(held)) if held else rng.choice(tickers)
+
+# This function is used to make the arguments of an order, bought at any ticker or sold from the stocks held
+def orderArguments(user: "SimulatedUser", rng: random.Random, tickers: list[str], sell: bool) -> dict:
+    portfolio = pickPortfolio(user, rng)
+    ticker = pickHeld(user, rng, portfolio, tickers) if sell else rng.choice(tickers)
+    quantity = rng.randint(1, 5) if sell else rng.randint(1, 50)
+    return {"ticker": ticker, "price": round(rng.uniform(5, 500), 2), "quantity": quantity, "status": "Filled", "id": portfolio}
+
+# This function is used to make the arguments of a command on one held stock
+def heldArguments(user: "SimulatedUser", rng: random.Random, tickers: list[str]) -> dict:
+    portfolio = pickPortfolio(user, rng)
+    return {"ticker": pickHeld(user, rng, portfolio, tickers), "id": portfolio}
+
+# Every command the mix can use, as name: (qualified command name, arguments(user, rng, tickers))
+COMMANDS: dict[str, tuple[str, Callable[["SimulatedUser", random.Random, list[str]], dict]]] = {
+    "view": ("portfolio view", lambda user, rng, tickers: {"id": pickPortfolio(user, rng)}),
+    "portfolios": ("portfolio list", lambda user, rng, tickers: {}),
+    "buy": ("order buy", lambda user, rng, tickers: orderArguments(user, rng, tickers, False)),
+    "sell": ("order sell", lambda user, rng, tickers: orderArguments(user, rng, tickers, True)),
+    "list": ("order list", heldArguments),
+    "dividends": ("dividend list", lambda user, rng, tickers: {"ticker": "all", "id": pickPortfolio(user, rng)}),
+    "dividend": ("dividend add", lambda user, rng, tickers: {**heldArguments(user, rng, tickers), "dividend": round(rng.uniform(0.1, 20), 2)}),
+    "options": ("option list", lambda user, rng, tickers: {"ticker": "all", "id": pickPortfolio(user, rng)}),
+    "watchlists": ("watchlist list", lambda user, rng, tickers: {})
+}
+
+# ========================================================================================================================================================================
+# Fake Discord Layer
+# ========================================================================================================================================================================
+
+"""
+Just enough of discord.py's user, message and context for the cogs to run. Everything sent is kept on the context, a
+command that answered with a red embed counts as an error like one that raised.
+"""
+
+class FakeAsset:
+    def __init__(self, url: str) -> None:
+        self.url: str = url
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str) -> None:
+        self.id: int = user_id
+        self.name: str = name
+        self.global_name: str = name
+        self.display_name: str = name
+        self.mention: str = f"<@{user_id}>"
+        self.bot: bool = False
+        self.avatar: FakeAsset | None = None
+        self.default_avatar: FakeAsset = FakeAsset("https://cdn.discordapp.com/embed/avatars/0.png")
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FakeUser) and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __str__(self) -> str:
+        return self.name
+
+class FakeMessage:
+    def __init__(self, content: str | None = None, embed: discord.Embed | None = None) -> None:
+        self.content: str | None = content
+        self.embed: discord.Embed | None = embed
+
+    async def edit(self, **kwargs):
+        self.embed = kwargs.get("embed", self.embed)
+
+    async def add_reaction(self, emoji: str):
+        pass
+
+    async def delete(self, **kwargs):
+        pass
+
+class FakeContext:
+    def __init__(self, bot, command, author: FakeUser) -> None:
+        self.bot = bot
+        self.command = command
+        self.author: FakeUser = author
+        self.guild = None # Commands run as if in DMs
+        self.interaction = None
+        self.message: FakeMessage = FakeMessage()
+        self.sent: list[FakeMessage] = []
+
+    async def send(self, content: str | None = None, embed: discord.Embed | None = None, **kwargs) -> FakeMessage:
+        message = FakeMessage(content, embed)
+        self.sent.append(message)
+        return message
+
+    async def reply(self, content: str | None = None, embed: discord.Embed | None = None, **kwargs) -> FakeMessage:
+        return await self.send(content, embed, **kwargs)
+
+    async def defer(self, **kwargs):
+        pass
+
+    # This function is used to get the error the command answered with, empty when it did not fail
+    def failed(self, error_color: int) -> str:
+        for message in self.sent:
+            if message.embed is not None and message.embed.color is not None and message.embed.color.value == error_color:
+                return message.embed.description or message.embed.title or "error"
+
+        return ""
+
+# ========================================================================================================================================================================
+# Simulated Users
+# ========================================================================================================================================================================
+
+class SimulatedUser:
+    def __init__(self, user_id: int) -> None:
+        self.member: FakeUser = FakeUser(user_id, f"loadtest{user_id}")
+        self.portfolios: list[int] = [] # Portfolio ids of the user
+        self.held: dict[int, set[str]] = {} # Tickers held by portfolio id
+
+# This function is used to draw tickers with a skewed distribution, the first tickers of the file are the popular ones
+def skewedTickers(tickers: list[str], rng: random.Random, count: int) -> list[str]:
+    weights = [1 / (rank + 1) for rank in range(len(tickers))]
+    return rng.choices(tickers, weights=weights, k=count)
+
+# This function is used to seed the database with users, portfolios, orders, dividends and options
+async def seed(bot, users: list[SimulatedUser], tickers: list[str], rng: random.Random, portfolios: int, orders: int) -> dict[str, int]:
+    database = bot.database_users
+    seeded = {"users": 0, "portfolios": 0, "orders": 0, "dividends": 0, "options": 0}
+    now = datetime.datetime.now().strftime("%m-%d-%Y %I:%M:%S %p")
+
+    for user in users:
+        if not await database.create_user(user.member.id, user.member.name):
+            continue
+
+        seeded["users"] += 1
+
+        for _ in range(portfolios):
+            portfolio = await database.create_portfolio(user.member.id)
+
+            if portfolio is None:
+                continue
+
+            portfolio_id = portfolio["portfolio_id"]
+            user.portfolios.append(portfolio_id)
+            user.held[portfolio_id] = set()
+            seeded["portfolios"] += 1
+
+            # One transaction per portfolio, like a user importing their history
+            async with database.transaction() as transaction:
+                for ticker in skewedTickers(tickers, rng, orders):
+                    if ticker not in user.held[portfolio_id]:
+                        if await database.add_stock(user.member.id, portfolio_id, ticker, transaction=transaction) == -1:
+                            continue
+
+                        user.held[portfolio_id].add(ticker)
+
+                    order = UserOrder(round(rng.uniform(5, 500), 2), rng.randint(1, 100), now, "Filled", "Buy")
+
+                    if await database.add_order(user.member.id, portfolio_id, ticker, order, transaction=transaction) != -1:
+                        seeded["orders"] += 1
+
+            # Dividends and options are read back after they are added, so they are saved one by one
+            # The first stock always gets both, a list command on a portfolio without any answers with an error embed
+            for position, ticker in enumerate(sorted(user.held[portfolio_id])):
+                if (position == 0 or rng.random() < 0.3) and await database.add_dividend(user.member.id, portfolio_id, ticker, round(rng.uniform(0.1, 20), 2), now) != -1:
+                    seeded["dividends"] += 1
+
+                if position == 0 or rng.random() < 0.1:
+                    option = UserOption(ticker, round(rng.uniform(5, 500), 2), rng.randint(1, 10), round(rng.uniform(0.1, 10), 2), now, "12-31-2030", "Filled", rng.choice(["call", "put"]), 0.0)
+
+                    if await database.add_option(user.member.id, portfolio_id, ticker, option) != -1:
+                        seeded["options"] += 1
+
+        if not user.portfolios:
+            user.portfolios.append(0) # Commands on a missing portfolio are measured as errors
+
+    return seeded
+
+# This function is used to take the users of a database made by generate_dataset.py instead of seeding new ones
+async def loadUsers(bot, count: int) -> tuple[list[SimulatedUser], dict[str, int]]:
+    database = bot.database_users
+    users = []
+
+    async with database.read("SELECT user_id FROM Users ORDER BY user_id LIMIT ?", (count,)) as cursor:
+        rows = await cursor.fetchall()
+
+    for row in rows:
+        user = SimulatedUser(row["user_id"])
+
+        async with database.read(
+            "SELECT p.portfolio_id, s.ticker FROM Portfolios p LEFT JOIN Stocks s ON s.portfolio_key = p.portfolio_key WHERE p.user_id = ?",
+            (user.member.id,)
+        ) as cursor:
+            for portfolio in await cursor.fetchall():
+                user.held.setdefault(portfolio["portfolio_id"], set())
+
+                if portfolio["ticker"] is not None:
+                    user.held[portfolio["portfolio_id"]].add(portfolio["ticker"])
+
+        user.portfolios = sorted(user.held) or [0]
+        users.append(user)
+
+    counts = {}
+
+    for table in ("Users", "Portfolios", "Orders", "Dividends", "Options"):
+        async with database.read(f"SELECT COUNT(*) FROM {table}") as cursor:
+            counts[table.lower()] = (await cursor.fetchone())[0]
+
+    return users, counts
+
+# ========================================================================================================================================================================
+# Results
+# ========================================================================================================================================================================
+
+class CommandResults:
+    def __init__(self) -> None:
+        self.latencies: list[float] = [] # Seconds of every run that worked
+        self.query_time: float = 0.0 # Seconds spent in SQLite
+        self.queries: int = 0
+        self.upstream_calls: int = 0
+        self.errors: int = 0
+        self.exceptions: dict[str, int] = {} # Exceptions raised by type
+        self.first_error: str = "" # What the first failed run answered, to tell why it failed
+
+    # This function is used to record one run of the command
+    def add(self, latency: float, record, status: str, error: str = "", exception: Exception | None = None):
+        if status != "ok":
+            self.errors += 1
+            self.first_error = self.first_error or error
+        else:
+            self.latencies.append(latency)
+
+            if record is not None:
+                self.query_time += record.query_time
+                self.queries += record.queries
+                self.upstream_calls += record.upstream_calls
+
+        if exception is not None:
+            name = type(exception).__name__
+            self.exceptions[name] = self.exceptions.get(name, 0) + 1
+
+    # This function is used to summarize the runs of the command, times in milliseconds
+    def summary(self, duration: float) -> dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        total = sum(latencies)
+
+        def at(q: float) -> float:
+            return latencies[min(count - 1, int(q * count))] * 1000 if count else 0.0
+
+        return {
+            "count": count,
+            "errors": self.errors,
+            "exceptions": self.exceptions,
+            "first_error": self.first_error,
+            "throughput": count / duration if duration > 0 else 0.0,
+            "mean_ms": total / count * 1000 if count else 0.0,
+            "p50_ms": at(0.5),
+            "p95_ms": at(0.95),
+            "p99_ms": at(0.99),
+            "max_ms": latencies[-1] * 1000 if count else 0.0,
+            "db_share": self.query_time / total if total > 0 else 0.0,
+            "queries": self.queries / count if count else 0.0,
+            "upstream_calls": self.upstream_calls / count if count else 0.0
+        }
+
+# ========================================================================================================================================================================
+# Load Test
+# ========================================================================================================================================================================
+
+# This function is used to read a mix like "view=30,buy=20" into {"view": 30.0, "buy": 20.0}
+def parseMix(text: str) -> dict[str, float]:
+    mix = {}
+
+    for part in text.split(","):
+        if not part.strip():
+            continue
+
+        name, _, weight = part.partition("=")
+        name = name.strip()
+
+        if name not in COMMANDS:
+            raise argparse.ArgumentTypeError(f"unknown command '{name}', choose from {', '.join(COMMANDS)}")
+
+        mix[name] = float(weight) if weight else 1.0
+
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("the mix needs at least one command with a weight above 0")
+
+    return mix
+
+# This function is used to run one command as a user, the way the bot would, and time it
+async def runCommand(bot, name: str, user: SimulatedUser, rng: random.Random, tickers: list[str], results: dict[str, CommandResults]):
+    qualified, arguments = COMMANDS[name]
+    command = bot.get_command(qualified)
+    context = FakeContext(bot, command, user.member)
+    kwargs = arguments(user, rng, tickers)
+
+    # Fill the parameters that were left out with their defaults, commands.Author becomes the user
+    for parameter_name, parameter in command.clean_params.items():
+        if parameter_name not in kwargs and not parameter.required:
+            kwargs[parameter_name] = await parameter.get_default(context)
+
+    exception = None
+    error = ""
+    await bot.start_command_metrics(context)
+    record = current_command.get()
+    started = time.perf_counter()
+
+    try:
+        await command(context, **kwargs)
+        error = context.failed(bot.colors["red"])
+        status = "error" if error else "ok"
+    except Exception as e:
+        status = "error"
+        error = f"{type(e).__name__}: {e}"
+        exception = e
+
+    latency = time.perf_counter() - started
+    bot.finish_command_metrics(context, status)
+    results.setdefault(name, CommandResults()).add(latency, record, status, error, exception)
+
+    # Later sells and lists use the stocks that were bought
+    if name == "buy" and status == "ok":
+        user.held.setdefault(kwargs["id"], set()).add(kwargs["ticker"])
+
+# This function is used to run commands as one user until the deadline
+async def simulate(bot, user: SimulatedUser, mix: dict[str, float], rng: random.Random, tickers: list[str], deadline: float, think: float, results: dict[str, CommandResults]):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights=weights)[0]
+        await runCommand(bot, name, user, rng, tickers, results)
+
+        if think > 0:
+            await asyncio.sleep(rng.uniform(0, 2 * think)) # Users don't type at a steady pace
+        else:
+            await asyncio.sleep(0) # Let the other users in
+
+# This function is used to start the bot without the gateway, seed it and run the simulated users
+async def run(args: argparse.Namespace, mix: dict[str, float]) -> dict:
+    import bot as bot_module # Imported here, once the working folder holds the temporary database
+
+    # The market data comes from the fixture provider
+    bot_module.config["market_data_provider"] = "fixture"
+    bot_module.config["fixture_latency_ms"] = args.latency_ms
+    bot_module.config["fixture_error_rate"] = args.error_rate
+    bot_module.config["write_batch_size"] = args.write_batch_size
+
+    if args.rate is not None:
+        bot_module.config["market_data_rate"] = args.rate
+
+    bot_module.logger.setLevel(logging.WARNING) # Only the problems, every command would be logged otherwise
+
+    bot = bot_module.DiscordBot()
+    await bot.start_services()
+
+    try:
+        rng = random.Random(args.seed)
+        tickers = list(bot.tickers.order)[:args.tickers] # In the order of the tickers file
+        started = time.perf_counter()
+
+        if args.database:
+            users, seeded = await loadUsers(bot, args.users)
+        else:
+            users = [SimulatedUser(1_000_000 + index) for index in range(args.users)]
+            seeded = await seed(bot, users, tickers, rng, args.portfolios, args.orders)
+
+        seed_time = time.perf_counter() - started
+
+        # Each user gets its own random stream, so the commands don't depend on how the tasks interleave
+        results: dict[str, CommandResults] = {}
+        stalls_before = bot.watchdog.stall_count
+        bot.watchdog.lags.clear() # Only the lag while the users run
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+
+        await asyncio.gather(*(
+            simulate(bot, user, mix, random.Random(args.seed * 1_000_003 + index), tickers, deadline, args.think_ms / 1000, results)
+            for index, user in enumerate(users)
+        ))
+
+        duration = time.perf_counter() - started
+        commands = {name: results[name].summary(duration) for name in sorted(results)}
+        total = sum(result["count"] for result in commands.values())
+        query_time = sum(result.query_time for result in results.values())
+        latency = sum(sum(result.latencies) for result in results.values())
+
+        return {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": f"{platform.system()} {platform.release()}",
+            "options": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "keep")},
+            "mix": mix,
+            "seeded": seeded,
+            "seed_seconds": seed_time,
+            "duration": duration,
+            "total": {
+                "count": total,
+                "errors": sum(result["errors"] for result in commands.values()),
+                "throughput": total / duration if duration > 0 else 0.0,
+                "db_share": query_time / latency if latency > 0 else 0.0
+            },
+            "commands": commands,
+            "event_loop": {
+                **{f"{key}_ms": value * 1000 for key, value in bot.watchdog.percentiles().items()},
+                "samples": len(bot.watchdog.lags),
+                "stalls": bot.watchdog.stall_count - stalls_before
+            },
+            "market_data": {
+                "provider_calls": bot.market_data.provider.calls,
+                "throttled": bot.market_data.throttled,
+                "rejected": bot.market_data.rejected,
+                "stale_served": bot.market_data.stale_served
+            }
+        }
+    finally:
+        await bot.market_data.close()
+        await bot.database_users.close()
+        await bot.database_history.close()
+        await bot.fear_greed.close()
+        await bot.watchdog.close()
+
+# This function is used to print the results as a table
+def printResults(results: dict, previous: dict | None = None):
+    total = results["total"]
+    print(f"{total['count']} commands in {results['duration']:.1f}s : {total['throughput']:.1f}/s, {total['errors']} errors, {total['db_share'] * 100:.1f}% of the time in SQLite")
+    print(f"seeded {', '.join(f'{count} {name}' for name, count in results['seeded'].items())} in {results['seed_seconds']:.1f}s")
+    print(f"event loop lag p50 {results['event_loop']['p50_ms']:.2f} ms, p99 {results['event_loop']['p99_ms']:.2f} ms, max {results['event_loop']['max_ms']:.2f} ms, {results['event_loop']['stalls']} stalls")
+    print()
+    print(f"{'command':<12}{'count':>8}{'errors':>8}{'per s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'db':>7}{'queries':>9}{'upstream':>10}")
+
+    for name, result in results["commands"].items():
+        print(
+            f"{name:<12}{result['count']:>8}{result['errors']:>8}{result['throughput']:>9.1f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+            f"{result['p99_ms']:>9.2f}{result['db_share'] * 100:>6.0f}%{result['queries']:>9.1f}{result['upstream_calls']:>10.2f}"
+        )
+
+    # Failed runs are not in the numbers above, show why they failed
+    for name, result in results["commands"].items():
+        if result["errors"]:
+            print(f"{name} failed {result['errors']} times, first with : {result['first_error']}")
+
+    if previous is None:
+        return
+
+    # The change from an earlier run, a positive p95 change is a slowdown
+    print()
+    print(f"compared to {previous.get('created', 'the previous run')}: throughput {change(previous['total']['throughput'], total['throughput'])}")
+
+    for name, result in results["commands"].items():
+        before = previous.get("commands", {}).get(name)
+
+        if before is not None:
+            print(f"{name:<12} p50 {change(before['p50_ms'], result['p50_ms']):>8}  p95 {change(before['p95_ms'], result['p95_ms']):>8}  p99 {change(before['p99_ms'], result['p99_ms']):>8}")
+
+# This function is used to format the change between two values in percent
+def change(before: float, after: float) -> str:
+    return f"{(after - before) / before * 100:+.1f}%" if before > 0 else "n/a"
+
+# This function is used to read the command line
+def parseArguments(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Runs simulated users against the bot's cogs without Discord and reports the throughput and latency of every command.")
+    parser.add_argument("--users", type=int, default=50, help="simulated users running commands at the same time")
+    parser.add_argument("--duration", type=float, default=30, help="seconds the commands run for")
+    parser.add_argument("--think-ms", type=float, default=0, help="average pause of a user between two commands, 0 for none")
+    parser.add_argument("--mix", type=parseMix, default=DEFAULT_MIX, help=f"weight of each command, from {', '.join(COMMANDS)} (default {DEFAULT_MIX})")
+    parser.add_argument("--portfolios", type=int, default=2, help="portfolios seeded for each user")
+    parser.add_argument("--orders", type=int, default=20, help="orders seeded in each portfolio")
+    parser.add_argument("--tickers", type=int, default=500, help="tickers from assets/tickers.txt the orders are drawn from, the first ones more often")
+    parser.add_argument("--latency-ms", type=float, default=50, help="time every fixture market data call takes")
+    parser.add_argument("--error-rate", type=float, default=0, help="chance that a market data call fails")
+    parser.add_argument("--rate", type=float, default=None, help="market data calls per second, 0 turns the limit off (default from config.json)")
+    parser.add_argument("--write-batch-size", type=int, default=0, help="batch order, dividend and option inserts, 0 commits each one")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random data and commands")
+    parser.add_argument("--database", default="", help="users.db made by generate_dataset.py to run against instead of seeding one, it is copied first")
+    parser.add_argument("--output", default="", help="JSON file the results are saved to (default benchmarks/results/load_test-{time}.json)")
+    parser.add_argument("--compare", default="", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary folder with the database and the logs")
+    return parser.parse_args(argv)
+
+def main(argv: list[str] | None = None):
+    args = parseArguments(argv)
+    mix = args.mix if isinstance(args.mix, dict) else parseMix(args.mix)
+    output = os.path.realpath(args.output) if args.output else os.path.join(results_folder, f"load_test-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    previous = None
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+
+    # The databases and the logs go to a temporary folder laid out like the repository
+    working_folder = tempfile.mkdtemp(prefix="bot-load-test-")
+    shutil.copytree(os.path.join(repository_folder, "database", "migrations"), os.path.join(working_folder, "database", "migrations"))
+
+    if args.database:
+        shutil.copyfile(args.database, os.path.join(working_folder, "database", "users.db"))
+    os.makedirs(os.path.join(working_folder, "logs"))
+    current_folder = os.getcwd()
+    os.chdir(working_folder)
+
+    try:
+        results = asyncio.run(run(args, mix))
+    finally:
+        os.chdir(current_folder)
+        log_pipeline.stop() # Write the queued log records before the folder goes away
+
+        if args.keep:
+            print(f"kept {working_folder}")
+        else:
+            shutil.rmtree(working_folder, ignore_errors=True)
+
+    printResults(results, previous)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\nsaved the results to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import time
+import asyncio
+import logging
+import argparse
+from common import workingFolder, printTable
+from utils.logger import log_pipeline
+from utils.metrics import LoopWatchdog
+from utils.db_manager.user_manager import UserManager
+
+"""
+==============================================================================================================
+Database logs written by the event loop, and queued to the log pipeline's background thread.
+
+Before the pipeline every logger had its file handler attached directly, so each record was formatted and written
+by whoever logged it. The same logging runs both ways: a burst of logger.info calls timed on the caller, then users
+creating watchlists at the same time through UserManager while a watchdog measures how late the event loop gets.
+The slow disk makes every flush take a little longer, like a busy disk or a slow terminal would.
+
+    python bot/benchmarks/log_pipeline.py
+    python bot/benchmarks/log_pipeline.py --records 20000 --users 200 --slow-flush-ms 0.5
+==============================================================================================================
+"""
+
+flush = logging.StreamHandler.flush # Flush of every file handler, slowed down for the slow disk
+
+async def run(mode: str, run_id: int, args: argparse.Namespace) -> list:
+    database = UserManager()
+    await database.start("users.db", "users", f"BenchmarkUsers{run_id}", "benchmark", 2) # A logger of its own, the handlers of other runs ignore it
+
+    if mode == "before":
+        # Write from the logger like before the pipeline
+        database.logger.removeHandler(log_pipeline.queue_handler)
+        handler = logging.FileHandler("logs/before.log", encoding="utf-8")
+        handler.setFormatter(logging.Formatter("[{asctime}] [{levelname}] {name}: {message}", database.date_format, style="{"))
+        database.logger.addHandler(handler)
+
+    try:
+        started = time.perf_counter()
+
+        for index in range(args.records):
+            database.logger.info(f"{index} added stock to watchlist 3 : AAPL")
+
+        records = args.records / (time.perf_counter() - started)
+
+        watchdog = LoopWatchdog(0.01, 0.25)
+        await watchdog.start()
+
+        async def user(user_id: int):
+            await database.create_user(user_id, f"user{user_id}")
+
+            for index in range(args.watchlists):
+                await database.create_watchlist(user_id, f"watchlist {index}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(user_id) for user_id in range(1, args.users + 1)))
+        mutations = args.users * (args.watchlists + 1) / (time.perf_counter() - started)
+
+        lag = watchdog.percentiles()
+        await watchdog.close()
+        return [mode, records, mutations, lag["p50"] * 1000, lag["p99"] * 1000, lag["max"] * 1000]
+    finally:
+        await database.close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times logging from the event loop and through the log pipeline.")
+    parser.add_argument("--records", type=int, default=20_000, help="logger.info calls timed on the caller")
+    parser.add_argument("--users", type=int, default=200, help="users making changes at the same time")
+    parser.add_argument("--watchlists", type=int, default=20, help="watchlists every user creates")
+    parser.add_argument("--slow-flush-ms", type=float, default=0.5, help="time every flush takes on the slow disk")
+    args = parser.parse_args(argv)
+
+    rows = []
+
+    for disk, delay in (("fast", 0.0), ("slow", args.slow_flush_ms / 1000)):
+        logging.StreamHandler.flush = (lambda handler, delay=delay: (time.sleep(delay), flush(handler))[1]) if delay else flush
+
+        for mode in ("before", "pipeline"):
+            with workingFolder():
+                rows.append([disk, *asyncio.run(run(mode, len(rows), args))])
+
+    logging.StreamHandler.flush = flush
+    printTable(["disk", "logging", "records/s on caller", "mutations/s", "loop lag p50 ms", "p99 ms", "max ms"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import asyncio
+import argparse
+from common import workingFolder, generateUsers, measure, printTable
+from utils.db_manager.user_manager import UserManager
+
+"""
+==============================================================================================================
+/portfolio view before and after get_portfolio_summary.
+
+Before, the command asked for the totals of the portfolio and of every stock one function at a time, and each
+of them read all the orders again. After, one query returns every total. Both are timed on portfolios of 10
+stocks with 10, 100 and 1000 orders made by generate_dataset.py, and the totals they return are compared.
+
+    python bot/benchmarks/portfolio_summary.py
+    python bot/benchmarks/portfolio_summary.py --orders 10,100,1000,10000 --repeat 50
+==============================================================================================================
+"""
+
+# This function is used to read the totals the way /portfolio view did before the summary query
+async def before(database: UserManager, user_id: int) -> dict:
+    stocks = await database.get_stocks(user_id, 0)
+    totals = {
+        "investment": await database.get_portfolio_investment(user_id, 0),
+        "quantity": await database.get_portfolio_quantity(user_id, 0),
+        "gain_loss": await database.get_portfolio_gain_loss(user_id, 0),
+        "dividends": await database.get_portfolio_dividends(user_id, 0)
+    }
+
+    for stock in stocks:
+        await database.get_stock_quantity(user_id, 0, stock["ticker"])
+        await database.get_stock_investment(user_id, 0, stock["ticker"])
+        await database.get_stock_gain_loss(user_id, 0, stock["ticker"])
+
+    return totals
+
+# This function is used to read the totals with the summary query
+async def after(database: UserManager, user_id: int) -> dict:
+    summary = await database.get_portfolio_summary(user_id, 0)
+    return {key: summary[key] for key in ("investment", "quantity", "gain_loss", "dividends")}
+
+async def run(orders: int, repeat: int) -> list:
+    generateUsers("--users", "1", "--portfolios", "1", "--stocks", "10", "--orders", str(orders), "--dividends", "10", "--options", "0", "--watchlists", "0")
+
+    database = UserManager()
+    await database.start("users.db", "users", "BenchmarkUsers", "benchmark", 0) # Every read on the writer, so the trace sees it
+
+    try:
+        async with database.read("SELECT user_id FROM Users") as cursor:
+            user_id = (await cursor.fetchone())["user_id"]
+
+        statements = [0]
+        await database.connection.set_trace_callback(lambda sql: statements.__setitem__(0, statements[0] + 1))
+
+        row = [orders]
+
+        for path in (before, after):
+            statements[0] = 0
+            await path(database, user_id)
+            row.append(statements[0])
+            row.append(await measure(lambda: path(database, user_id), repeat))
+
+        old_totals, new_totals = await before(database, user_id), await after(database, user_id)
+        same = all(abs((old_totals[key] or 0) - new_totals[key]) < 1e-6 for key in old_totals)
+        return row + [f"{row[2] / row[4]:.1f}x", "yes" if same else f"no {old_totals} {new_totals}"]
+    finally:
+        await database.close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times /portfolio view's totals before and after get_portfolio_summary.")
+    parser.add_argument("--orders", default="10,100,1000", help="orders in the portfolio, one run for each")
+    parser.add_argument("--repeat", type=int, default=20, help="times each path is timed, the median is shown")
+    args = parser.parse_args(argv)
+
+    rows = []
+
+    for orders in (int(value) for value in args.orders.split(",")):
+        with workingFolder():
+            rows.append(asyncio.run(run(orders, args.repeat)))
+
+    printTable(["orders", "before queries", "before ms", "after queries", "after ms", "speedup", "same totals"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import time
+import random
+import asyncio
+import argparse
+from common import printTable
+import utils.stocker.QuoteCache as quote_cache
+from utils.stocker.MarketData import MarketDataService
+from utils.stocker.TickerIndex import TickerIndex
+
+"""
+==============================================================================================================
+/yahoo lookups without and with the session aware quote cache.
+
+Before the cache every lookup was a provider call. The lookups are replayed on a simulated clock, at the rate of
+each trading session, with tickers drawn from assets/tickers.txt with a Zipf distribution and periods 1d/5d/1mo
+at 70/20/10. The provider only counts its calls, so the table shows how many calls the cache saves.
+
+    python bot/benchmarks/quote_cache.py
+    python bot/benchmarks/quote_cache.py --sizes 64,256,1024 --skew 1.1
+==============================================================================================================
+"""
+
+# Trading session, lookups per second and seconds replayed
+LOADS = [("markethours", 20, 600), ("afterhours", 5, 600), ("closed", 2, 3600)]
+
+class SimulatedClock:
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+class CountingProvider:
+    name = "counting"
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+
+    def get_stock(self, ticker: str, period: str, interval: str) -> tuple:
+        self.calls += 1
+        return ("history", {"symbol": ticker})
+
+async def run(session: str, rate: int, seconds: int, size: int, tickers: list[str], weights: list[float], seed: int) -> list:
+    clock = SimulatedClock()
+    quote_cache.time = clock # The cache ages its entries on the simulated clock
+
+    provider = CountingProvider()
+    service = MarketDataService(provider=provider, cache_size=size, rate=0)
+    service.cache.ttl = lambda: service.cache.ttls[session] # Stay in one session
+
+    rng = random.Random(seed)
+    lookups = rate * seconds
+    drawn = rng.choices(tickers, weights, k=lookups)
+    periods = rng.choices(["1d", "5d", "1mo"], [0.7, 0.2, 0.1], k=lookups)
+
+    try:
+        for index, (ticker, period) in enumerate(zip(drawn, periods)):
+            clock.now = index / rate
+            await service.get_stock(ticker, period)
+    finally:
+        await service.close()
+        quote_cache.time = time
+
+    cache = service.cache
+    return [session, f"{rate}/s for {seconds}s", size, lookups, lookups, provider.calls, f"{cache.hit_rate():.1%}", cache.expired, cache.evictions]
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Counts the provider calls of /yahoo lookups without and with the quote cache.")
+    parser.add_argument("--sizes", default="64,256,1024", help="quote_cache_size values, one run for each")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the tickers looked up")
+    parser.add_argument("--seed", type=int, default=7, help="seed of the lookups")
+    args = parser.parse_args(argv)
+
+    tickers = list(TickerIndex.from_file().order)
+    weights = [1 / (rank + 1) ** args.skew for rank in range(len(tickers))]
+    rows = []
+
+    for session, rate, seconds in LOADS:
+        for size in (int(value) for value in args.sizes.split(",")):
+            rows.append(asyncio.run(run(session, rate, seconds, size, tickers, weights, args.seed)))
+
+    printTable(["session", "load", "size", "lookups", "calls before", "calls after", "hit rate", "expired", "evicted"], rows)
+
+    # Time of a lookup answered from the cache, and of the session aware time to live
+    service = MarketDataService(provider=CountingProvider(), rate=0)
+    service.cache.put(("AAPL", "1d", "1d"), ("history", {}), 1e9)
+    started = time.perf_counter()
+
+    async def lookups():
+        for _ in range(100_000):
+            await service.get_stock("aapl")
+
+    asyncio.run(lookups())
+    lookup_us = (time.perf_counter() - started) / 100_000 * 1e6
+
+    cache = quote_cache.QuoteCache()
+    started = time.perf_counter()
+
+    for _ in range(100_000):
+        cache.ttl()
+
+    print(f"\ncached lookup {lookup_us:.2f} us, ttl() {(time.perf_counter() - started) / 100_000 * 1e6:.2f} us ({len(tickers):,} tickers)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from common import workingFolder, generateUsers, printTable
+from utils.db_manager.user_manager import UserManager
+from utils.stocker.PortfolioTypes import UserOrder
+
+"""
+==============================================================================================================
+UserManager reads with and without the WAL reader pool.
+
+With 0 readers every read goes through the writer connection and waits behind the commits, with readers the
+portfolio views run on their own connections while the orders are written. The same mix of views and order
+inserts over the users of a generate_dataset.py database is run for every pool size.
+
+    python bot/benchmarks/reader_pool.py
+    python bot/benchmarks/reader_pool.py --readers 0,1,2,4,8 --views 2000 --writes 200
+==============================================================================================================
+"""
+
+async def run(readers: int, args: argparse.Namespace) -> list:
+    database = UserManager()
+    await database.start("users.db", "users", "BenchmarkUsers", "benchmark", readers)
+
+    try:
+        async with database.read("SELECT Stocks.user_id, Stocks.ticker FROM Stocks JOIN Portfolios ON Portfolios.portfolio_key = Stocks.portfolio_key WHERE Portfolios.portfolio_id = 0") as cursor:
+            holdings = [(row["user_id"], row["ticker"]) for row in await cursor.fetchall()]
+
+        user_ids = sorted({user_id for user_id, _ in holdings})
+        rng = random.Random(args.seed)
+        view_times: list[float] = []
+
+        async def view(user_id: int):
+            started = time.perf_counter()
+            await database.get_portfolio(user_id, 0)
+            await database.get_portfolio_summary(user_id, 0)
+            view_times.append((time.perf_counter() - started) * 1000)
+
+        async def write(user_id: int, ticker: str):
+            await database.add_order(user_id, 0, ticker, UserOrder(100.0, 1, "01-02-2024 10:00:00 AM", "Filled", "Buy"))
+
+        jobs = [view(rng.choice(user_ids)) for _ in range(args.views)] + [write(*rng.choice(holdings)) for _ in range(args.writes)]
+        rng.shuffle(jobs)
+
+        started = time.perf_counter()
+        await asyncio.gather(*jobs)
+        total = (time.perf_counter() - started) * 1000
+
+        view_times.sort()
+        return [readers, total, statistics.median(view_times), view_times[int(len(view_times) * 0.99) - 1]]
+    finally:
+        await database.close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times concurrent portfolio views and order inserts with different reader pool sizes.")
+    parser.add_argument("--readers", default="0,4", help="reader pool sizes to compare, 0 reads on the writer like before")
+    parser.add_argument("--users", type=int, default=50, help="users in the database")
+    parser.add_argument("--views", type=int, default=500, help="portfolio views run at the same time")
+    parser.add_argument("--writes", type=int, default=50, help="order inserts mixed in with the views")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the data and of the mix")
+    args = parser.parse_args(argv)
+
+    rows = []
+
+    for readers in (int(value) for value in args.readers.split(",")):
+        # A fresh copy of the same database for every pool size, the writes of one run don't slow the next
+        with workingFolder():
+            generateUsers("--users", str(args.users), "--portfolios", "1", "--orders", "50", "--seed", str(args.seed))
+            rows.append(asyncio.run(run(readers, args)))
+
+    printTable(["readers", "total ms", "view p50 ms", "view p99 ms"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import time
+import random
+import asyncio
+import argparse
+import tracemalloc
+from common import workingFolder, generateUsers, printTable
+from utils.db_manager.caches import MembershipCache
+from utils.db_manager.user_manager import UserManager
+
+"""
+==============================================================================================================
+does_user_exist with a SELECT for every check, with the registered users in a set, and in a bloom filter.
+
+Every command checks that its user registered first. The same checks, half of them for registered users and
+half for ids that never registered, are timed against the three ways of answering them on a generate_dataset.py
+database, with the memory the set or the filter takes and the most that loading it took. The ids are streamed
+from the database in chunks, loading them into one list first like before is shown for the filter.
+
+    python bot/benchmarks/registered_users.py
+    python bot/benchmarks/registered_users.py --users 10000,1000000 --checks 4000
+==============================================================================================================
+"""
+
+async def run(users: int, args: argparse.Namespace) -> list:
+    database = UserManager()
+    await database.start("users.db", "users", "BenchmarkUsers", "benchmark", 4)
+
+    try:
+        async with database.read("SELECT user_id FROM Users") as cursor:
+            user_ids = [row[0] for row in await cursor.fetchall()]
+
+        rng = random.Random(args.seed)
+        unregistered = max(user_ids) + 1
+        checks = [rng.choice(user_ids) for _ in range(args.checks // 2)] + [unregistered + index for index in range(args.checks // 2)]
+        rows = []
+
+        for mode, set_limit in (("SELECT", None), ("set", users), ("bloom", 0), ("bloom, fetchall", 0)):
+            cache = MembershipCache() if set_limit is None else MembershipCache(set_limit=set_limit)
+            database.registered_users = cache # Not loaded, every check asks the database like before
+            memory = peak = 0.0
+
+            if set_limit is not None:
+                tracemalloc.start()
+
+                if mode == "bloom, fetchall":
+                    # How the ids were loaded before they were streamed, every id in one list first
+                    async with database.read("SELECT user_id FROM Users") as cursor:
+                        cache.load([row[0] for row in await cursor.fetchall()], users)
+                else:
+                    await database.load_registered_users()
+
+                memory, peak = (value / 1e6 for value in tracemalloc.get_traced_memory())
+                tracemalloc.stop()
+
+            started = time.perf_counter()
+
+            for user_id in checks:
+                await database.does_user_exist(user_id)
+
+            check_us = (time.perf_counter() - started) / len(checks) * 1e6
+            queried = sum(1 for user_id in checks[args.checks // 2:] if cache.check(user_id) is None)
+            rows.append([users, mode, memory, peak, check_us, f"{queried}/{args.checks // 2}"])
+
+        return rows
+    finally:
+        await database.close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times does_user_exist with a SELECT, a set and a bloom filter.")
+    parser.add_argument("--users", default="10000,1000000", help="registered users, one run for each")
+    parser.add_argument("--checks", type=int, default=4000, help="checks timed, half of them for users that did not register")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the checks")
+    args = parser.parse_args(argv)
+
+    rows = []
+
+    for users in (int(value) for value in args.users.split(",")):
+        with workingFolder():
+            generateUsers("--users", str(users), "--portfolios", "0", "--watchlists", "0")
+            rows.extend(asyncio.run(run(users, args)))
+
+    printTable(["users", "mode", "memory MB", "peak MB while loading", "avg check us", "unregistered checks that queried"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import time
+import asyncio
+import argparse
+from common import workingFolder, generateUsers, printTable
+from utils.db_manager.user_manager import UserManager
+
+"""
+==============================================================================================================
+Deleting the first order of a ticker, before and after the ROW_NUMBER() renumbering.
+
+Before, update_order_indexes looped over the orders in Python with one UPDATE and one COMMIT per order, and the
+UPDATE matched every order of the ticker so all of them ended with the same id. After, delete_order renumbers
+with one UPDATE ... FROM a ROW_NUMBER() window in the same transaction as the delete. Both run on a ticker with
+the same orders made by generate_dataset.py, the commits and the ids left are counted.
+
+    python bot/benchmarks/renumber.py
+    python bot/benchmarks/renumber.py --orders 100,1000,5000
+==============================================================================================================
+"""
+
+# This function is used to delete the first order and renumber the others the way update_order_indexes did before
+async def before(database: UserManager, user_id: int, ticker: str):
+    portfolio_key = await database.get_portfolio_key(user_id, 0)
+
+    await database.connection.execute("DELETE FROM Orders WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND order_id = 0", (user_id, portfolio_key, ticker,))
+    await database.connection.commit()
+
+    orders = list(await database.get_orders(user_id, 0, ticker))
+
+    for index in range(len(orders)):
+        await database.connection.execute(
+            "UPDATE Orders SET order_id = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
+            (index, user_id, portfolio_key, ticker,)
+        )
+        await database.connection.commit()
+
+async def after(database: UserManager, user_id: int, ticker: str):
+    await database.delete_order(user_id, 0, ticker, 0)
+
+async def run(orders: int, path) -> list:
+    generateUsers("--users", "1", "--portfolios", "1", "--stocks", "1", "--orders", str(orders), "--dividends", "0", "--options", "0", "--watchlists", "0")
+
+    database = UserManager()
+    await database.start("users.db", "users", "BenchmarkUsers", "benchmark", 0)
+
+    try:
+        async with database.read("SELECT user_id, ticker FROM Stocks") as cursor:
+            row = await cursor.fetchone()
+
+        commits = [0]
+        await database.connection.set_trace_callback(lambda sql: commits.__setitem__(0, commits[0] + (sql.strip().upper() in ("COMMIT", "RELEASE"))))
+
+        started = time.perf_counter()
+        await path(database, row["user_id"], row["ticker"])
+        elapsed = (time.perf_counter() - started) * 1000
+
+        await database.connection.set_trace_callback(None)
+
+        async with database.read("SELECT COUNT(*), COUNT(DISTINCT order_id), MIN(order_id), MAX(order_id) FROM Orders") as cursor:
+            count, distinct, first, last = await cursor.fetchone()
+
+        return [orders, path.__name__, elapsed, commits[0], f"{count} left, ids {first}..{last}, {distinct} distinct"]
+    finally:
+        await database.close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times deleting the first order of a ticker before and after the ROW_NUMBER() renumbering.")
+    parser.add_argument("--orders", default="100,1000", help="orders of the ticker, one run for each (the loop takes over a minute at 5000)")
+    args = parser.parse_args(argv)
+
+    rows = []
+
+    for orders in (int(value) for value in args.orders.split(",")):
+        for path in (before, after):
+            with workingFolder():
+                rows.append(asyncio.run(run(orders, path)))
+
+    printTable(["orders", "path", "ms", "commits", "ids"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import time
+import random
+import argparse
+import tracemalloc
+from common import printTable
+from discord.app_commands import Choice
+from utils.stocker.TickerIndex import TickerIndex, tickers_file
+
+"""
+==============================================================================================================
+Ticker suggestions from a Choice for every line of assets/tickers.txt, and from the TickerIndex autocomplete.
+
+The old Choice list and the index are built from the same file and their build time and memory are compared.
+Then the index answers prefixes of random tickers, tickers with one letter replaced, and empty and one letter
+queries, first uncached and then again from its memoised answers, with the time the first typo takes to build the
+deletion index.
+
+    python bot/benchmarks/ticker_autocomplete.py
+    python bot/benchmarks/ticker_autocomplete.py --queries 2000 --popular 500
+==============================================================================================================
+"""
+
+# This function is used to build the choices the way the portfolio cog did before
+def oldChoices() -> list[Choice]:
+    with open(tickers_file, "r") as f:
+        return [Choice(name=ticker, value=ticker) for ticker in f.read().splitlines()]
+
+# This function is used to time building something, the fastest of a few builds, and the memory it holds
+def built(name: str, build, repeat: int = 5) -> list:
+    elapsed = []
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build()
+        elapsed.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    value = build() # Kept until its memory is read
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return [name, min(elapsed) * 1000, memory / 1024]
+
+# This function is used to time every query, as its 50th and 99th percentile and its slowest in us
+def latencies(index: TickerIndex, queries: list[str]) -> tuple[float, float, float]:
+    times = []
+
+    for query in queries:
+        started = time.perf_counter_ns()
+        index.search(query)
+        times.append(time.perf_counter_ns() - started)
+
+    times.sort()
+    return times[len(times) // 2] / 1000, times[int(len(times) * 0.99)] / 1000, times[-1] / 1000
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times ticker suggestions from the old Choice list and from the TickerIndex.")
+    parser.add_argument("--queries", type=int, default=2000, help="prefix and typo queries timed")
+    parser.add_argument("--popular", type=int, default=500, help="tickers given a random order and watch count")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the queries")
+    args = parser.parse_args(argv)
+
+    builds = [built("old Choice list", oldChoices), built("TickerIndex", TickerIndex.from_file)]
+
+    rng = random.Random(args.seed)
+    index = TickerIndex.from_file()
+    index.set_popularity({ticker: rng.randint(0, 50) for ticker in rng.sample(index.tickers, args.popular)})
+
+    started = time.perf_counter()
+    index.search("QQQQX") # The first typo builds the deletion index
+    deletions_ms = (time.perf_counter() - started) * 1000
+
+    # This function is used to replace one letter of a ticker
+    def typo(ticker: str) -> str:
+        position = rng.randrange(len(ticker))
+        return ticker[:position] + rng.choice("QXZJ") + ticker[position + 1:]
+
+    queries = {
+        "prefix": [ticker[:rng.randint(1, len(ticker))] for ticker in rng.sample(index.tickers, args.queries)],
+        "typo": [typo(ticker) for ticker in rng.sample([ticker for ticker in index.tickers if len(ticker) >= 3], args.queries)],
+        "empty and one letter": ["", "A", "M", "T"]
+    }
+    rows = []
+
+    for name, asked in queries.items():
+        index.results.clear()
+        rows.append([name, "uncached", *latencies(index, asked)])
+        rows.append([name, "cached", *latencies(index, asked)])
+
+    printTable(["suggestions", "best build ms", "memory KiB"], builds)
+    print()
+    printTable(["queries", "answers", "p50 us", "p99 us", "max us"], rows)
+    print(f"\n{len(index):,} tickers, the first typo built the deletion index in {deletions_ms:.1f} ms")
+    print(f"AAP -> {index.search('aap')[:5]}, APPL -> {index.search('APPL')[:5]}, MSTF -> {index.search('MSTF')[:5]}")
+
+if __name__ == "__main__":
+    main()
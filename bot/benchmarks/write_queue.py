@@ -0,0 +1,66 @@
+import time
+import asyncio
+import argparse
+from common import workingFolder, generateUsers, printTable
+from utils.db_manager.user_manager import UserManager
+from utils.stocker.PortfolioTypes import UserOrder
+
+"""
+==============================================================================================================
+Order inserts with and without the group commit write queue.
+
+Every user of a generate_dataset.py database places the same orders at the same time, once with every add_order
+committing on its own and once with the writes batched by the queue. The order ids every user got back are
+checked to be 0, 1, 2... in the order they were placed.
+
+    python bot/benchmarks/write_queue.py
+    python bot/benchmarks/write_queue.py --synchronous NORMAL,FULL --users 200 --orders 10
+==============================================================================================================
+"""
+
+async def run(synchronous: str, batch_size: int, args: argparse.Namespace) -> list:
+    database = UserManager()
+    await database.start("users.db", "users", "BenchmarkUsers", "benchmark", 2)
+    await database.connection.execute(f"PRAGMA synchronous = {synchronous}")
+
+    try:
+        async with database.read("SELECT user_id, ticker FROM Stocks") as cursor:
+            holdings = [(row["user_id"], row["ticker"]) for row in await cursor.fetchall()]
+
+        if batch_size > 0:
+            await database.start_write_queue(batch_size, args.delay_ms / 1000)
+
+        async def user(user_id: int, ticker: str) -> list[int]:
+            return [await database.add_order(user_id, 0, ticker, UserOrder(100.0, 1, "01-02-2024 10:00:00 AM", "Filled", "Buy")) for _ in range(args.orders)]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(user(user_id, ticker) for user_id, ticker in holdings))
+        elapsed = time.perf_counter() - started
+
+        writes = len(holdings) * args.orders
+        contiguous = all(ids == list(range(args.orders)) for ids in results)
+        return [synchronous, batch_size or "off", writes, elapsed * 1000, writes / elapsed, "yes" if contiguous else "no"]
+    finally:
+        await database.close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Times concurrent order inserts with and without the write queue.")
+    parser.add_argument("--synchronous", default="NORMAL,FULL", help="PRAGMA synchronous values to compare, NORMAL is what the bot uses")
+    parser.add_argument("--users", type=int, default=200, help="users placing orders at the same time")
+    parser.add_argument("--orders", type=int, default=10, help="orders placed by every user, one after the other")
+    parser.add_argument("--batch-size", type=int, default=64, help="write_batch_size of the queue")
+    parser.add_argument("--delay-ms", type=float, default=5, help="write_batch_delay_ms of the queue")
+    args = parser.parse_args(argv)
+
+    rows = []
+
+    for synchronous in args.synchronous.split(","):
+        for batch_size in (0, args.batch_size):
+            with workingFolder():
+                generateUsers("--users", str(args.users), "--portfolios", "1", "--stocks", "1", "--orders", "0", "--dividends", "0", "--options", "0", "--watchlists", "0")
+                rows.append(asyncio.run(run(synchronous, batch_size, args)))
+
+    printTable(["synchronous", "batch", "writes", "ms", "writes/s", "ids in order"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -5,41 +5,52 @@ import sys
 import logging
 import discord
 from utils.misc import *
+from utils.logger import LoggingFormatter, log_pipeline
 from dotenv import load_dotenv
 from discord.ext import commands, tasks
 from discord.ext.commands import Context
 from utils.db_manager.user_manager import UserManager
+from utils.db_manager.history_manager import HistoryManager
+from utils.stocker.MarketData import MarketDataService
+from utils.stocker.FearGreed import FearGreedCapture
+from utils.stocker.TickerIndex import TickerIndex
+from utils.metrics import MetricsServer, LoopWatchdog, current_command, metrics
+from utils.stocker.Providers import YahooProvider, FixtureProvider, fixture_folder
 
 # Check if the config file exists
-if not os.path.isfile(f"{os.path.realpath(os.path.dirname(__file__))}\\config.json"):
+if not os.path.isfile(os.path.join(os.path.realpath(os.path.dirname(__file__)), "config.json")):
     sys.exit("'config.json' not found! Please add it and try again.")
 else:
-    with open(f"{os.path.realpath(os.path.dirname(__file__))}\\config.json", encoding='utf-8') as f:
+    with open(os.path.join(os.path.realpath(os.path.dirname(__file__)), "config.json"), encoding='utf-8') as f:
         config = json.load(f)
 
 intents = discord.Intents.all() # All intents are enabled
 
-# Logger
+# Logger, records are written by a background thread so logging never blocks the event loop
 logger = logging.getLogger("Discord Bot")
 logger.setLevel(logging.INFO)
+log_pipeline.configure(config.get("log_max_bytes", 10485760), config.get("log_backup_count", 5), config.get("log_rotate_when", ""))
 
-# Console handler
+# Console handler, colored when it is a terminal
 console_handler = logging.StreamHandler()
-console_handler_formatter = logging.Formatter(
+console_handler_formatter = LoggingFormatter() if sys.stderr.isatty() else logging.Formatter(
     "[{asctime}] [{levelname}] {name}: {message}", "%m-%d-%Y %I:%M:%S %p", style="{"
 )
 console_handler.setFormatter(console_handler_formatter)
 
 # File handler
-file_handler = logging.FileHandler(filename="./logs/discord.log", encoding="utf-8", mode="w")
-file_handler_formatter = logging.Formatter(
-    "[{asctime}] [{levelname}] {name}: {message}", "%m-%d-%Y %I:%M:%S %p", style="{"
-)
-file_handler.setFormatter(file_handler_formatter)
+file_handler = log_pipeline.file_handler("./logs/discord.log")
+
+# discord.py logs to the console through the queue too
+discord_logger = logging.getLogger("discord")
+discord_logger.setLevel(logging.INFO)
+discord_console_handler = logging.StreamHandler()
+discord_console_handler.setFormatter(console_handler_formatter)
 
 # Add the handlers
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+log_pipeline.attach(logger, console_handler, file_handler)
+log_pipeline.attach(discord_logger, discord_console_handler)
+log_pipeline.start()
 
 # All bot statuses
 ALL_STATUSES = Statuses()
@@ -62,6 +73,20 @@ class DiscordBot(commands.Bot):
         self.logger = logger
         self.config = config
         self.database_users: UserManager = UserManager()
+        self.database_history: HistoryManager = HistoryManager()
+        self.market_data: MarketDataService = MarketDataService(
+            config.get("market_data_workers", 4), config.get("market_data_timeout", 15), self.market_data_provider(), logger=logger,
+            cache_size=config.get("quote_cache_size", 1024), batch_size=config.get("quote_batch_size", 100),
+            rate=config.get("market_data_rate", 5), burst=config.get("market_data_burst", 10),
+            failure_threshold=config.get("breaker_failures", 5), reset_timeout=config.get("breaker_reset", 30)
+        )
+        self.tickers: TickerIndex = TickerIndex.from_file() # Suggests tickers as they are typed
+        self.fear_greed: FearGreedCapture = FearGreedCapture(
+            driver_path=config.get("geckodriver_path", ""), ttl=config.get("fear_greed_ttl", 300), logger=logger
+        )
+        self.metrics_server: MetricsServer = MetricsServer(config.get("metrics_host", "127.0.0.1"), config.get("metrics_port", 9108), logger=logger)
+        self.watchdog: LoopWatchdog = LoopWatchdog(config.get("loop_watchdog_interval_ms", 100) / 1000, config.get("loop_lag_threshold_ms", 250) / 1000, logger=logger)
+        self.before_invoke(self.start_command_metrics) # Every command is timed from here to on_command_completion or on_command_error
 
         self.colors = {
             "red": 0xE02B2B, # Error
@@ -74,6 +99,20 @@ class DiscordBot(commands.Bot):
             "orange": 0xE08B2B
         }
 
+    def market_data_provider(self):
+        """
+        Returns the market data provider chosen in the config, recorded fixtures let the bot run without the network.
+        """
+        if self.config.get("market_data_provider", "yahoo") == "fixture":
+            return FixtureProvider(
+                self.config.get("fixture_folder") or fixture_folder,
+                latency=self.config.get("fixture_latency_ms", 0) / 1000,
+                error_rate=self.config.get("fixture_error_rate", 0),
+                synthesize=True
+            )
+
+        return YahooProvider()
+
     async def load_cogs(self) -> None:
         """
         The code in this function is executed whenever the bot will start.
@@ -112,6 +151,55 @@ class DiscordBot(commands.Bot):
         """
         await self.wait_until_ready()
 
+    @tasks.loop(minutes=10.0)
+    async def popularity_task(self) -> None:
+        """
+        Rank the ticker suggestions by how often they are traded and watched.
+        """
+        self.tickers.set_popularity(await self.database_users.get_ticker_popularity())
+
+    @tasks.loop(seconds=60.0)
+    async def prewarm_task(self) -> None:
+        """
+        Refresh the quotes of every held and watched stock so portfolios are priced from the cache.
+        """
+        tracked = await self.database_users.get_tracked_tickers(self.config.get("prewarm_limit", 2000))
+        await self.market_data.prewarm([row["ticker"] for row in tracked])
+
+        # Quotes stay fresh longer outside market hours, so the loop slows down with them
+        self.prewarm_task.change_interval(seconds=self.market_data.prewarm_interval())
+
+    @prewarm_task.before_loop
+    async def before_prewarm_task(self) -> None:
+        """
+        Before starting the pre-warm task, we make sure the bot is ready
+        """
+        await self.wait_until_ready()
+
+    async def start_services(self) -> None:
+        """
+        Loads the cogs and starts the databases and the market data service, everything the commands need but the gateway.
+        """
+        # Watch the event loop from the start, so slow startup work shows up too
+        await self.watchdog.start()
+
+        await self.load_cogs()
+
+        # Users Manager
+        self.database_users.registered_users.set_limit = self.config.get("user_set_limit", 1000000) # Above this, use a bloom filter
+        await self.database_users.start("users.db", "users", "UsersManager", "users", self.config.get("database_readers", 4))
+
+        # Batch order, dividend and option inserts into one commit when enabled
+        if self.config.get("write_batch_size", 0) > 0:
+            await self.database_users.start_write_queue(self.config["write_batch_size"], self.config.get("write_batch_delay_ms", 5) / 1000)
+
+        # History Manager, keeps downloaded price history so only new bars are downloaded
+        await self.database_history.start("history.db", "history", "HistoryManager", "history", self.config.get("database_readers", 4))
+        self.market_data.history = self.database_history
+
+        # Market data calls run on a thread pool so they don't block the event loop
+        await self.market_data.start()
+
     async def setup_hook(self) -> None:
         """
         This will just be executed when the bot starts the first time.
@@ -126,18 +214,25 @@ class DiscordBot(commands.Bot):
             f"Running on: {platform.system()} {platform.release()} ({os.name})"
         )
         self.logger.info("================== Loading ======================")
-        await self.load_cogs()
+
+        await self.start_services()
         self.status_task.start()
 
-        # Users Manager
-        await self.database_users.start("users.db", "users_schema.sql", "UsersManager", "users")
+        self.popularity_task.start()
+
+        # Prometheus metrics on a local port, 0 turns them off
+        if self.config.get("metrics_port", 9108) > 0:
+            await self.metrics_server.start()
+
+        if self.config.get("prewarm_enabled", True):
+            self.prewarm_task.start()
 
     async def on_ready(self) -> None:
         """
         The code in this event is executed when the bot is ready and has successfully logged in.
         """
         try:
-            synced = await bot.tree.sync()
+            synced = await self.tree.sync()
             self.logger.info(f"{len(synced)} slash commands have been synchronized")
         except Exception as e:
             self.logger.error(e)
@@ -154,12 +249,34 @@ class DiscordBot(commands.Bot):
             return
         await self.process_commands(message)
 
+    async def start_command_metrics(self, context: Context) -> None:
+        """
+        The code in this hook is executed right before every command, it starts timing the command.
+
+        :param context: The context of the command that is about to run.
+        """
+        if context.command is not None:
+            metrics.start_command(context.command.qualified_name, f"{context.author} ({context.author.id})")
+
+    def finish_command_metrics(self, context: Context, status: str) -> None:
+        """
+        Records the time, queries and market data calls of the command that just finished.
+
+        :param context: The context of the command that finished.
+        :param status: "ok" or "error".
+        """
+        record = current_command.get()
+        if record is not None and context.command is not None and record.command == context.command.qualified_name:
+            metrics.finish_command(record, status)
+            current_command.set(None)
+
     async def on_command_completion(self, context: Context) -> None:
         """
         The code in this event is executed every time a normal command has been *successfully* executed.
 
         :param context: The context of the command that has been executed.
         """
+        self.finish_command_metrics(context, "ok")
         if (context.command == None):
             return
         full_command_name = context.command.qualified_name
@@ -181,6 +298,7 @@ class DiscordBot(commands.Bot):
         :param context: The context of the normal command that failed executing.
         :param error: The error that has been faced.
         """
+        self.finish_command_metrics(context, "error")
         if isinstance(error, commands.CommandOnCooldown):
             minutes, seconds = divmod(error.retry_after, 60)
             hours, minutes = divmod(minutes, 60)
@@ -234,7 +352,9 @@ class DiscordBot(commands.Bot):
             raise error
   
 
-load_dotenv()
+# Only run the bot when this file is started, the load test imports it without connecting
+if __name__ == "__main__":
+    load_dotenv()
 
-bot = DiscordBot()
-bot.run(os.getenv("TOKEN", "NONE"))
\ No newline at end of file
+    bot = DiscordBot()
+    bot.run(os.getenv("TOKEN", "NONE"), log_handler=None) # discord.py's logger is already set up above
\ No newline at end of file
@@ -3,6 +3,8 @@ from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context
 from utils.misc.bot_misc import all_cog_choices
+from utils.metrics import metrics
+from utils.logger import log_pipeline
 
 """
 Owner cog
@@ -185,11 +187,194 @@ class Owner(commands.Cog, name="owner"):
         message = context.message
 
         self.bot.logger.info("Shutting down.")
-        self.bot.database.close()
+        self.bot.prewarm_task.cancel()
+        self.bot.popularity_task.cancel()
+        await self.bot.database_users.close()
+        await self.bot.market_data.close()
+        await self.bot.database_history.close()
+        await self.bot.fear_greed.close()
+        await self.bot.metrics_server.close()
+        await self.bot.watchdog.close()
 
         await message.add_reaction("✅")
 
         await self.bot.close()
+        log_pipeline.stop() # Write the log records the services queued while closing, last so none are left behind
+
+    @commands.hybrid_group(
+        name="stats",
+        description="The bot statistics commands.",
+    )
+    @commands.is_owner()
+    async def stats_group(self, context: Context) -> None:
+        """
+        The stats group command.
+
+        :param context: The hybrid command context.
+        """
+        pass
+
+    @stats_group.command(
+        name="cache",
+        description="Displays the database cache statistics.",
+    )
+    @commands.is_owner()
+    async def stats_cache(self, context: Context) -> None:
+        """
+        Displays the hit/miss counters of the database caches.
+
+        :param context: The hybrid command context.
+        """
+
+        database = self.bot.database_users
+
+        embed = discord.Embed(
+            title="Database Caches",
+            color=0xBEBEFE
+        )
+
+        for name, cache in (("Portfolio keys", database.portfolio_keys), ("Stock keys", database.stock_keys)):
+            embed.add_field(
+                name=name,
+                value=f"Hits: {cache.hits}\nMisses: {cache.misses}\nHit rate: {cache.hit_rate():.1%}\nSize: {len(cache)}/{cache.max_size}",
+                inline=True
+            )
+
+        users = database.registered_users
+        embed.add_field(
+            name="Registered users",
+            value=f"Hits: {users.hits}\nMisses: {users.misses}\nHit rate: {users.hit_rate():.1%}\nMode: {'set' if users.members is not None else 'bloom filter'}",
+            inline=True
+        )
+
+        await context.send(embed=embed)
+
+    @stats_group.command(
+        name="market",
+        description="Displays the market data statistics.",
+    )
+    @commands.is_owner()
+    async def stats_market(self, context: Context) -> None:
+        """
+        Displays the market data request counters and how long the event loop was blocked.
+
+        :param context: The hybrid command context.
+        """
+
+        stats = self.bot.market_data.stats()
+
+        embed = discord.Embed(
+            title="Market Data",
+            color=0xBEBEFE
+        )
+        embed.add_field(
+            name="Requests",
+            value=f"Total: {stats['requests']}\nIn flight: {stats['in_flight']}\nCoalesced: {stats['coalesced']}\nErrors: {stats['errors']}\nTimeouts: {stats['timeouts']}\nThrottled: {stats['throttled']}\nRejected: {stats['rejected']}\nStale served: {stats['stale_served']}\nAverage: {stats['average_fetch'] * 1000:.0f} ms",
+            inline=True
+        )
+        embed.add_field(
+            name="Event loop",
+            value=f"Blocked: {self.bot.watchdog.stall_count} times\nBlocked for: {self.bot.watchdog.blocked_time * 1000:.0f} ms\nMax lag: {self.bot.watchdog.max_lag * 1000:.1f} ms",
+            inline=True
+        )
+
+        embed.add_field(
+            name="Circuit breaker",
+            value=f"State: {stats['breaker']}\nOpened: {stats['breaker_opened']} times",
+            inline=True
+        )
+
+        embed.add_field(
+            name="Pre-warm",
+            value=f"Cycles: {stats['prewarm_cycles']}\nSkipped: {stats['prewarm_skipped']}\nTickers: {stats['prewarm_tickers']}\nCoverage: {stats['prewarm_coverage']:.1%}\nCycle time: {stats['prewarm_time'] * 1000:.0f} ms",
+            inline=True
+        )
+
+        cache = self.bot.market_data.cache
+        embed.add_field(
+            name="Quote cache",
+            value=f"Hits: {cache.hits}\nMisses: {cache.misses}\nExpired: {cache.expired}\nHit rate: {cache.hit_rate():.1%}\nSize: {len(cache)}/{cache.max_size}",
+            inline=True
+        )
+
+        await context.send(embed=embed)
+
+    @stats_group.command(
+        name="perf",
+        description="Displays how long each command takes and what it costs.",
+    )
+    @commands.is_owner()
+    async def stats_perf(self, context: Context) -> None:
+        """
+        Displays how long each command takes, and the queries and market data calls it makes.
+
+        :param context: The hybrid command context.
+        """
+
+        summary = metrics.command_summary()
+
+        embed = discord.Embed(
+            title="Performance",
+            description="Commands that took the most time in total, since the bot started." if summary else "No commands have run yet.",
+            color=0xBEBEFE
+        )
+
+        for row in summary[:10]:
+            embed.add_field(
+                name=f"/{row['command']}",
+                value=f"Runs: {row['count']} ({row['errors']} errors)\np50: {row['p50'] * 1000:.0f} ms\np95: {row['p95'] * 1000:.0f} ms\nMax: {row['max'] * 1000:.0f} ms\nQueries: {row['queries']:.1f} ({row['query_time'] * 1000:.1f} ms)\nMarket calls: {row['upstream']:.1f}",
+                inline=True
+            )
+
+        databases = "\n".join(f"{name}: {histogram.count} queries, {histogram.sum / histogram.count * 1000:.2f} ms avg" for name, histogram in sorted(metrics.query_time.items()) if histogram.count)
+        embed.add_field(name="Database", value=databases or "No queries yet.", inline=False)
+
+        if self.bot.metrics_server.runner is not None:
+            embed.set_footer(text=f"Prometheus: http://{self.bot.metrics_server.host}:{self.bot.metrics_server.port}/metrics")
+
+        await context.send(embed=embed)
+
+    @stats_group.command(
+        name="lag",
+        description="Displays how late the event loop runs and what blocked it.",
+    )
+    @commands.is_owner()
+    async def stats_lag(self, context: Context) -> None:
+        """
+        Displays the event loop lag percentiles and the stacks of the latest stalls.
+
+        :param context: The hybrid command context.
+        """
+
+        watchdog = self.bot.watchdog
+        lag = watchdog.percentiles()
+
+        embed = discord.Embed(
+            title="Event Loop",
+            description=f"Lag over the last {len(watchdog.lags)} checks, one every {watchdog.interval * 1000:.0f} ms.",
+            color=0xBEBEFE
+        )
+        embed.add_field(
+            name="Lag",
+            value=f"p50: {lag['p50'] * 1000:.1f} ms\np95: {lag['p95'] * 1000:.1f} ms\np99: {lag['p99'] * 1000:.1f} ms\nMax: {lag['max'] * 1000:.1f} ms",
+            inline=True
+        )
+        embed.add_field(
+            name="Stalls",
+            value=f"Over {watchdog.threshold * 1000:.0f} ms: {watchdog.stall_count} times\nBlocked for: {watchdog.blocked_time * 1000:.0f} ms\nWorst: {watchdog.max_lag * 1000:.0f} ms",
+            inline=True
+        )
+
+        # The innermost frames show the call that blocked
+        for stall in list(watchdog.stalls)[-3:]:
+            stack = "\n".join(stall["stack"].strip().splitlines()[-8:])
+            embed.add_field(
+                name=f"{stall['lag'] * 1000:.0f} ms in {stall['command']}"[:256],
+                value=f"<t:{int(stall['time'])}:R>\n```{stack[-950:]}```",
+                inline=False
+            )
+
+        await context.send(embed=embed)
 
 async def setup(bot) -> None:
     await bot.add_cog(Owner(bot))
\ No newline at end of file
@@ -1,5 +1,4 @@
 # This file is mostly complete and is ready for use. Report any bugs to the github repository.
-import os
 import discord
 import asyncio
 import datetime
@@ -11,6 +10,8 @@ from discord.ext.commands import Context
 from utils.stocker.PortfolioTypes import UserOrder
 from utils.stocker.PortfolioTypes import UserOption
 from utils.db_manager.user_manager import UserManager
+from utils.misc.paginator import Paginator
+from utils.misc.bot_misc import ticker_autocomplete
 
 """
 Portfolio Cog
@@ -22,14 +23,6 @@ Portfolio Cog
 # Constants
 # =========
 
-# ticker_options
-try:
-    with open(os.path.join(os.path.dirname(__file__), "..", "assets", "tickers.txt"), "r") as f:
-        tickers = f.read().splitlines()
-        ticker_options = [Choice(name=ticker, value=ticker) for ticker in tickers]
-except:
-    ticker_options = []
-
 # status_options
 status_options = [Choice(name="Filled", value="Filled"), Choice(name="Pending", value="Pending")]
 
@@ -338,6 +331,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         :param user: The user whose portfolio should be displayed.
         :param id: The id of the portfolio that should be displayed.
         """
+        await context.defer() # The database reads and the quotes can take longer than the interaction allows
 
         # You or They
         isSelf: bool = user == context.author
@@ -372,46 +366,50 @@ class Portfolio(commands.Cog, name="portfolio"):
         embed.set_author(name=f"{title_your} Portfolio", icon_url=avatar_url)
         embed.set_footer(text=f"ID: {portfolio['portfolio_id']}")
 
-        all_stocks = await self.database_users.get_stocks(user.id, id)
+        # Get every total of the portfolio in a single query
+        summary = await self.database_users.get_portfolio_summary(user.id, id)
 
-        if (all_stocks == None):
+        if (summary == None):
             embed = self.errorEmbed(f"Error getting {your} stocks! Please try again later.")
             await context.send(embed=embed)
             return
-        
-        if len(list(all_stocks)) == 0:
+
+        if len(summary["tickers"]) == 0:
             if user == context.author:
                 embed.add_field(name="No stocks in this portfolio!", value="Use the /stock add command to add a stock.", inline=False)
             else:
-                embed.add_field(name="No stocks in this portfolio!", value=f"{user.display_name} needs to add a stock.", inline=False)  
+                embed.add_field(name="No stocks in this portfolio!", value=f"{user.display_name} needs to add a stock.", inline=False)
             await context.send(embed=embed)
             return
 
-        total_investment = await self.database_users.get_portfolio_investment(user.id, id)
-        total_quantity = await self.database_users.get_portfolio_quantity(user.id, id)
-        total_gain = await self.database_users.get_portfolio_gain_loss(user.id, id)
-        total_dividends = await self.database_users.get_portfolio_dividends(user.id, id)
-        if total_dividends != None and total_investment != None and total_gain != None:
-            total = total_gain + total_investment + total_dividends
-        
+        total_investment = summary["investment"]
+        total_quantity = summary["quantity"]
+        total_gain = summary["gain_loss"]
+        total_dividends = summary["dividends"]
+        total = total_gain + total_investment + total_dividends
+
+        # Price every stock with one batched download, cached quotes are reused
+        quotes = await self.bot.market_data.get_quotes([stock["ticker"] for stock in summary["tickers"]])
+        market_value = sum(stock["quantity"] * quotes[stock["ticker"].upper()]["price"] for stock in summary["tickers"] if stock["ticker"].upper() in quotes)
+
         embed.color = self.colors["green"] if total >= 0 else self.colors["red"]
         embed.add_field(name="Total Investment", value=f"${total_investment}", inline=True)
         embed.add_field(name="Total Quantity", value=f"{total_quantity}", inline=True)
         embed.add_field(name="Total Gain/Loss", value=f"${total_gain}", inline=True)
         embed.add_field(name="Total Dividends", value=f"${total_dividends}", inline=True)
         embed.add_field(name="Total", value=f"${total}", inline=True)
+        embed.add_field(name="Market Value", value=f"${market_value:,.2f}" if quotes else "Unavailable", inline=True)
 
-        for stock in all_stocks:
+        for stock in summary["tickers"]:
             ticker = stock["ticker"]
-            stock_quantity = await self.database_users.get_stock_quantity(user.id, id, ticker)
-            stock_investment = await self.database_users.get_stock_investment(user.id, id, ticker)
-            stock_gain_loss = await self.database_users.get_stock_gain_loss(user.id, id, ticker)
+            stock_gain_loss = stock["gain_loss"]
+            quote = quotes.get(ticker.upper())
 
-            if stock_gain_loss != None:
-                plus_minus = "+" if stock_gain_loss >= 0 else "-"
+            plus_minus = "+" if stock_gain_loss >= 0 else "-"
             gain_loss = str(stock_gain_loss).replace("-", "")
+            price = f"\nNow ${quote['price']:,.2f}{' (stale)' if quote.get('stale') else ''}" if quote is not None else ""
 
-            embed.add_field(name=f"{ticker}", value=f"{stock_quantity} shares @ ${stock_investment}", inline=True)
+            embed.add_field(name=f"{ticker}", value=f"{stock['quantity']} shares @ ${stock['investment']}{price}", inline=True)
             embed.add_field(name=f"${stock_gain_loss}", value=f"{plus_minus} ${gain_loss}", inline=True)
 
         await context.send(embed=embed)
@@ -449,8 +447,6 @@ class Portfolio(commands.Cog, name="portfolio"):
             await context.send(embed=embed)
             return
 
-        portfolios = sorted(portfolios, key=lambda x: x["created"], reverse=True)
-        
         if len(portfolios) == 0 and user == context.author:
             description = "Use the /portfolio create command to create a new portfolio."
         elif len(portfolios) == 0 and user != context.author:
@@ -497,7 +493,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         ticker="The stock that should be added to the portfolio.",
         id="The ID of the portfolio that the stock should be added to."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def add_stock(self, context: Context, ticker: str, id: int = 0) -> None:
         """
         Adds a stock to a portfolio.
@@ -566,7 +562,8 @@ class Portfolio(commands.Cog, name="portfolio"):
         tstamp="The timestamp of the stock purchase. (Optional: Use the format 'MM-DD-YYYY HH:MM:SS AM/PM')",
         id="The ID of the portfolio that the stock belongs to."
     )
-    @app_commands.choices(ticker=ticker_options, status=status_options)
+    @app_commands.choices(status=status_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def buy_order(self, context: Context, ticker: str, price: float, quantity: float, status: str, tstamp: str = "", id: int = 0) -> None:
         """
         Buys a certain stock
@@ -600,25 +597,34 @@ class Portfolio(commands.Cog, name="portfolio"):
         else:
             tstampObject = datetime.datetime.strptime(tstamp, self.databaseFormat)
 
-        # Check if stock is in database
-        user_stock = await self.database_users.get_stock(context.author.id, id, ticker)
-        
-        if (user_stock == None):
-            index = await self.database_users.add_stock(context.author.id, id, ticker) # Add stock to database
-
-            if (index == -1):
-                embed = self.errorEmbed("Error adding stock! Please try again later.")
-                await context.send(embed=embed)
-                return
-        
-        # Add order to database
+        error = ""
         uOrder = UserOrder(price, quantity, tstamp, status, "Buy")
-        order_id = await self.database_users.add_order(context.author.id, id, ticker, uOrder)
 
-        if (order_id == -1):
-            embed = self.errorEmbed("Error adding order! Please try again later.")
+        # Add the stock and the order in one transaction so a failed order doesn't leave an empty stock behind
+        async with self.database_users.transaction() as transaction:
+            # Check if stock is in database
+            user_stock = await self.database_users.get_stock(context.author.id, id, ticker)
+
+            if (user_stock == None):
+                index = await self.database_users.add_stock(context.author.id, id, ticker, transaction=transaction) # Add stock to database
+
+                if (index == -1):
+                    error = "Error adding stock! Please try again later."
+
+            # Add order to database
+            if (error == ""):
+                order_id = await self.database_users.add_order(context.author.id, id, ticker, uOrder, transaction=transaction)
+
+                if (order_id == -1):
+                    error = "Error adding order! Please try again later."
+
+            if (error != ""):
+                transaction.abort() # Rollback the stock as well
+
+        if (error != ""):
+            embed = self.errorEmbed(error)
             await context.send(embed=embed)
-            return  
+            return
 
         # Send success message
         embed = discord.Embed(
@@ -643,7 +649,8 @@ class Portfolio(commands.Cog, name="portfolio"):
         tstamp="The timestamp of the stock sale. (Optional: Use the format 'MM-DD-YYYY HH:MM:SS AM/PM')",
         id="The ID of the portfolio that the stock belongs to."
     )
-    @app_commands.choices(ticker=ticker_options, status=status_options)
+    @app_commands.choices(status=status_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def sell_order(self, context: Context, ticker: str, price: float, quantity: float, status: str, tstamp: str = "", id: int = 0) -> None:
         """
         Sells a certain stock
@@ -702,7 +709,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         portfolio_id="The ID of the portfolio that the stock belongs to.",
         user="The user whose order should be displayed."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def view_order(self, context: Context, ticker: str, id: int, portfolio_id: int = 0, user: discord.User = commands.Author) -> None:
         """
         Displays a specific order.
@@ -762,7 +769,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the portfolio that should be displayed.",
         user="The user whose orders should be displayed."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def list_orders(self, context: Context, ticker: str, id: int = 0, user: discord.User = commands.Author) -> None:
         """
         Displays the user's orders.
@@ -790,40 +797,41 @@ class Portfolio(commands.Cog, name="portfolio"):
             await context.send(embed=embed)
             return
         
-        all_orders = await self.database_users.get_orders(user.id, id, ticker)
+        order_count = await self.database_users.get_order_count_by_ticker(user.id, id, ticker)
+        avatar_url = user.avatar.url if user.avatar != None else user.default_avatar.url
 
-        if all_orders is None:
-            embed = self.errorEmbed(f"{you.capitalize()} do not have any orders for this stock!")
-            await context.send(embed=embed)
-            return
-        
-        all_orders = sorted(all_orders, key=lambda x: x["created"], reverse=True)
+        # This function is used to build the embed of one page of orders
+        def build_embed(orders: list, page: int) -> discord.Embed:
+            embed = discord.Embed(
+                title=f"{title_your} orders for {ticker}",
+                description=f"Use the /order command to view a specific order.",
+                color=self.colors["pink"]
+            )
+            embed.set_author(name=f"{order_count} orders", icon_url=avatar_url)
+            embed.set_footer(text=f"ID: {id} | Page {page}")
+
+            for order in orders:
+                order_date = datetime.datetime.strptime(order["created"], "%m-%d-%Y %I:%M:%S %p").strftime("%b %d, %Y at %I:%M %p")
+                embed.add_field(
+                    name=f"Order [{order['order_id']}] on {order_date}",
+                    value=f"Type: {order['type']}\nPrice: {order['price']}\nQuantity: {order['quantity']}\nStatus: {order['status']}",
+                    inline=False
+                )
+
+            return embed
+
+        # Only the page being looked at is read from the database
+        paginator = Paginator(
+            context.author.id,
+            lambda after, before, limit: self.database_users.get_orders_page(user.id, id, ticker, after, before, limit),
+            build_embed,
+            "order_key"
+        )
 
         # Check if the user has any orders
-        if len(all_orders) == 0:
+        if not await paginator.start(context):
             embed = self.errorEmbed(f"{you.capitalize()} do not have any orders for this stock!")
             await context.send(embed=embed)
-            return
-        
-
-        embed = discord.Embed(
-            title=f"{title_your} orders for {ticker}",
-            description=f"Use the /order command to view a specific order.",
-            color=self.colors["pink"]
-        )
-        avatar_url = user.avatar.url if user.avatar != None else user.default_avatar.url
-        embed.set_author(name=f"{len(all_orders)} orders", icon_url=avatar_url)
-        embed.set_footer(text=f"ID: {id}")
-
-        for order in all_orders:
-            order_date = datetime.datetime.strptime(order["created"], "%m-%d-%Y %I:%M:%S %p").strftime("%b %d, %Y at %I:%M %p")
-            embed.add_field(
-                name=f"Order [{order['order_id']}] on {order_date}",
-                value=f"Type: {order['type']}\nPrice: {order['price']}\nQuantity: {order['quantity']}\nStatus: {order['status']}",
-                inline=False
-            )
-
-        await context.send(embed=embed)
 
     @order_group.command(
         name="delete",
@@ -834,7 +842,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the order that should be deleted.",
         portfolio_id="The ID of the portfolio that the stock belongs to."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def delete_order(self, context: Context, ticker: str, id: int, portfolio_id: int = 0) -> None:
         """
         Deletes a specific order.
@@ -882,7 +890,8 @@ class Portfolio(commands.Cog, name="portfolio"):
         tstamp="The new timestamp of the stock. (Optional: Use the format 'MM-DD-YYYY HH:MM:SS AM/PM')",
         portfolio_id="The ID of the portfolio that the stock belongs to."
     )
-    @app_commands.choices(ticker=ticker_options, status=status_options)
+    @app_commands.choices(status=status_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def update_order(self, 
                            context: Context, 
                            ticker: str, 
@@ -948,7 +957,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the portfolio that should be purged.",
         ticker="The stock you want to purge orders for. (Optional: Defaulted to 'all')"
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def purge_orders(self, context: Context, id: int, ticker: str = "all") -> None:
         """
         Deletes all cancelled orders in a portfolio.
@@ -1060,6 +1069,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         if not await self.database_users.does_user_exist(context.author.id): 
             embed = self.errorEmbed("You need to register first before you can add dividends!")
             await context.send(embed=embed)
+            return
 
         # Check if user has a portfolio with the given ID
         if (await self.database_users.get_portfolio(context.author.id, id) == None):
@@ -1068,16 +1078,35 @@ class Portfolio(commands.Cog, name="portfolio"):
             await context.send(embed=embed)
             return
         
-        # Check if stock exists
-        stock = await self.database_users.get_stock(context.author.id, id, ticker)
-        if (stock == None):
-            await self.database_users.add_stock(context.author.id, id, ticker) # Add stock to database
-        
         if tstamp == "":
             tstampObject = datetime.datetime.now()
             tstamp = tstampObject.strftime(self.databaseFormat)
+        else:
+            tstampObject = datetime.datetime.strptime(tstamp, self.databaseFormat)
+
+        error = ""
+
+        # Add the stock and the dividend in one transaction
+        async with self.database_users.transaction() as transaction:
+            # Check if stock exists
+            stock = await self.database_users.get_stock(context.author.id, id, ticker)
+            if (stock == None):
+                if (await self.database_users.add_stock(context.author.id, id, ticker, transaction=transaction) == -1): # Add stock to database
+                    error = "Error adding stock! Please try again later."
 
-        dividend_id = await self.database_users.add_dividend(context.author.id, id, ticker, dividend, tstamp) # Add dividend to database
+            if (error == ""):
+                dividend_id = await self.database_users.add_dividend(context.author.id, id, ticker, dividend, tstamp, transaction=transaction) # Add dividend to database
+
+                if (dividend_id == -1):
+                    error = "Error adding dividend! Please try again later."
+
+            if (error != ""):
+                transaction.abort() # Don't keep the stock if the dividend failed
+
+        if (error != ""):
+            embed = self.errorEmbed(error)
+            await context.send(embed=embed)
+            return
 
         embed = discord.Embed(
             title=f"Success!",
@@ -1132,71 +1161,52 @@ class Portfolio(commands.Cog, name="portfolio"):
             return
         
         if (ticker == "all"):
-            all_dividends = await self.database_users.get_dividends(user.id, id)
-            
-            if all_dividends is None:
-                embed = self.errorEmbed(f"{you.capitalize()} do not have any dividends!")
-                await context.send(embed=embed)
-                return
-            
-            all_dividends = sorted(all_dividends, key=lambda x: x["created"], reverse=True)
+            ticker_filter = None
+            title = f"{title_your} Dividends"
+            description = f"Use the \"/dividends [ticker]\" command to view dividends for a specific stock."
+            dividend_count = await self.database_users.get_dividend_count(user.id, id)
+        else:
+            stock = await self.database_users.get_stock(user.id, id, ticker)
 
-            # Check if the user has any dividends
-            if len(all_dividends) == 0:
-                embed = self.errorEmbed(f"{you.capitalize()} do not have any dividends!")
+            # Check if stock exists
+            if (stock == None):
+                embed = self.errorEmbed(f"{you.capitalize()} do not have a stock with that ticker!")
                 await context.send(embed=embed)
                 return
-            
+
+            ticker_filter = ticker
+            dividend_count = await self.database_users.get_dividend_count_by_ticker(user.id, id, ticker)
+            title = f"{title_your} Dividends for {ticker}"
+            description = f"{dividend_count} dividends found!"
+
+        # This function is used to build the embed of one page of dividends
+        def build_embed(dividends: list, page: int) -> discord.Embed:
             embed = discord.Embed(
-                title=f"{title_your} Dividends",
-                description=f"Use the \"/dividends [ticker]\" command to view dividends for a specific stock.",
+                title=title,
+                description=description,
                 color=self.colors["blue"]
             )
-            
-            embed.set_author(name=f"{len(all_dividends)}", icon_url=avatar_url)
-
-            for dividend in all_dividends:
-                owns = await self.database_users.get_dividend_count_by_ticker(user.id, id, dividend["ticker"])
-                embed.add_field(name=f"{dividend['ticker']}", value=f"{owns} dividends", inline=False)
-            
-            await context.send(embed=embed)
-            return
+            embed.set_author(name=f"{dividend_count}", icon_url=avatar_url)
+            embed.set_footer(text=f"Page {page}")
 
-        stock = await self.database_users.get_stock(user.id, id, ticker)
-        
-        # Check if stock exists
-        if (stock == None):
-            embed = self.errorEmbed(f"{you.capitalize} do not have a stock with that ticker!")
-            await context.send(embed=embed)
-            return
+            for dividend in dividends:
+                added = datetime.datetime.strptime(dividend["created"], "%m-%d-%Y %I:%M:%S %p").strftime("%b %d, %Y at %I:%M %p")
+                embed.add_field(name=f"{dividend['ticker']} [{dividend['dividend_id']}] : {added}", value=f"${dividend['dividend']}", inline=False)
 
-        all_dividends = await self.database_users.get_dividends_by_ticker(user.id, id, ticker)
+            return embed
 
-        if all_dividends is None:
-            embed = self.errorEmbed(f"{you.capitalize()} do not have any dividends for this stock!")
-            await context.send(embed=embed)
-            return
-        
-        all_dividends = sorted(all_dividends, key=lambda x: x["created"], reverse=True)
+        # Only the page being looked at is read from the database
+        paginator = Paginator(
+            context.author.id,
+            lambda after, before, limit: self.database_users.get_dividends_page(user.id, id, ticker_filter, after, before, limit),
+            build_embed,
+            "dividend_key"
+        )
 
         # Check if the user has any dividends
-        if len(all_dividends) == 0:
-            embed = self.errorEmbed(f"{you.capitalize()} do not have any dividends for this stock!")
+        if not await paginator.start(context):
+            embed = self.errorEmbed(f"{you.capitalize()} do not have any dividends{'' if ticker_filter is None else ' for this stock'}!")
             await context.send(embed=embed)
-            return
-        
-        embed = discord.Embed(
-            title=f"{title_your} Dividends for {ticker}",
-            description=f"{len(all_dividends)} dividends found!",
-            color=self.colors["blue"]
-        )
-        embed.set_author(name=f"{len(all_dividends)}", icon_url=avatar_url)
-
-        for dividend in all_dividends:
-            added = datetime.datetime.strptime(dividend["created"], "%m-%d-%Y %I:%M:%S %p").strftime("%b %d, %Y at %I:%M %p")
-            embed.add_field(name=f"[{dividend['dividend_id']}] : {added}", value=f"${dividend['dividend']}", inline=False)
-
-        await context.send(embed=embed)
 
     @dividend_group.command(
         name="delete",
@@ -1207,7 +1217,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The id of the dividend that should be deleted.",
         portfolio_id="The id of the portfolio that the dividend is in."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def delete_dividend(self, context: Context, ticker: str, id: int, portfolio_id: int = 0) -> None:
         """
         Deletes a specific dividend.
@@ -1307,8 +1317,6 @@ class Portfolio(commands.Cog, name="portfolio"):
             await context.send(embed=embed)
             return
         
-        watchlists = sorted(watchlists, key=lambda x: x["created"], reverse=True)
-
         if len(watchlists) == 0:
             embed = discord.Embed(
                 description=f"{you.capitalize()} do not have any watchlists!", color=self.colors["red"]
@@ -1367,37 +1375,59 @@ class Portfolio(commands.Cog, name="portfolio"):
             await context.send(embed=embed)
             return
 
-        embed = discord.Embed(
-            title=f"{watchlist['name']}",
-            description=f"{watchlist['description']}",
-            timestamp=datetime.datetime.strptime(watchlist["created"], "%m-%d-%Y %H:%M:%S %p"),
-            color=self.colors["purple"]
-        )
-        embed.set_author(name=f"{title_your} Watchlist", icon_url=avatar_url)
-        embed.set_footer(text=f"ID: {watchlist['watchlist_id']}")
+        stock_count = await self.database_users.get_watchlist_stock_count(user.id, watchlist["watchlist_id"])
 
-        all_stocks = await self.database_users.get_watchlist_stocks(user.id, watchlist["watchlist_id"])
-        
-        if all_stocks == None:
-            embed.add_field(name="It's empty!", value="No stocks in this watchlist!", inline=False)
-            await context.send(embed=embed)
-            return
-        
-        all_stocks = sorted(all_stocks, key=lambda x: x["created"], reverse=True)
+        # This function is used to build the embed of one page of stocks
+        def build_embed(stocks: list, page: int) -> discord.Embed:
+            embed = discord.Embed(
+                title=f"{watchlist['name']}",
+                description=f"{watchlist['description']}",
+                timestamp=datetime.datetime.strptime(watchlist["created"], "%m-%d-%Y %I:%M:%S %p"),
+                color=self.colors["purple"]
+            )
+            embed.set_author(name=f"{title_your} Watchlist", icon_url=avatar_url)
+            embed.set_footer(text=f"ID: {watchlist['watchlist_id']} | Page {page}")
 
-        if len(all_stocks) == 0:
-            embed.add_field(name="It's empty!", value="No stocks in this watchlist!", inline=False)
-            await context.send(embed=embed)
-            return
-        
-        all_text = ""
-        for stock in all_stocks:
-            since = datetime.datetime.strptime(watchlist["created"], "%m-%d-%Y %I:%M:%S %p").strftime("%B %d, %Y")
-            all_text += f"{stock['ticker']} | watching since ({since})\n"
+            all_text = ""
+            for stock in stocks:
+                since = datetime.datetime.strptime(stock["created"], "%m-%d-%Y %I:%M:%S %p").strftime("%B %d, %Y")
+                quote = quotes.get(stock["ticker"].upper())
+                price = f" | ${quote['price']:,.2f} ({'+' if quote['percent'] >= 0 else ''}{quote['percent']:.2f}%){' (stale)' if quote.get('stale') else ''}" if quote is not None else ""
+                all_text += f"{stock['ticker']}{price} | watching since ({since})\n"
 
-        embed.add_field(name=f"{len(all_stocks)} stocks found!", value=all_text, inline=False)
+            embed.add_field(name=f"{stock_count} stocks found!", value=all_text, inline=False)
+            return embed
 
-        await context.send(embed=embed)
+        quotes: dict[str, dict] = {}
+
+        # This function is used to read one page of stocks and price them with one batched download
+        async def fetch_page(after: tuple | None, before: tuple | None, limit: int) -> list | None:
+            stocks = await self.database_users.get_watchlist_stocks_page(user.id, watchlist["watchlist_id"], after, before, limit)
+
+            if stocks:
+                quotes.update(await self.bot.market_data.get_quotes([stock["ticker"] for stock in stocks]))
+
+            return stocks
+
+        # Only the page being looked at is read from the database
+        paginator = Paginator(
+            context.author.id,
+            fetch_page,
+            build_embed,
+            "watching_key",
+            per_page=20
+        )
+
+        if not await paginator.start(context):
+            embed = discord.Embed(
+                title=f"{watchlist['name']}",
+                description=f"{watchlist['description']}",
+                color=self.colors["purple"]
+            )
+            embed.set_author(name=f"{title_your} Watchlist", icon_url=avatar_url)
+            embed.set_footer(text=f"ID: {watchlist['watchlist_id']}")
+            embed.add_field(name="It's empty!", value="No stocks in this watchlist!", inline=False)
+            await context.send(embed=embed)
 
     @watchlist_group.command(
         name="add",
@@ -1408,7 +1438,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The id of the watchlist that the stock should be added to.",
         name="The name of the watchlist that the stock should be added to."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def add_watching(self, context: Context, ticker: str, id: int = 0, name: str = "") -> None:
         """
         Adds a stock to the user's watchlist.
@@ -1470,7 +1500,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The id of the watchlist that the stock should be removed from.",
         name="The name of the watchlist that the stock should be removed from."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def remove_watching(self, context: Context, ticker: str, id: int = 0, name: str = "") -> None:
         """
         Removes a stock from the user's watchlist.
@@ -1619,7 +1649,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the portfolio that should be displayed.",
         user="The user whose options should be displayed."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def list_options(self, context: Context, ticker: str = "all", id: int = 0, user: discord.User = commands.Author) -> None:
         """
         Displays the user's options.
@@ -1648,73 +1678,58 @@ class Portfolio(commands.Cog, name="portfolio"):
             return
         
         if (ticker == "all"):
-            all_options = await self.database_users.get_options(user.id, id)
-            
-            if all_options is None:
-                embed = self.errorEmbed(f"{you.capitalize()} do not have any options!")
-                await context.send(embed=embed)
-                return
-            
-            all_options = sorted(all_options, key=lambda x: x["created"], reverse=True)
+            ticker_filter = None
+            option_count = await self.database_users.get_option_count(user.id, id)
+            title = f"{option_count} Options Found!"
+            description = f"Use the \"/options [ticker]\" command to view options for a specific stock."
+            author = f"{title_your} Options"
+        else:
+            stock = await self.database_users.get_stock(user.id, id, ticker)
 
-            if len(all_options) == 0:
-                embed = self.errorEmbed(f"{you.capitalize()} do not have any options!")
+            if (stock == None):
+                embed = self.errorEmbed(f"{you.capitalize()} do not have a stock with that ticker!")
                 await context.send(embed=embed)
                 return
-            
+
+            ticker_filter = ticker
+            option_count = await self.database_users.get_option_count_by_ticker(user.id, id, ticker)
+            title = f"{option_count} options found!"
+            description = f"Use the \"/option [ticker] [id]\" command to view a specific option."
+            author = f"{title_your} Options for {ticker}"
+
+        # This function is used to build the embed of one page of options
+        def build_embed(options: list, page: int) -> discord.Embed:
             embed = discord.Embed(
-                title=f"{len(all_options)} Options Found!",
-                description=f"Use the \"/options [ticker]\" command to view options for a specific stock.",
+                title=title,
+                description=description,
                 color=self.colors["blue"]
             )
-            
-            embed.set_author(name=f"{title_your} Options", icon_url=avatar_url)
+            embed.set_author(name=author, icon_url=avatar_url)
+            embed.set_footer(text=f"Page {page}")
 
-            for option in all_options:
-                calls = await self.database_users.get_call_count(user.id, id, option["ticker"])
-                puts = await self.database_users.get_put_count(user.id, id, option["ticker"])
-                embed.add_field(name=f"{option['ticker']} : {calls + puts} options", value=f"{calls} calls & {puts} puts", inline=False)
-            
-            await context.send(embed=embed)
-            return
-        
-        stock = await self.database_users.get_stock(user.id, id, ticker)
+            for option in options:
+                embed.add_field(name=f"{option['ticker']} [{option['option_id']}] {option['type']} on {option['created']}", value=f"{option['expires']} {option['strike']} | {option['quantity']} @ ${option['premium']}", inline=False)
 
-        if (stock == None):
-            embed = self.errorEmbed(f"{you.capitalize} do not have a stock with that ticker!")
-            await context.send(embed=embed)
-            return
-        
-        all_options = await self.database_users.get_options_by_ticker(user.id, id, ticker)
+                if option["result"].lower() in ["filled", "pending", "cancelled"]:
+                    embedValue = "Still active."
+                else:
+                    embedValue = f"${option['gain_loss']}"
 
-        if all_options is None:
-            embed = self.errorEmbed(f"{you.capitalize()} do not have any options for this stock!")
-            await context.send(embed=embed)
-            return
-        
-        all_options = sorted(all_options, key=lambda x: x["created"], reverse=True)
+                embed.add_field(name=f"{option['result']}", value=embedValue, inline=True)
 
-        if len(all_options) == 0:
-            embed = self.errorEmbed(f"{you.capitalize()} do not have any options for this stock!")
-            await context.send(embed=embed)
-            return
-        
-        embed = discord.Embed(
-            title=f"{len(all_options)} options found!",
-            description=f"Use the \"/option [ticker] [id]\" command to view a specific option.",
-            color=self.colors["blue"]
+            return embed
+
+        # Only the page being looked at is read from the database, two fields per option keeps a page under the field limit
+        paginator = Paginator(
+            context.author.id,
+            lambda after, before, limit: self.database_users.get_options_page(user.id, id, ticker_filter, after, before, limit),
+            build_embed,
+            "option_key"
         )
-        embed.set_author(name=f"{title_your} Options for {ticker}", icon_url=avatar_url)
 
-        for option in all_options:
-            embed.add_field(name=f"[{option['option_id']}] {option['type']} on {option['created']}", value=f"{option['expires']} {option['strike']} | {option['quantity']} @ ${option['premium']}", inline=False)
-            
-            if option["status"] in ["filled", "pending", "cancelled"]:
-                embedValue = "Still active."
-            else:
-                embedValue = f"${option['gainloss']}"
-            
-            embed.add_field(name=f"{option['status']}", value=embedValue, inline=True)
+        if not await paginator.start(context):
+            embed = self.errorEmbed(f"{you.capitalize()} do not have any options{'' if ticker_filter is None else ' for this stock'}!")
+            await context.send(embed=embed)
 
     @option_group.command(
         name="view",
@@ -1726,7 +1741,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         portfolio_id="The ID of the portfolio that the stock belongs to.",
         user="The user whose option should be displayed."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def view_option(self, context: Context, ticker: str, id: int, portfolio_id: int = 0, user: discord.User = commands.Author) -> None:
         """
         Displays a specific option.
@@ -1765,7 +1780,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         embedTimestamp = datetime.datetime.strptime(option["expires"], "%m-%d-%Y %I:%M:%S %p").strftime("%B %d, %Y at %I:%M %p")
         embedTimestamp = datetime.datetime.strptime(embedTimestamp, "%B %d, %Y at %I:%M %p")
 
-        if option["status"] in ["filled", "pending", "cancelled"]:
+        if option["result"].lower() in ["filled", "pending", "cancelled"]:
             if option["type"] == "call":
                 embedColor = self.colors["green"]
             else:
@@ -1782,12 +1797,12 @@ class Portfolio(commands.Cog, name="portfolio"):
         embed.set_author(name=f"{title_your}", icon_url=avatar_url)
         embed.set_footer(text=f"ID: {option['option_id']}")
 
-        if option["status"] in ["filled", "pending", "cancelled"]:
+        if option["result"].lower() in ["filled", "pending", "cancelled"]:
             embedValue = "Still active."
         else:
-            embedValue = f"${option['gainloss']}"
+            embedValue = f"${option['gain_loss']}"
         
-        embed.add_field(name=f"{option['status']}", value=embedValue, inline=False)
+        embed.add_field(name=f"{option['result']}", value=embedValue, inline=False)
 
         await context.send(embed=embed)
 
@@ -1800,7 +1815,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the option that should be deleted.",
         portfolio_id="The ID of the portfolio that the stock belongs to."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def delete_option(self, context: Context, ticker: str, id: int, portfolio_id: int = 0) -> None:
         """
         Deletes a specific option.
@@ -1851,7 +1866,8 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the portfolio that the stock belongs to.",
         status="The status of the call option (Filled or Pending, default is Filled)."
     )
-    @app_commands.choices(ticker=ticker_options, status=status_options)
+    @app_commands.choices(status=status_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def call(self, context: Context, ticker: str, premium: float, strike: float, expiry: str, quantity: int, id: int = 0, status: str = "Filled", tstamp: str = "") -> None:
         """
         Adds a call option to a stock.
@@ -1888,7 +1904,10 @@ class Portfolio(commands.Cog, name="portfolio"):
             tstamp = tstampObject.strftime("%m-%d-%Y %I:%M:%S %p")
 
         uOption = UserOption(ticker, strike, quantity, premium, tstamp, expiry, status, "call", 0.0)
-        await self.database_users.add_option(context.author.id, id, ticker, uOption)
+        if (await self.database_users.add_option(context.author.id, id, ticker, uOption) == -1):
+            embed = self.errorEmbed("Error adding option! Please try again later.")
+            await context.send(embed=embed)
+            return
 
         embed = self.successEmbed(f"A call option for {ticker} has been successfully added to your portfolio!", tstampObject)
         await context.send(embed=embed)
@@ -1906,7 +1925,8 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the portfolio that the stock belongs to.",
         status="The status of the put option (Filled or Pending, default is Filled)."
     )
-    @app_commands.choices(ticker=ticker_options, status=status_options)
+    @app_commands.choices(status=status_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def put(self, context: Context, ticker: str, premium: float, strike: float, expiry: str, quantity: int, status: str = "Filled", tstamp: str = "", id: int = 0) -> None:
         """
         Adds a put option to a stock.
@@ -1941,7 +1961,10 @@ class Portfolio(commands.Cog, name="portfolio"):
         tstamp = tstampObject.strftime("%m-%d-%Y %I:%M:%S %p")
 
         uOption = UserOption(ticker, strike, quantity, premium, tstamp, expiry, status, "put", 0.0)
-        await self.database_users.add_option(context.author.id, id, ticker, uOption)
+        if (await self.database_users.add_option(context.author.id, id, ticker, uOption) == -1):
+            embed = self.errorEmbed("Error adding option! Please try again later.")
+            await context.send(embed=embed)
+            return
 
         embed = self.successEmbed(f"A put option for {ticker} has been successfully added to your portfolio!", tstampObject)
         await context.send(embed=embed)
@@ -1955,7 +1978,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the option that should be exercised.",
         portfolio_id="The ID of the portfolio that the stock belongs to."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def exercise(self, context: Context, ticker: str, id: int, gain_loss: float, portfolio_id: int = 0) -> None:
         """
         Exercises an option.
@@ -2001,7 +2024,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the option that should be expired.",
         portfolio_id="The ID of the portfolio that the stock belongs to."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def expire(self, context: Context, ticker: str, id: int, gain_loss: float, portfolio_id: int = 0) -> None:
         """
         Expires an option.
@@ -2053,7 +2076,8 @@ class Portfolio(commands.Cog, name="portfolio"):
         status="The new status of the option.",
         tstamp="The new timestamp of the option."
     )
-    @app_commands.choices(ticker=ticker_options, status=status_options)
+    @app_commands.choices(status=status_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def update_option(self, context: Context, ticker: str, id: int, premium = None, strike = None, expiry = None, quantity = None, status = None, tstamp = None, portfolio_id: int = 0) -> None:
         """
         Updates an option.
@@ -2111,7 +2135,7 @@ class Portfolio(commands.Cog, name="portfolio"):
         id="The ID of the option that should be closed.",
         portfolio_id="The ID of the portfolio that the stock belongs to."
     )
-    @app_commands.choices(ticker=ticker_options)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def close_option(self, context: Context, ticker: str, id: int, gainloss: float, portfolio_id: int = 0) -> None:
         """
         Closes an option.
@@ -2171,12 +2195,14 @@ class Portfolio(commands.Cog, name="portfolio"):
         )
 
     # Function to convert a date to a specific format
-    def date_toFormat(self, date: str | datetime.datetime, fromFormat: str = "", toFormat: str = "") -> str:
+    def date_toFormat(self, date: str | int | datetime.datetime, fromFormat: str = "", toFormat: str = "") -> str:
         fromFormat = self.databaseFormat if fromFormat == "" else fromFormat
         toFormat = self.fullFormat if toFormat == "" else toFormat
 
         if isinstance(date, datetime.datetime):
             return date.strftime(toFormat)
+        elif isinstance(date, int):
+            return datetime.datetime.fromtimestamp(date).strftime(toFormat) # created_at / expires_at columns
         else:
             return datetime.datetime.strptime(date, fromFormat).strftime(toFormat)
 
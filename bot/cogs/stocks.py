@@ -5,6 +5,9 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context
+from utils.stocker.Stock import quoteFromHistory
+from utils.stocker.MarketData import isStale
+from utils.misc.bot_misc import ticker_autocomplete
 
 """
 Stocks Cog
@@ -54,21 +57,56 @@ class Stocks(commands.Cog, name="stocks"):
 
     @commands.hybrid_group(
         name="yahoo",
-        description="Yahoo Finance commands"
+        description="Yahoo Finance commands",
+        fallback="quote",
+        invoke_without_command=True
     )
     @app_commands.describe(
         ticker="The stock you want to search for.",
         period="The period of time to search for the stock. Default is 1 day."
     )
-    @app_commands.choices(status=yf_period_choices)
+    @app_commands.choices(period=yf_period_choices)
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     @app_commands.checks.cooldown(1, 5.0, key=lambda i: (i.guild_id, i.user.id))
-    async def yahoo(self, context: Context, ticker: str, period = "1d") -> None:
+    async def yahoo(self, context: Context, ticker: str, period: str = "1d") -> None:
         """
-        Yahoo Finance commands
+        Yahoo Finance commands, displays a quote for a specific stock
 
         :param context: The application command context.
+        :param ticker: The stock that should be searched for.
+        :param period: The period of time to search for the stock.
         """
-        pass        
+        await context.defer() # The download can take longer than the interaction allows
+
+        # Runs on the market data thread pool, other commands keep running while it downloads
+        stock = await self.bot.market_data.get_stock(ticker, period)
+
+        if stock is None or stock[0].empty:
+            embed = discord.Embed(
+                title="Error!",
+                description=f"Could not get any data for {ticker.upper()}, try again later.",
+                color=self.colors["red"]
+            )
+            await context.send(embed=embed)
+            return
+
+        history, info = stock
+        quote = quoteFromHistory(history)
+        change = quote["change"]
+        percent = quote["percent"]
+
+        embed = discord.Embed(
+            title=f"{info.get('longName') or info.get('shortName') or ticker.upper()}",
+            description=f"${quote['price']:,.2f} ({'+' if change >= 0 else ''}{change:,.2f} | {'+' if percent >= 0 else ''}{percent:.2f}%)",
+            color=self.colors["green"] if change >= 0 else self.colors["red"]
+        )
+        embed.set_author(name=ticker.upper())
+        embed.add_field(name="High", value=f"${quote['high']:,.2f}", inline=True)
+        embed.add_field(name="Low", value=f"${quote['low']:,.2f}", inline=True)
+        embed.add_field(name="Volume", value=f"{quote['volume']:,}", inline=True)
+        embed.set_footer(text=f"Period: {period}" + (" | Stale data, Yahoo Finance is unavailable" if isStale(stock) else ""))
+
+        await context.send(embed=embed)
 
 
     @yahoo.command(
@@ -78,6 +116,7 @@ class Stocks(commands.Cog, name="stocks"):
     @app_commands.describe(
         ticker="The stock you want to search for."
     )
+    @app_commands.autocomplete(ticker=ticker_autocomplete)
     async def news(self, context: Context, ticker: str) -> None:
         """
         Displays the latest news for a specific stock
@@ -85,7 +124,33 @@ class Stocks(commands.Cog, name="stocks"):
         :param context: The application command context.
         :param ticker: The stock that should be searched for.
         """
-        pass
+        await context.defer()
+
+        news = await self.bot.market_data.get_news(ticker)
+
+        if not news:
+            embed = discord.Embed(
+                title="Error!",
+                description=f"Could not find any news for {ticker.upper()}.",
+                color=self.colors["red"]
+            )
+            await context.send(embed=embed)
+            return
+
+        embed = discord.Embed(
+            title=f"{ticker.upper()} News",
+            color=self.colors["teal"]
+        )
+
+        for article in news[:5]:
+            published = f" | <t:{article['time']}:R>" if article.get("time") else ""
+            embed.add_field(
+                name=article["title"][:256] or "Untitled",
+                value=f"{article.get('publisher') or 'Unknown'}{published}\n{article.get('link') or ''}"[:1024],
+                inline=False
+            )
+
+        await context.send(embed=embed)
 
     @commands.hybrid_command(
         name="feargreed",
@@ -97,7 +162,26 @@ class Stocks(commands.Cog, name="stocks"):
 
         :param context: The application command context.
         """
-        pass
+
+        # Capturing the page can take a few seconds
+        await context.defer()
+        image = await self.bot.fear_greed.get()
+
+        if image is None:
+            embed = discord.Embed(
+                description="Could not get the Fear & Greed Index, try again later.",
+                color=self.colors["red"]
+            )
+            await context.send(embed=embed)
+            return
+
+        embed = discord.Embed(
+            title="Fear & Greed Index",
+            url="https://www.cnn.com/markets/fear-and-greed",
+            color=0xBEBEFE
+        )
+        embed.set_image(url="attachment://feargreed.png")
+        await context.send(embed=embed, file=discord.File(image, filename="feargreed.png"))
     
 async def setup(bot):
     await bot.add_cog(Stocks(bot))
\ No newline at end of file
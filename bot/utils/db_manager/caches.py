@@ -0,0 +1,182 @@
+import math
+import hashlib
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Iterator
+
+"""
+This module contains the in-process caches used by the database managers.
+"""
+
+# ==========
+# Key Cache
+# ==========
+class KeyCache:
+    def __init__(self, max_size: int = 4096) -> None:
+        self.entries: OrderedDict[tuple, Any] = OrderedDict() # Cached values, least recently used first
+        self.max_size: int = max(max_size, 1) # Most entries kept before the oldest is dropped
+        self.hits: int = 0 # Lookups answered from the cache
+        self.misses: int = 0 # Lookups that had to go to the database
+
+        # Bumped by every forget, a value read before it is not cached (see generation)
+        self.key_generations: dict[tuple, int] = {}
+        self.user_generations: dict[Hashable, int] = {}
+        self.epoch: int = 0 # Bumped by clear, and when the counters above are dropped
+
+    # This function is used to get a cached value, None if it is not cached
+    def get(self, key: tuple) -> Any:
+        value = self.entries.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key) # Mark the entry as recently used
+        self.hits += 1
+        return value
+
+    # This function is used to get the generation of a key, read it before the value is read from the database
+    def generation(self, key: tuple) -> tuple[int, int, int]:
+        return (self.epoch, self.user_generations.get(key[0], 0), self.key_generations.get(key, 0))
+
+    # This function is used to cache a value, a value read under an older generation was forgotten since and is dropped
+    def put(self, key: tuple, value: Any, generation: tuple[int, int, int] | None = None):
+        if value is None:
+            return # Missing rows are not cached, they may be created at any time
+
+        if generation is not None and generation != self.generation(key):
+            return # A write committed while the value was read, it may be stale
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False) # Drop the least recently used entry
+
+    # This function is used to drop a single cached value
+    def forget(self, key: tuple):
+        self.entries.pop(key, None)
+        self.key_generations[key] = self.key_generations.get(key, 0) + 1
+        self.trim_generations()
+
+    # This function is used to drop every cached value of a user, keys start with the user id
+    def forget_user(self, user_id: Hashable):
+        for key in [key for key in self.entries if key[0] == user_id]:
+            del self.entries[key]
+
+        self.user_generations[user_id] = self.user_generations.get(user_id, 0) + 1
+        self.trim_generations()
+
+    # This function is used to drop every cached value
+    def clear(self):
+        self.entries.clear()
+        self.key_generations.clear()
+        self.user_generations.clear()
+        self.epoch += 1
+
+    # This function is used to keep the generation counters bounded, a new epoch makes every read in progress stale
+    def trim_generations(self):
+        if len(self.key_generations) + len(self.user_generations) > self.max_size:
+            self.key_generations.clear()
+            self.user_generations.clear()
+            self.epoch += 1
+
+    # This function is used to get the hit rate of the cache
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+# ==========
+# Bloom Filter
+# ==========
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        capacity = max(capacity, 1)
+        self.size: int = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8) # Number of bits
+        self.hash_count: int = max(round(self.size / capacity * math.log(2)), 1) # Number of bits set per value
+        self.bits: bytearray = bytearray((self.size + 7) // 8)
+
+    # This function is used to get the bits of a value, using double hashing of one digest
+    def positions(self, value: Hashable) -> Iterator[int]:
+        digest = hashlib.blake2b(str(value).encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    # This function is used to add a value to the filter
+    def add(self, value: Hashable):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: Hashable) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+# ==========
+# Membership Cache
+# ==========
+class MembershipCache:
+    def __init__(self, set_limit: int = 1_000_000, error_rate: float = 0.001) -> None:
+        self.members: set | None = None # Exact members, used up to set_limit members
+        self.filter: BloomFilter | None = None # Compact filter, used above set_limit members
+        self.set_limit: int = set_limit # Most members kept in the exact set
+        self.error_rate: float = error_rate # False positive rate of the filter
+        self.hits: int = 0 # Checks answered from memory
+        self.misses: int = 0 # Checks that had to go to the database
+
+    # This function is used to load every member, choosing the set or the filter by the member count
+    def load(self, members: Iterable[Hashable], count: int):
+        self.prepare(count)
+
+        for member in members:
+            self.add(member)
+
+    # This function is used to empty the cache for count members, the set up to set_limit and the filter above it
+    def prepare(self, count: int):
+        if count <= self.set_limit:
+            self.members = set()
+            self.filter = None
+        else:
+            self.members = None
+            self.filter = BloomFilter(count * 2, self.error_rate) # Leave room for new members
+
+    # This function is used to take the members of a cache that was loaded on the side, so checks never see it half loaded
+    def adopt(self, loaded: "MembershipCache"):
+        self.members = loaded.members
+        self.filter = loaded.filter
+
+    # This function is used to check a member: True or False when known, None when the database has to be asked
+    def check(self, member: Hashable) -> bool | None:
+        if self.members is not None:
+            self.hits += 1
+            return member in self.members
+
+        if self.filter is not None and member not in self.filter:
+            self.hits += 1
+            return False # A filter never misses a member that was added
+
+        self.misses += 1
+        return None # Not loaded yet, or the filter may be wrong
+
+    # This function is used to add a member
+    def add(self, member: Hashable):
+        if self.members is not None:
+            self.members.add(member)
+        elif self.filter is not None:
+            self.filter.add(member)
+
+    # This function is used to remove a member, the filter can't forget so its positives are always confirmed
+    def discard(self, member: Hashable):
+        if self.members is not None:
+            self.members.discard(member)
+
+    # This function is used to get the hit rate of the cache
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self.members) if self.members is not None else 0
@@ -0,0 +1,76 @@
+import time
+from sqlite3 import Row
+from .manager import DatabaseManager
+
+"""
+History Manager
+    This class contains functions that are used to interact with the price history database.
+"""
+
+class HistoryManager(DatabaseManager):
+    def __init__(self) -> None:
+        super().__init__() # Initialize the DatabaseManager
+
+    # This function is used to get the range of bars that is stored for a ticker
+    async def get_coverage(self, ticker: str, interval: str) -> Row | None:
+        if self.connection is None:
+            return None
+
+        async with self.read(
+            "SELECT * FROM Coverage WHERE ticker = ? AND interval = ?",
+            (ticker, interval,)
+        ) as cursor:
+            return await cursor.fetchone()
+
+    # This function is used to store downloaded bars and grow the stored range to cover them
+    async def store_bars(self, ticker: str, interval: str, bars: list[tuple], first: int, last: int, complete: bool = False) -> bool:
+        if self.connection is None:
+            return False
+
+        try:
+            async with self.transaction():
+                # The newest bar is downloaded again while it is still changing, so it is replaced
+                await self.connection.executemany(
+                    "INSERT OR REPLACE INTO Bars (ticker, interval, time, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(ticker, interval, *bar,) for bar in bars]
+                )
+
+                # Downloaded ranges always touch the stored one, so the union is still a single range
+                await self.connection.execute(
+                    """
+                    INSERT INTO Coverage (ticker, interval, first, last, complete, updated) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (ticker, interval) DO UPDATE SET
+                        first = MIN(first, excluded.first),
+                        last = MAX(last, excluded.last),
+                        complete = MAX(complete, excluded.complete),
+                        updated = excluded.updated
+                    """,
+                    (ticker, interval, first, last, int(complete), int(time.time()),)
+                )
+
+            return True
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.error(f"error storing {len(bars)} {interval} bars for {ticker} : {e}")
+            return False
+
+    # This function is used to get the stored bars of a ticker from a time onwards, oldest first
+    async def get_bars(self, ticker: str, interval: str, start: int | None = None) -> list[Row]:
+        if self.connection is None:
+            return []
+
+        async with self.read(
+            "SELECT time, open, high, low, close, volume FROM Bars WHERE ticker = ? AND interval = ? AND time >= ? ORDER BY time",
+            (ticker, interval, start if start is not None else -(2**63),)
+        ) as cursor:
+            bars = list(await cursor.fetchall())
+
+        if bars or start is None:
+            return bars
+
+        # Nothing traded since the start (a weekend for a one day period), the last bar is still the latest price
+        async with self.read(
+            "SELECT time, open, high, low, close, volume FROM Bars WHERE ticker = ? AND interval = ? ORDER BY time DESC LIMIT 1",
+            (ticker, interval,)
+        ) as cursor:
+            return list(await cursor.fetchall())
@@ -1,5 +1,14 @@
+import os
+import re
+import asyncio
+import datetime
 import aiosqlite
 import logging
+from typing import Any, AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from utils.metrics import InstrumentedConnection
+from utils.logger import log_pipeline
 
 """
 This module contains the DatabaseManager class which is used to manage the database connection and operations.
@@ -9,14 +18,84 @@ This module contains the DatabaseManager class which is used to manage the datab
 # Constants
 # ==========
 log_folder = "./logs/"
-schema_folder = "./database/schemas/"
+migration_folder = "./database/migrations/"
+migration_pattern = re.compile(r"^(\d+)_(\w+)\.sql$") # Migration files are named "0001_name.sql"
+
+# This function is used to get the name queries on a database are recorded under, "users" for "database/users.db"
+def databaseName(db_path: str) -> str:
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+# ==========
+# Reader Pool
+# ==========
+class ReaderPool:
+    def __init__(self) -> None:
+        self.connections: list[InstrumentedConnection] = [] # Every read-only connection
+        self.available: asyncio.Queue[InstrumentedConnection] = asyncio.Queue() # Connections that are not in use
+
+    # This function is used to open the read-only connections
+    async def open(self, db_path: str, size: int):
+        for _ in range(size):
+            connection = InstrumentedConnection(await aiosqlite.connect(f"file:{db_path}?mode=ro", uri=True), databaseName(db_path)) # Open the database read-only, timing every query
+            connection.row_factory = aiosqlite.Row # Use aiosqlite.Row for dictionary-like access
+            self.connections.append(connection)
+            self.available.put_nowait(connection)
+
+    # This function is used to close the read-only connections
+    async def close(self):
+        for connection in self.connections:
+            await connection.close()
+
+        self.connections = []
+        self.available = asyncio.Queue()
+
+    # This function is used to run a query on the next free read-only connection
+    @asynccontextmanager
+    async def execute(self, sql: str, parameters: tuple = ()) -> AsyncIterator[aiosqlite.Cursor]:
+        connection = await self.available.get() # Wait for a free connection
+
+        try:
+            async with connection.execute(sql, parameters) as cursor:
+                yield cursor
+        finally:
+            self.available.put_nowait(connection) # Give the connection back to the pool
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+# ==========
+# Transaction
+# ==========
+class Transaction:
+    def __init__(self, connection: aiosqlite.Connection) -> None:
+        self.connection: aiosqlite.Connection = connection # Connection the transaction runs on
+        self.failed: bool = False # Set when a step failed and the transaction must be rolled back
+        self.callbacks: list[Callable[[], Any]] = [] # Functions to run once the transaction is committed
+
+    # This function is used to mark the transaction so it is rolled back instead of committed
+    def abort(self):
+        self.failed = True
+
+    # This function is used to run a function once the transaction is committed
+    def after_commit(self, callback: Callable[[], Any]):
+        self.callbacks.append(callback)
+
+# The transaction of the current task, so nested manager calls join it instead of committing on their own
+current_transaction: ContextVar[Transaction | None] = ContextVar("current_transaction", default=None)
 
 # ==========
 # Database Manager
 # ==========
 class DatabaseManager:
     def __init__(self) -> None:
-        self.connection: aiosqlite.Connection | None = None # Connection to the database
+        self.connection: InstrumentedConnection | None = None # Connection to the database, used for every write
+        self.readers: ReaderPool = ReaderPool() # Read-only connections to the database
+        self.reader_count: int = 4 # Number of read-only connections
+        self.write_lock: asyncio.Lock = asyncio.Lock() # Only one transaction can use the writer at a time
+        self.write_queue: asyncio.Queue | None = None # Writes waiting to be committed together, None when batching is off
+        self.write_task: asyncio.Task | None = None # Task that commits the queued writes
+        self.write_batch_size: int = 64 # Most writes committed in one transaction
+        self.write_batch_delay: float = 0.005 # Longest time a write waits for others to join its batch (seconds)
         self.logger: logging.Logger | None = None # Logger instance
         self.date_format = "%m-%d-%Y %I:%M:%S %p" # Date format
 
@@ -29,38 +108,57 @@ class DatabaseManager:
         with open(file_path, 'r') as file:
             return file.read() # Read the SQL file and return the contents
 
-    async def start(self, db_name: str, schema_name: str, logger_name: str, file_name: str):
+    # This function is used to list the migration files of a database in the order they should be applied
+    def read_migrations(self, migration_name: str) -> list[tuple[int, str, str]]:
+        folder = os.path.join(migration_folder, migration_name)
+        migrations = []
+
+        for file in os.listdir(folder):
+            match = migration_pattern.match(file)
+            if match is None:
+                continue # Skip files that are not migrations
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(folder, file)))
+
+        return sorted(migrations) # Sort the migrations by version
+
+    async def start(self, db_name: str, migration_name: str, logger_name: str, file_name: str, reader_count: int = 4):
+        self.reader_count = max(reader_count, 0)
         await self.file_handler(logger_name, file_name)
         await self.connect(db_name)
-        await self.create_tables(schema_name)
+        await self.migrate(migration_name)
 
     async def file_handler(self, logger_name: str, file_name: str):
         self.logger = logging.getLogger(logger_name)
         self.logger.setLevel(logging.INFO)
 
-        # File handler
-        file_handler = logging.FileHandler(filename=f"{log_folder}{file_name}.log", encoding="utf-8", mode="w")
-        file_handler_formatter = logging.Formatter(
+        # File handler, written by the log pipeline's thread instead of the event loop
+        file_handler = log_pipeline.file_handler(f"{log_folder}{file_name}.log", logging.Formatter(
             "[{asctime}] [{levelname}] {name}: {message}", f"{self.date_format}", style="{"
-        )
-        file_handler.setFormatter(file_handler_formatter)
+        ))
 
         # Add the handlers
-        self.logger.addHandler(file_handler)
+        log_pipeline.attach(self.logger, file_handler)
+        log_pipeline.start()
 
     # This function is used to establish a connection to the database
     async def connect(self, db_name: str):
         if self.logger is not None:
-            self.connection = await aiosqlite.connect(f"database/{db_name}") # Connect to the database
+            self.connection = InstrumentedConnection(await aiosqlite.connect(f"database/{db_name}"), databaseName(db_name)) # Connect to the database, timing every query
             self.connection.row_factory = aiosqlite.Row  # Use aiosqlite.Row for dictionary-like access
             await self.connection.execute("PRAGMA foreign_keys = ON;") # Enable foreign keys
+            await self.connection.execute("PRAGMA journal_mode = WAL;") # Let readers run while a write is in progress
+            await self.connection.execute("PRAGMA synchronous = NORMAL;") # WAL only needs to sync on checkpoints
             await self.connection.commit()
 
-            self.logger.info(f"connection established") # Log the connection
+            await self.readers.open(f"database/{db_name}", self.reader_count) # Open the read-only connections
+
+            self.logger.info(f"connection established with {len(self.readers)} readers") # Log the connection
 
     # This function is used to close the database connection
     async def close(self):
         if self.connection and self.logger is not None:
+            await self.stop_write_queue() # Commit the writes that are still queued
+            await self.readers.close() # Close the read-only connections
             await self.connection.close() # Close the connection
             self.connection = None # Set the connection to None
 
@@ -74,18 +172,308 @@ class DatabaseManager:
 
             self.logger.info(f"reconnected to the database") # Log the reconnection
     
-    # This function is used to create the tables in the database
-    async def create_tables(self, schema_name: str):
-        sql = self.read_sql_file(f"{schema_folder}{schema_name}") # Read the SQL file
-        
-        if self.connection and self.logger is not None:
+    # This function is used to group several writes into one atomic transaction with a single commit
+    @asynccontextmanager
+    async def transaction(self, transaction: Transaction | None = None) -> AsyncIterator[Transaction]:
+        if self.connection is None:
+            raise RuntimeError("database is not connected")
+
+        parent = transaction or current_transaction.get()
+
+        # Join the transaction that is already open, the outermost one commits
+        if parent is not None:
+            try:
+                yield parent
+            except Exception:
+                parent.abort() # A failed step fails the whole transaction
+                raise
+            return
+
+        async with self.write_lock:
+            transaction = Transaction(self.connection)
+            token = current_transaction.set(transaction)
+
+            try:
+                await self.connection.execute("BEGIN IMMEDIATE") # Take the write lock up front
+
+                try:
+                    yield transaction
+                except BaseException:
+                    await self.connection.rollback() # Rollback the changes
+                    raise
+
+                if transaction.failed:
+                    await self.connection.rollback() # A step failed, rollback the changes
+                else:
+                    await self.connection.commit() # Commit the changes
+
+                    for callback in transaction.callbacks:
+                        callback()
+            finally:
+                current_transaction.reset(token)
+
+    # This function is used to run one step of a transaction that can fail without failing the whole transaction
+    @asynccontextmanager
+    async def savepoint(self, name: str) -> AsyncIterator[Transaction]:
+        if self.connection is None or current_transaction.get() is None:
+            raise RuntimeError("savepoints can only be used inside a transaction")
+
+        child = Transaction(self.connection)
+        token = current_transaction.set(child) # Calls inside the step join the savepoint, not the transaction
+
+        await self.connection.execute(f"SAVEPOINT {name}")
+
+        try:
+            try:
+                yield child
+            except BaseException:
+                child.abort()
+                raise
+            finally:
+                if child.failed:
+                    await self.connection.execute(f"ROLLBACK TO {name}") # Undo only this step
+
+                await self.connection.execute(f"RELEASE {name}")
+        finally:
+            current_transaction.reset(token)
+
+        parent = current_transaction.get()
+
+        if parent is not None and not child.failed:
+            parent.callbacks.extend(child.callbacks) # Run the step's callbacks when the transaction commits
+
+    # This function is used to commit the queued writes in batches of up to write_batch_size
+    async def start_write_queue(self, batch_size: int = 64, batch_delay: float = 0.005):
+        if self.write_task is not None:
+            return
+
+        self.write_batch_size = max(batch_size, 1)
+        self.write_batch_delay = max(batch_delay, 0)
+        self.write_queue = asyncio.Queue()
+        self.write_task = asyncio.create_task(self.write_worker())
+
+        if self.logger is not None:
+            self.logger.info(f"write queue started : {self.write_batch_size} writes / {self.write_batch_delay * 1000:g} ms")
+
+    # This function is used to commit the queued writes and stop batching
+    async def stop_write_queue(self):
+        if self.write_task is None or self.write_queue is None:
+            return
+
+        await self.write_queue.put(None) # Tell the worker to stop once the queue is empty
+        await self.write_task
+
+        self.write_task = None
+        self.write_queue = None
+
+    # This function is used to check if a write should be sent to the write queue
+    def should_queue_write(self, transaction: Transaction | None = None) -> bool:
+        # Writes that are already part of a transaction are committed by that transaction
+        return self.write_queue is not None and transaction is None and current_transaction.get() is None
+
+    # This function is used to queue a write and wait for the result of its batch
+    async def queue_write(self, function: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        if self.write_queue is None:
+            return await function(*args) # Batching is off
+
+        future = asyncio.get_running_loop().create_future()
+        await self.write_queue.put((function, args, future))
+
+        return await future
+
+    # This function is used to collect queued writes into batches and commit each batch once
+    async def write_worker(self):
+        loop = asyncio.get_running_loop()
+        running = True
+
+        while running and self.write_queue is not None:
+            write = await self.write_queue.get()
+
+            if write is None:
+                break
+
+            batch = [write]
+            deadline = loop.time() + self.write_batch_delay
+
+            # Wait a little for other writes to join the batch
+            while len(batch) < self.write_batch_size:
+                try:
+                    write = self.write_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+
+                    if timeout <= 0:
+                        break
+
+                    try:
+                        write = await asyncio.wait_for(self.write_queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+
+                if write is None:
+                    running = False # Commit what we have, then stop
+                    break
+
+                batch.append(write)
+
+            await self.write_batch(batch)
+
+    # This function is used to run a batch of writes in one transaction, each in its own savepoint
+    async def write_batch(self, batch: list):
+        results = []
+
+        try:
+            async with self.transaction():
+                for index, (function, args, future) in enumerate(batch):
+                    try:
+                        async with self.savepoint(f"write_{index}"):
+                            results.append((future, await function(*args), None))
+                    except Exception as e:
+                        results.append((future, None, e)) # Only this write is rolled back
+        except Exception as e:
+            # The commit failed, so none of the writes were saved
+            if self.logger is not None:
+                self.logger.error(f"error committing {len(batch)} queued writes : {e}")
+
+            results = [(future, None, e) for _, _, future in batch]
+
+        # Resolve the callers once their writes are committed
+        for future, result, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    # This function is used to get the SQL that converts a date_format column (local time) to unix epoch seconds
+    def epoch_sql(self, column: str) -> str:
+        return (
+            f"CAST(strftime('%s', substr({column}, 7, 4) || '-' || substr({column}, 1, 2) || '-' || substr({column}, 4, 2) || ' ' || "
+            f"printf('%02d', substr({column}, 12, 2) % 12 + CASE WHEN substr({column}, 21, 2) = 'PM' THEN 12 ELSE 0 END) || "
+            f"substr({column}, 14, 6), 'utc') AS INTEGER)"
+        )
+
+    # This function is used to fill an epoch column from its date_format column, one chunk of keys per transaction
+    async def backfill_epoch(self, table: str, key: str, source: str, target: str, chunk_size: int = 5000) -> int:
+        if self.connection is None or self.logger is None:
+            return -1
+
+        try:
+            async with self.connection.execute(
+                f"SELECT 1 FROM {table} WHERE {target} IS NULL LIMIT 1"
+            ) as cursor:
+                if await cursor.fetchone() is None:
+                    return 0 # Nothing to backfill
+
+            updated = 0
+            after = -(2 ** 63) # Smallest SQLite integer, every key is above it
+
+            while True:
+                # Short transactions so other writes can run between the chunks
+                async with self.transaction():
+                    async with self.connection.execute(
+                        f"SELECT MAX({key}) FROM (SELECT {key} FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?)",
+                        (after, chunk_size,)
+                    ) as cursor:
+                        row = await cursor.fetchone()
+
+                    if row is None or row[0] is None:
+                        break
+
+                    cursor = await self.connection.execute(
+                        f"UPDATE {table} SET {target} = COALESCE({self.epoch_sql(source)}, 0) WHERE {key} > ? AND {key} <= ? AND {target} IS NULL",
+                        (after, row[0],)
+                    )
+                    updated += cursor.rowcount
+                    after = row[0]
+
+            self.logger.info(f"backfilled {updated} {table}.{target} values")
+        except Exception as e:
+            self.logger.error(f"error backfilling {table}.{target} : {e}")
+            return -1
+
+        return updated
+
+    # This function is used to read one page of rows, newest first, from the (created_at, key) cursor of a row next to the page
+    async def read_page(self, table: str, key: str, where: str, parameters: tuple, after: tuple | None = None, before: tuple | None = None, limit: int = 10) -> list:
+        if self.connection is None:
+            return []
+
+        if before is not None:
+            # The rows just newer than the cursor, read oldest first and flipped back
+            sql = f"SELECT * FROM {table} WHERE {where} AND (created_at, {key}) > (?, ?) ORDER BY created_at, {key} LIMIT ?"
+            parameters = (*parameters, *before, limit,)
+        elif after is not None:
+            # The rows just older than the cursor
+            sql = f"SELECT * FROM {table} WHERE {where} AND (created_at, {key}) < (?, ?) ORDER BY created_at DESC, {key} DESC LIMIT ?"
+            parameters = (*parameters, *after, limit,)
+        else:
+            # The newest rows
+            sql = f"SELECT * FROM {table} WHERE {where} ORDER BY created_at DESC, {key} DESC LIMIT ?"
+            parameters = (*parameters, limit,)
+
+        async with self.read(sql, parameters) as cursor:
+            rows = await cursor.fetchall()
+
+        return list(reversed(rows)) if before is not None else list(rows)
+
+    # This function is used to run a read-only query, falling back to the writer when there are no readers
+    def read(self, sql: str, parameters: tuple = ()):
+        # Reads inside a transaction have to see its uncommitted changes
+        if current_transaction.get() is not None and self.connection is not None:
+            return self.connection.execute(sql, parameters)
+
+        if len(self.readers) == 0 and self.connection is not None:
+            return self.connection.execute(sql, parameters)
+
+        return self.readers.execute(sql, parameters)
+
+    # This function is used to get the current schema version of the database
+    async def get_schema_version(self) -> int:
+        if self.connection is None:
+            return -1
+
+        async with self.connection.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM schema_version"
+        ) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else 0
+
+    # This function is used to apply every migration that is newer than the current schema version
+    async def migrate(self, migration_name: str):
+        if self.connection is None or self.logger is None:
+            return
+
+        # Keep track of the applied migrations
+        await self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied TEXT NOT NULL)"
+        )
+        await self.connection.commit()
+
+        current_version = await self.get_schema_version()
+
+        for version, name, path in self.read_migrations(migration_name):
+            if version <= current_version:
+                continue # Skip the migrations that were already applied
+
+            sql = self.read_sql_file(path) # Read the SQL file
+
             if not sql:
-                self.logger.error(f"Error reading SQL file")
+                self.logger.error(f"Error reading migration {version} {name}")
                 return
+
             try:
-                async with self.connection.cursor() as cursor:
-                    await cursor.executescript(sql) # Execute the SQL script
-                    await self.connection.commit() # Commit the changes
-                self.logger.info(f"tables created") # Log the creation of the tables
+                # Apply the migration and record it in the same transaction
+                await self.connection.executescript(f"BEGIN;\n{sql}")
+                await self.connection.execute(
+                    "INSERT INTO schema_version (version, name, applied) VALUES (?, ?, ?)",
+                    (version, name, datetime.datetime.now().strftime(self.date_format),)
+                )
+                await self.connection.commit() # Commit the changes
+
+                self.logger.info(f"applied migration {version} {name}") # Log the migration
             except Exception as e:
-                self.logger.error(f"Error creating tables: {str(e)}") # Log the error
+                await self.connection.rollback() # Rollback the migration
+                self.logger.error(f"Error applying migration {version} {name}: {str(e)}") # Log the error
+                return
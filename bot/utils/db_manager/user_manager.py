@@ -1,9 +1,11 @@
 import datetime
 from sqlite3 import Row
 from typing import Iterable
-from .manager import DatabaseManager
+from .manager import DatabaseManager, Transaction, current_transaction
+from .caches import KeyCache, MembershipCache
 from utils.stocker.PortfolioTypes import UserOrder
 from utils.stocker.PortfolioTypes import UserOption
+from utils.stocker.PortfolioTypes import toEpoch
 
 """
 User Manager
@@ -13,67 +15,132 @@ User Manager
 class UserManager(DatabaseManager):
     def __init__(self) -> None:
         super().__init__() # Initialize the DatabaseManager
+        self.portfolio_keys: KeyCache = KeyCache() # (user_id, portfolio_id) --> portfolio_key
+        self.stock_keys: KeyCache = KeyCache() # (user_id, portfolio_id, ticker) --> stock_key
+        self.registered_users: MembershipCache = MembershipCache() # Ids of the registered users
+
+    async def start(self, db_name: str, migration_name: str, logger_name: str, file_name: str, reader_count: int = 4):
+        await super().start(db_name, migration_name, logger_name, file_name, reader_count)
+        await self.backfill_timestamps() # Fill the epoch columns of rows written before they existed
+        await self.load_registered_users() # Answer does_user_exist from memory
+
+    # This function is used to fill the created_at and expires_at columns from the date strings
+    async def backfill_timestamps(self):
+        for table, key, source, target in (
+            ("Users", "user_id", "created", "created_at"),
+            ("Portfolios", "portfolio_key", "created", "created_at"),
+            ("Stocks", "stock_key", "created", "created_at"),
+            ("Orders", "order_key", "created", "created_at"),
+            ("Dividends", "dividend_key", "created", "created_at"),
+            ("Options", "option_key", "created", "created_at"),
+            ("Options", "option_key", "expires", "expires_at"),
+            ("Watchlists", "watchlist_key", "created", "created_at"),
+            ("Watching", "watching_key", "created", "created_at"),
+        ):
+            await self.backfill_epoch(table, key, source, target)
+
+    # This function is used to drop cached keys that a write made stale, again once its transaction commits
+    def forget_keys(self, user_id: int, portfolio_id: int | None = None, ticker: str | None = None):
+        def forget():
+            if ticker is not None:
+                self.stock_keys.forget((user_id, portfolio_id, ticker,)) # Only the stock changed
+            else:
+                self.portfolio_keys.forget_user(user_id) # Portfolio ids of the user may have moved
+                self.stock_keys.forget_user(user_id)
+
+        forget()
+
+        # A reader could cache the old key again before the transaction commits
+        transaction = current_transaction.get()
+        if transaction is not None:
+            transaction.after_commit(forget)
 
     # ========================================================================================================================================================================
     # User Functions | DONE
     # ========================================================================================================================================================================
 
+    # This function is used to load the ids of the registered users into memory
+    async def load_registered_users(self):
+        if self.connection is None or self.logger is None:
+            return
+
+        count = await self.get_total_user_count()
+        loaded = MembershipCache(self.registered_users.set_limit, self.registered_users.error_rate)
+        loaded.prepare(count)
+
+        # The ids are streamed in chunks, a list of every id would take more memory than the filter saves
+        async with self.read("SELECT user_id FROM Users") as cursor:
+            while rows := await cursor.fetchmany(10_000):
+                for row in rows:
+                    loaded.add(row[0])
+
+        self.registered_users.adopt(loaded)
+
+        mode = "set" if self.registered_users.members is not None else "bloom filter"
+        self.logger.info(f"loaded {count} registered users into a {mode}")
+
     # This function is used to check if a user exists in the database
     async def does_user_exist(self, user_id: int) -> bool:
         if self.connection is None:
             return False
 
+        registered = self.registered_users.check(user_id)
+
+        if registered is not None:
+            return registered
+
         # Check if the user exists in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Users WHERE user_id = ?", (user_id,)
         ) as cursor:
             row = await cursor.fetchone()
             return row is not None # Return if the user exists or not
 
     # This function is used to add a user to the database
-    async def create_user(self, user_id: int, user_name) -> bool:
+    async def create_user(self, user_id: int, user_name, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
 
         now = datetime.datetime.now().strftime(self.date_format) # Get the current timestamp
 
         try:
-            # Insert the user into the database
-            await self.connection.execute(
-                "INSERT INTO Users (user_id, created) VALUES (?, ?)",
-                (user_id, now,)
-            )
+            async with self.transaction(transaction) as tx:
+                # Insert the user into the database
+                await self.connection.execute(
+                    "INSERT INTO Users (user_id, created, created_at) VALUES (?, ?, ?)",
+                    (user_id, now, toEpoch(now),)
+                )
 
-            await self.connection.commit() # Commit the changes
+                tx.after_commit(lambda: self.registered_users.add(user_id)) # Only remember the user once the insert is saved
 
             self.logger.info(f"added user \"{user_name}\" {user_id}")
 
             return True
         
         except Exception as e:
-            await self.connection.rollback() # Rollback the changes 
             self.logger.error(f"error adding user {user_id} : {e}") # Log the error
 
             return False
 
     # This function is used to delete a user from the database
-    async def delete_user(self, user_id: int) -> bool:
+    async def delete_user(self, user_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
         # Delete the user from the database
-        try: 
-            await self.connection.execute(
-                "DELETE FROM Users WHERE user_id = ?", (user_id,)
-            )
+        try:
+            async with self.transaction(transaction) as tx:
+                await self.connection.execute(
+                    "DELETE FROM Users WHERE user_id = ?", (user_id,)
+                )
 
-            await self.connection.commit() # Commit the changes
+                self.forget_keys(user_id) # The user's portfolios and stocks are gone
+                tx.after_commit(lambda: self.registered_users.discard(user_id))
 
             self.logger.info(f"deleted user {user_id}")
 
             return True
         except Exception as e:
-            await self.connection.rollback() # Rollback the changes
             self.logger.error(f"error deleting user {user_id} : {e}")
 
             return False
@@ -84,7 +151,7 @@ class UserManager(DatabaseManager):
             return None
         
         # Get the user from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Users WHERE user_id = ?", (user_id,)
         ) as cursor:
             return await cursor.fetchone()
@@ -95,7 +162,7 @@ class UserManager(DatabaseManager):
             return None
         
         # Get all users from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Users"
         ) as cursor:
             return await cursor.fetchall()
@@ -106,7 +173,7 @@ class UserManager(DatabaseManager):
             return -1
         
         # Execute the SQL query to get the total number of users
-        async with self.connection.execute("SELECT COUNT(*) FROM Users") as cursor:
+        async with self.read("SELECT COUNT(*) FROM Users") as cursor:
             # Fetch the status and return the count
             status = await cursor.fetchone()
             return status[0] if status else 0  # Return 0 if no status found
@@ -135,7 +202,7 @@ class UserManager(DatabaseManager):
             return False
         
         # Check if the portfolio exists in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Portfolios WHERE user_id = ? AND portfolio_id = ?",
             (user_id, portfolio_id,)
         ) as cursor:
@@ -143,28 +210,27 @@ class UserManager(DatabaseManager):
             return row is not None
 
     # This function is used to create a portfolio for a user
-    async def create_portfolio(self, user_id: int, name: str = "", description: str = "") -> Row | None:
+    async def create_portfolio(self, user_id: int, name: str = "", description: str = "", transaction: Transaction | None = None) -> Row | None:
         if self.connection is None or self.logger is None:
             return None
         
         try:
-            portfolio_id = await self.get_portfolio_count(user_id) # Get the current portfolio count
-            created = datetime.datetime.now().strftime(self.date_format)
-            
-            # Check if the portfolio name is empty
-            if name == "":
-                name = f"Portfolio {portfolio_id}"
+            async with self.transaction(transaction):
+                portfolio_id = await self.get_portfolio_count(user_id) # Get the current portfolio count
+                created = datetime.datetime.now().strftime(self.date_format)
 
-            if description == "":
-                description = "No description provided."
-            
-            # Insert the portfolio into the database
-            await self.connection.execute(
-                "INSERT INTO Portfolios (user_id, portfolio_id, name, description, created) VALUES (?, ?, ?, ?, ?)",
-                (user_id, portfolio_id, name, description, created,)
-            )
-            
-            await self.connection.commit() # Commit the changes
+                # Check if the portfolio name is empty
+                if name == "":
+                    name = f"Portfolio {portfolio_id}"
+
+                if description == "":
+                    description = "No description provided."
+
+                # Insert the portfolio into the database
+                await self.connection.execute(
+                    "INSERT INTO Portfolios (user_id, portfolio_id, name, description, created, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (user_id, portfolio_id, name, description, created, toEpoch(created),)
+                )
 
             portfolio = await self.get_portfolio(user_id, portfolio_id) # Return the portfolio
 
@@ -175,73 +241,72 @@ class UserManager(DatabaseManager):
 
             return portfolio
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error creating portfolio for {user_id} : {e}")
             return None
         
     # This function is used to delete a portfolio from the database
-    async def delete_portfolio(self, user_id: int, portfolio_id: int) -> bool:
+    async def delete_portfolio(self, user_id: int, portfolio_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
         try:
-            # Delete the portfolio from the database
-            portfolio = await self.get_portfolio(user_id, portfolio_id)
+            async with self.transaction(transaction) as tx:
+                # Delete the portfolio from the database
+                portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-            if not portfolio:
-                return False
-            
-            portfolio_key = portfolio["portfolio_key"]
+                if portfolio_key is None:
+                    return False
 
-            await self.connection.execute(
-                "DELETE FROM Portfolios WHERE user_id = ? AND portfolio_id = ?",
-                (user_id, portfolio_id,)
-            )
+                await self.connection.execute(
+                    "DELETE FROM Portfolios WHERE user_id = ? AND portfolio_id = ?",
+                    (user_id, portfolio_id,)
+                )
+
+                self.forget_keys(user_id) # The portfolio and its stocks are gone
 
-            await self.connection.commit() # Commit the changes
+                # Renumber in the same transaction so both steps commit together
+                if not await self.update_portfolio_indexes(user_id, transaction=tx):
+                    tx.abort() # Rollback the delete as well
+                    return False
 
             self.logger.info(f"{user_id} deleted portfolio {portfolio_key}") # Log the deletion of the portfolio
-            await self.update_portfolio_indexes(user_id) # Update the portfolio indexes
 
             return True
 
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error deleting portfolio for {user_id} : {e}")
 
             return False
 
     # This function is used to rename a portfolio from the database
-    async def rename_portfolio(self, user_id: int, portfolio_id: int, new_name: str) -> bool:
+    async def rename_portfolio(self, user_id: int, portfolio_id: int, new_name: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
         try:
-            portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+            async with self.transaction(transaction):
+                portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
 
-            if not portfolio:
-                return False
-
-            old_name = portfolio["name"] # Get the old name
-            portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
+                if not portfolio:
+                    return False
 
-            # Update the portfolio name in the database
-            await self.connection.execute(
-                "UPDATE Portfolios SET name = ? WHERE user_id = ? AND portfolio_id = ?",
-                (new_name, user_id, portfolio_id,)
-            )
+                old_name = portfolio["name"] # Get the old name
+                portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
 
-            await self.connection.commit() # Commit the changes
+                # Update the portfolio name in the database
+                await self.connection.execute(
+                    "UPDATE Portfolios SET name = ? WHERE user_id = ? AND portfolio_id = ?",
+                    (new_name, user_id, portfolio_id,)
+                )
 
             self.logger.info(f"{user_id} renamed portfolio {portfolio_key} : {old_name} --> {new_name}") # Log the change
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error renaming portfolio for {user_id} : {e}")
             return False
     
     # This function is used to update the portfolio description in the database
-    async def update_portfolio_description(self, user_id: int, portfolio_id: int, description: str) -> bool:
+    async def update_portfolio_description(self, user_id: int, portfolio_id: int, description: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
@@ -254,20 +319,17 @@ class UserManager(DatabaseManager):
         portfolio_key = portfolio["portfolio_key"]
 
         try:
-
-            # Update the portfolio description in the database
-            await self.connection.execute(
-                "UPDATE Portfolios SET description = ? WHERE user_id = ? AND portfolio_id = ?",
-                (description, user_id, portfolio_id,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Update the portfolio description in the database
+                await self.connection.execute(
+                    "UPDATE Portfolios SET description = ? WHERE user_id = ? AND portfolio_id = ?",
+                    (description, user_id, portfolio_id,)
+                )
 
             self.logger.info(f"{user_id} updated portfolio [{portfolio_key}] description : \"{old_description}\" --> \"{description}\"") # Log the change
             
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error updating portfolio [{portfolio_key}] description for {user_id} : {e}")
             return False
         
@@ -278,19 +340,45 @@ class UserManager(DatabaseManager):
         if self.connection is None or self.logger is None:
             return None
         # Get the portfolio from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Portfolios WHERE user_id = ? AND portfolio_id = ?",
             (user_id, portfolio_id,)
         ) as cursor:
             return await cursor.fetchone()
 
+    # This function is used to get the key of a portfolio, cached because almost every function needs it
+    async def get_portfolio_key(self, user_id: int, portfolio_id: int) -> int | None:
+        if self.connection is None:
+            return None
+
+        portfolio_key = self.portfolio_keys.get((user_id, portfolio_id,))
+
+        if portfolio_key is not None:
+            return portfolio_key
+
+        generation = self.portfolio_keys.generation((user_id, portfolio_id,)) # Taken before the read, a commit during it bumps it
+
+        # Get the portfolio key from the database
+        async with self.read(
+            "SELECT portfolio_key FROM Portfolios WHERE user_id = ? AND portfolio_id = ?",
+            (user_id, portfolio_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            portfolio_key = row[0] if row else None
+
+        # Keys read inside a transaction may still be rolled back
+        if current_transaction.get() is None:
+            self.portfolio_keys.put((user_id, portfolio_id,), portfolio_key, generation)
+
+        return portfolio_key
+
     # This function is used to get a portfolio from the database by name
     async def get_portfolio_byname(self, user_id: int, name: str) -> Row | None:
         if self.connection is None or self.logger is None:
             return None
         
         # Get the portfolio from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Portfolios WHERE user_id = ? AND name = ?",
             (user_id, name,)
         ) as cursor:
@@ -302,20 +390,20 @@ class UserManager(DatabaseManager):
             return None
         
         # Get the first portfolio of the user from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Portfolios WHERE user_id = ? ORDER BY portfolio_id LIMIT 1",
             (user_id,)
         ) as cursor:
             return await cursor.fetchone()
         
     # This function is used to get all portfolios of a user
-    async def get_portfolios(self, user_id: int) -> Iterable[Row] | None:
+    async def get_portfolios(self, user_id: int, limit: int = -1) -> Iterable[Row] | None:
         if self.connection is None or self.logger is None:
             return None
         
         # Get all portfolios of the user from the database
-        async with self.connection.execute(
-            "SELECT * FROM Portfolios WHERE user_id = ?", (user_id,)
+        async with self.read(
+            "SELECT * FROM Portfolios WHERE user_id = ? ORDER BY created_at DESC, portfolio_key DESC LIMIT ?", (user_id, limit,)
         ) as cursor:
             return await cursor.fetchall()
     
@@ -325,7 +413,7 @@ class UserManager(DatabaseManager):
             return -1
         
         # Get the total number of portfolios in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Portfolios"
         ) as cursor:
             all = await cursor.fetchone()
@@ -337,7 +425,7 @@ class UserManager(DatabaseManager):
             return -1
         
         # Get the total number of portfolios in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Portfolios WHERE user_id = ?",
             (user_id,)
         ) as cursor:
@@ -347,30 +435,30 @@ class UserManager(DatabaseManager):
     # <-- MISC FUNCTIONS -->
 
     # This function is used to update the portfolio indexes in the database
-    async def update_portfolio_indexes(self, user_id: int) -> bool:
+    async def update_portfolio_indexes(self, user_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
         try:
-            portfolios = await self.get_portfolios(user_id) # Get all portfolios of the user
-            
-            if not portfolios:
-                return False
-            
-            portfolios = list(portfolios) # Convert the iterable to a list
-            
-            # Update the portfolio indexes in the database
-            for new_id in range(len(portfolios)):
-                await self.connection.execute(
-                    "UPDATE Portfolios SET portfolio_id = ? WHERE user_id = ?",
-                    (new_id, user_id,)
+            async with self.transaction(transaction):
+                # Renumber the portfolios of the user in a single statement
+                cursor = await self.connection.execute(
+                    """
+                    UPDATE Portfolios SET portfolio_id = numbered.new_id
+                    FROM (
+                        SELECT portfolio_key, ROW_NUMBER() OVER (ORDER BY portfolio_id, portfolio_key) - 1 AS new_id
+                        FROM Portfolios WHERE user_id = ?
+                    ) AS numbered
+                    WHERE Portfolios.portfolio_key = numbered.portfolio_key AND Portfolios.portfolio_id != numbered.new_id
+                    """,
+                    (user_id,)
                 )
-                await self.connection.commit() # Commit the changes
 
-            self.logger.info(f"Updated {len(portfolios)} portfolio indexes for {user_id}")
+                self.forget_keys(user_id) # Portfolio ids have changed
+
+            self.logger.info(f"Updated {cursor.rowcount} portfolio indexes for {user_id}")
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error updating portfolio indexes for {user_id} : {e}")
             return False
     
@@ -436,6 +524,63 @@ class UserManager(DatabaseManager):
         
         return total_dividends
 
+    # This function is used to get the per ticker and overall totals of a portfolio in a single query
+    async def get_portfolio_summary(self, user_id: int, portfolio_id: int) -> dict | None:
+        if self.connection is None:
+            return None
+
+        # Aggregate the filled orders and dividends of every stock in the portfolio in one pass, the CROSS JOIN keeps the
+        # portfolio as the outer loop, otherwise Stocks is scanned in stock_key order to skip sorting the few rows
+        async with self.read(
+            """
+            WITH portfolio AS (
+                SELECT portfolio_key FROM Portfolios WHERE user_id = ? AND portfolio_id = ?
+            ),
+            order_totals AS (
+                SELECT ticker,
+                    COUNT(*) AS order_count,
+                    SUM(CASE WHEN status = 'Filled' AND type = 'Buy' THEN quantity
+                             WHEN status = 'Filled' AND type = 'Sell' THEN -quantity
+                             ELSE 0 END) AS quantity,
+                    SUM(CASE WHEN status = 'Filled' AND type = 'Buy' THEN price * quantity
+                             WHEN status = 'Filled' AND type = 'Sell' THEN -price * quantity
+                             ELSE 0 END) AS investment
+                FROM Orders
+                WHERE user_id = ? AND portfolio_key = (SELECT portfolio_key FROM portfolio)
+                GROUP BY ticker
+            ),
+            dividend_totals AS (
+                SELECT ticker, SUM(dividend) AS dividends
+                FROM Dividends
+                WHERE user_id = ? AND portfolio_key = (SELECT portfolio_key FROM portfolio)
+                GROUP BY ticker
+            )
+            SELECT Stocks.ticker AS ticker,
+                COALESCE(order_totals.order_count, 0) AS order_count,
+                COALESCE(order_totals.quantity, 0) AS quantity,
+                COALESCE(order_totals.investment, 0) AS investment,
+                -COALESCE(order_totals.investment, 0) AS gain_loss,
+                COALESCE(dividend_totals.dividends, 0) AS dividends
+            FROM portfolio CROSS JOIN Stocks ON Stocks.user_id = ? AND Stocks.portfolio_key = portfolio.portfolio_key
+            LEFT JOIN order_totals ON order_totals.ticker = Stocks.ticker
+            LEFT JOIN dividend_totals ON dividend_totals.ticker = Stocks.ticker
+            ORDER BY Stocks.stock_key
+            """,
+            (user_id, portfolio_id, user_id, user_id, user_id,)
+        ) as cursor:
+            tickers = list(await cursor.fetchall())
+
+        investment = sum(row["investment"] for row in tickers)
+
+        # Roll the per ticker rows up into the portfolio totals, the gain or loss adds the investment back like get_portfolio_gain_loss
+        return {
+            "tickers": tickers,
+            "quantity": sum(row["quantity"] for row in tickers),
+            "investment": investment,
+            "gain_loss": investment + sum(row["gain_loss"] for row in tickers),
+            "dividends": sum(row["dividends"] for row in tickers),
+        }
+
     # ========================================================================================================================================================================
     # Stock Functions
     # ========================================================================================================================================================================
@@ -445,15 +590,13 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return False
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
         # Check if the stock exists in the portfolio
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Stocks WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
             (user_id, portfolio_key, ticker,)
         ) as cursor:
@@ -461,58 +604,57 @@ class UserManager(DatabaseManager):
             return row is not None 
 
     # This function is used to add a stock to a user's portfolio
-    async def add_stock(self, user_id: int, portfolio_id: int, ticker: str) -> int:
+    async def add_stock(self, user_id: int, portfolio_id: int, ticker: str, transaction: Transaction | None = None) -> int:
         if self.connection is None or self.logger is None:
             return -1
 
         created = datetime.datetime.now().strftime(self.date_format) # Get the current timestamp
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
         try:
-            # Add the stock to the portfolio
-            await self.connection.execute(
-                "INSERT INTO Stocks (user_id, portfolio_key, ticker, created) VALUES (?, ?, ?, ?)",
-                (user_id, portfolio_key, ticker, created,)
-            )
-            
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Add the stock to the portfolio
+                await self.connection.execute(
+                    "INSERT INTO Stocks (user_id, portfolio_key, ticker, created, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, portfolio_key, ticker, created, toEpoch(created),)
+                )
 
             self.logger.info(f"{user_id} added stock to portfolio {portfolio_key} : {ticker}")
 
             return await self.get_stock_count(user_id, portfolio_id) # Return the stock count
         
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error adding stock to portfolio {portfolio_key} : {e}")
             return -1
 
     # This function is used to delete a stock from a user's portfolio
-    async def delete_stock(self, user_id: int, portfolio_id: int, ticker: str) -> bool:
+    async def delete_stock(self, user_id: int, portfolio_id: int, ticker: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return False
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
-        # delete the stock from the portfolio
-        await self.connection.execute(
-            "DELETE FROM Stocks WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
-            (user_id, portfolio_key, ticker,)
-        )
+        try:
+            async with self.transaction(transaction):
+                # delete the stock from the portfolio
+                await self.connection.execute(
+                    "DELETE FROM Stocks WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
+                    (user_id, portfolio_key, ticker,)
+                )
 
-        await self.connection.commit() # Commit the changes
+                self.forget_keys(user_id, portfolio_id, ticker) # The stock is gone
 
-        self.logger.info(f"{user_id} deleted stock from portfolio {portfolio_key} : {ticker}")
-        return True
+            self.logger.info(f"{user_id} deleted stock from portfolio {portfolio_key} : {ticker}")
+            return True
+        except Exception as e:
+            self.logger.error(f"error deleting stock from portfolio {portfolio_key} : {e}")
+            return False
 
     # <-- GETTERS -->
 
@@ -520,34 +662,61 @@ class UserManager(DatabaseManager):
     async def get_stock(self, user_id: int, portfolio_id: int, ticker: str) -> Row | None:
         if self.connection is None:
             return None
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
 
         # Get the stock from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Stocks WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
             (user_id, portfolio_key, ticker,)
         ) as cursor:
             return await cursor.fetchone()
    
+    # This function is used to get the key of a stock in a user's portfolio
+    async def get_stock_key(self, user_id: int, portfolio_id: int, ticker: str) -> int | None:
+        if self.connection is None:
+            return None
+
+        stock_key = self.stock_keys.get((user_id, portfolio_id, ticker,))
+
+        if stock_key is not None:
+            return stock_key
+
+        generation = self.stock_keys.generation((user_id, portfolio_id, ticker,)) # Taken before the read, a commit during it bumps it
+
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
+
+        if portfolio_key is None:
+            return None
+
+        # Get the stock key from the database
+        async with self.read(
+            "SELECT stock_key FROM Stocks WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
+            (user_id, portfolio_key, ticker,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            stock_key = row[0] if row else None
+
+        # Keys read inside a transaction may still be rolled back
+        if current_transaction.get() is None:
+            self.stock_keys.put((user_id, portfolio_id, ticker,), stock_key, generation)
+
+        return stock_key
+
     # This function is used to get all stocks in a user's portfolio
     async def get_stocks(self, user_id: int, portfolio_id: int) -> Iterable[Row] | None:
         if self.connection is None:
             return None
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
         # Get all stocks in the portfolio from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Stocks WHERE user_id = ? AND portfolio_key = ?",
             (user_id, portfolio_key,)
         ) as cursor:
@@ -558,14 +727,12 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return -1
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Stocks WHERE user_id = ? AND portfolio_key = ?",
             (user_id, portfolio_key,)
         ) as cursor:
@@ -577,15 +744,13 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return None
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
         # Get the tickers from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT ticker FROM Stocks WHERE user_id = ? AND portfolio_key = ?",
             (user_id, portfolio_key,)
         ) as cursor:
@@ -654,15 +819,13 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return False
 
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return False
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
         # Check if the order exists in the portfolio
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Orders WHERE user_id = ? AND portfolio_key = ? AND order_id = ? AND ticker = ?",
             (user_id, portfolio_key, order_id, ticker,)
         ) as cursor:
@@ -670,99 +833,103 @@ class UserManager(DatabaseManager):
             return row is not None
             
     # This function is used to add an order to a user's portfolio
-    async def add_order(self, user_id: int, portfolio_id: int, ticker: str, uOrder: UserOrder) -> int:
+    async def add_order(self, user_id: int, portfolio_id: int, ticker: str, uOrder: UserOrder, transaction: Transaction | None = None) -> int:
         if self.connection is None or self.logger is None:
             return -1
+
+        # Commit together with other writes when the write queue is on
+        if self.should_queue_write(transaction):
+            return await self.queue_write(self.add_order, user_id, portfolio_id, ticker, uOrder)
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
-        stock = await self.get_stock(user_id, portfolio_id, ticker) # Get the stock key
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
+        stock_key = await self.get_stock_key(user_id, portfolio_id, ticker) # Get the stock key
 
-        if not portfolio or not stock:
+        if portfolio_key is None or stock_key is None:
             return -1
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-        stock_key = stock["stock_key"] # Get the stock key
-
         try:
-            # Add the order to the database
-            await self.connection.execute(
-                "INSERT INTO Orders (user_id, portfolio_key, stock_key, ticker, quantity, price, status, created, type,) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                (user_id, portfolio_key, stock_key, ticker, uOrder.quantity, uOrder.price, uOrder.status, uOrder.created, uOrder.orderType, )
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Orders are numbered per ticker, count them inside the transaction so two orders can't get the same id
+                async with self.read(
+                    "SELECT COUNT(*) FROM Orders WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
+                    (user_id, portfolio_key, ticker,)
+                ) as cursor:
+                    row = await cursor.fetchone()
+                    order_id = row[0] if row else 0
+
+                # Add the order to the database
+                await self.connection.execute(
+                    "INSERT INTO Orders (user_id, portfolio_key, stock_key, ticker, order_id, quantity, price, status, created, created_at, type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, portfolio_key, stock_key, ticker, order_id, uOrder.quantity, uOrder.price, uOrder.status, uOrder.created, uOrder.createdAt(), uOrder.orderType, )
+                )
 
-            self.logger.info(f"{user_id} added order to portfolio {portfolio_key} : {ticker}")
+            self.logger.info(f"{user_id} added order to portfolio {portfolio_key} : {ticker} [{order_id}]")
 
-            return await self.get_order_count(user_id, portfolio_id) # Return the order count
+            return order_id # Return the order index
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error adding order to portfolio {portfolio_key} : {e}")
             return -1
 
     # This function is used to delete an order from a user's portfolio
-    async def delete_order(self, user_id: int, portfolio_id: int, ticker: str, order_id: int) -> bool:
+    async def delete_order(self, user_id: int, portfolio_id: int, ticker: str, order_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
         order = await self.get_order(user_id, portfolio_id, ticker, order_id) # Get the order
 
-        if not portfolio or not order:
+        if portfolio_key is None or not order:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-        order_key = order["key"] # Get the order key
+        order_key = order["order_key"] # Get the order key
 
         try:
-            # delete the order from the database
-            await self.connection.execute(
-                "DELETE FROM Orders WHERE user_id = ? AND portfolio_key = ? AND order_id = ? AND ticker = ?",
-                (user_id, portfolio_key, order_id, ticker,)
-            )
+            async with self.transaction(transaction) as tx:
+                # delete the order from the database
+                await self.connection.execute(
+                    "DELETE FROM Orders WHERE user_id = ? AND portfolio_key = ? AND order_id = ? AND ticker = ?",
+                    (user_id, portfolio_key, order_id, ticker,)
+                )
 
-            await self.connection.commit() # Commit the changes
+                # Renumber in the same transaction so both steps commit together
+                if not await self.update_order_indexes(user_id, portfolio_id, ticker, transaction=tx):
+                    tx.abort() # Rollback the delete as well
+                    return False
 
             self.logger.info(f"{user_id} deleted order from portfolio {portfolio_key} : {order_key} in {ticker}")
-            await self.update_order_indexes(user_id, portfolio_id, ticker) # Update the order indexes
 
             return True
 
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error deleting order from portfolio {portfolio_key} : {e}")
             return False
 
     # This function is used to update an order in a user's portfolio
-    async def update_order(self, user_id: int, portfolio_id: int, order_id: int, ticker: str, uOrder: UserOrder) -> bool:
+    async def update_order(self, user_id: int, portfolio_id: int, order_id: int, ticker: str, uOrder: UserOrder, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
         order = await self.get_order(user_id, portfolio_id, ticker, order_id)
 
-        if not portfolio or not order:
+        if portfolio_key is None or not order:
             return False
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
         order_key = order["order_key"] # Get the order key
 
         if not order_key or not portfolio_key:
             return False
 
         try:
-            # Update the order in the database
-            await self.connection.execute(
-                "UPDATE Orders SET quantity = ?, price = ?, status = ?, created = ?, type = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND order_key = ?",
-                (uOrder.quantity, uOrder.price, uOrder.status, uOrder.created, uOrder.orderType, user_id, portfolio_key, ticker, order_key,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Update the order in the database
+                await self.connection.execute(
+                    "UPDATE Orders SET quantity = ?, price = ?, status = ?, created = ?, created_at = ?, type = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND order_key = ?",
+                    (uOrder.quantity, uOrder.price, uOrder.status, uOrder.created, uOrder.createdAt(), uOrder.orderType, user_id, portfolio_key, ticker, order_key,)
+                )
 
             self.logger.info(f"{user_id} updated order in portfolio {portfolio_key} : {order_key}")
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error updating order in portfolio {portfolio_key} : {e}")
             return False
       
@@ -774,58 +941,86 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return None
 
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
         # Get the order from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Orders WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND order_id = ?",
             (user_id, portfolio_key, ticker, order_id,)
         ) as cursor:
             return await cursor.fetchone()
 
     # This function is used to get all orders in a user's portfolio for a stock
-    async def get_orders(self, user_id: int, portfolio_id: int, ticker: str) -> Iterable[Row] | None:
+    async def get_orders(self, user_id: int, portfolio_id: int, ticker: str, limit: int = -1) -> Iterable[Row] | None:
         if self.connection is None:
             return None
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
         # Get all orders in the portfolio from the database for the stock
-        async with self.connection.execute(
-            "SELECT * FROM Orders WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
-            (user_id, portfolio_key, ticker,)
+        async with self.read(
+            "SELECT * FROM Orders WHERE user_id = ? AND portfolio_key = ? AND ticker = ? ORDER BY created_at DESC, order_key DESC LIMIT ?",
+            (user_id, portfolio_key, ticker, limit,)
         ) as cursor:
             return await cursor.fetchall()
     
+
+    # This function is used to get one page of orders for a stock, newest first
+    async def get_orders_page(self, user_id: int, portfolio_id: int, ticker: str, after: tuple | None = None, before: tuple | None = None, limit: int = 10) -> list[Row] | None:
+        if self.connection is None:
+            return None
+
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
+
+        if portfolio_key is None:
+            return None
+
+        return await self.read_page(
+            "Orders", "order_key", "user_id = ? AND portfolio_key = ? AND ticker = ?",
+            (user_id, portfolio_key, ticker,), after, before, limit
+        )
+
     # This function is used to get the total number of orders in a user's portfolio
     async def get_order_count(self, user_id: int, portfolio_id: int) -> int:
         if self.connection is None:
             return -1
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
-        
-        portfolio_key = portfolio["portfolio_key"]
 
         # Get the total number of orders in the portfolio from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Orders WHERE user_id = ? AND portfolio_key = ?",
             (user_id, portfolio_key,)
         ) as cursor:
             all = await cursor.fetchone()            
-            return await all[0] if all else 0
+            return all[0] if all else 0
+
+
+    # This function is used to get the number of orders for a stock in a user's portfolio
+    async def get_order_count_by_ticker(self, user_id: int, portfolio_id: int, ticker: str) -> int:
+        if self.connection is None:
+            return -1
+
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
+
+        if portfolio_key is None:
+            return -1
+
+        async with self.read(
+            "SELECT COUNT(*) FROM Orders WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
+            (user_id, portfolio_key, ticker,)
+        ) as cursor:
+            all = await cursor.fetchone()
+            return all[0] if all else 0
 
     # This function is used to get the total number of orders in the database
     async def get_total_order_count(self) -> int:
@@ -833,7 +1028,7 @@ class UserManager(DatabaseManager):
             return -1
         
         # Get the total number of orders in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Orders"
         ) as cursor:
             all = await cursor.fetchone()
@@ -842,82 +1037,78 @@ class UserManager(DatabaseManager):
     # <-- MISC FUNCTIONS -->
 
     # This function is used to purge orders from a user's portfolio
-    async def purge_orders(self, user_id: int, portfolio_id: int, ticker: str) -> bool:
+    async def purge_orders(self, user_id: int, portfolio_id: int, ticker: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
 
         try:
-            if ticker == "all":
-                # Purge all orders from the database
-                await self.connection.execute(
-                    "DELETE FROM Orders WHERE user_id = ? AND portfolio_key = ? AND status = ?",
-                    (user_id, portfolio_key, "Cancelled",)
-                )
-            else:
-                # Purge the orders from the database
-                await self.connection.execute(
-                    "DELETE FROM Orders WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND status = ?",
-                    (user_id, portfolio_key, ticker, "Cancelled",)
-                )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction) as tx:
+                if ticker == "all":
+                    # Purge all orders from the database
+                    await self.connection.execute(
+                        "DELETE FROM Orders WHERE user_id = ? AND portfolio_key = ? AND status = ?",
+                        (user_id, portfolio_key, "Cancelled",)
+                    )
+                else:
+                    # Purge the orders from the database
+                    await self.connection.execute(
+                        "DELETE FROM Orders WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND status = ?",
+                        (user_id, portfolio_key, ticker, "Cancelled",)
+                    )
+
+                # Renumber in the same transaction so both steps commit together
+                if not await self.update_order_indexes(user_id, portfolio_id, ticker, transaction=tx):
+                    tx.abort() # Rollback the delete as well
+                    return False
 
             self.logger.info(f"{user_id} purged orders from portfolio {portfolio_key} : {ticker}")
 
-            await self.update_order_indexes(user_id, portfolio_id, ticker) # Update the order indexes
-
             return True
         except Exception as e:
-            await self.connection.rollback()
-            await self.connection.rollback()
             self.logger.error(f"error purging orders from portfolio {portfolio_key} : {e}")
             return False
         
     # This function is used to update the order indexes in the database
-    async def update_order_indexes(self, user_id: int, portfolio_id: int, ticker: str) -> bool:
+    async def update_order_indexes(self, user_id: int, portfolio_id: int, ticker: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        if ticker == "all":
-            stocks = await self.get_stocks(user_id, portfolio_id)
-
-            if not stocks:
-                return False
-            
-            stocks = list(stocks)
-
-            for stock in stocks:
-                await self.update_order_indexes(user_id, portfolio_id, stock["ticker"])
-
-            return True
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
-        orders = await self.get_orders(user_id, portfolio_id, ticker) # Get the orders
-
-        if not portfolio or not orders:
+        if portfolio_key is None:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
+
+        # Renumber every stock of the portfolio when the ticker is "all"
+        if ticker == "all":
+            ticker_filter = ""
+            parameters = (user_id, portfolio_key,)
+        else:
+            ticker_filter = "AND ticker = ?"
+            parameters = (user_id, portfolio_key, ticker,)
 
         try:
-            orders_list = list(orders)
-            for i in range(len(orders_list)):
-                await self.connection.execute(
-                    "UPDATE Orders SET order_id = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
-                    (i, user_id, portfolio_key, ticker,)
+            async with self.transaction(transaction):
+                # Renumber the orders of each stock in a single statement
+                cursor = await self.connection.execute(
+                    f"""
+                    UPDATE Orders SET order_id = numbered.new_id
+                    FROM (
+                        SELECT order_key, ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY order_id, order_key) - 1 AS new_id
+                        FROM Orders WHERE user_id = ? AND portfolio_key = ? {ticker_filter}
+                    ) AS numbered
+                    WHERE Orders.order_key = numbered.order_key AND Orders.order_id != numbered.new_id
+                    """,
+                    parameters
                 )
-                await self.connection.commit()
-            self.logger.info(f"updated {len(orders_list)} order indexes for {user_id}")
+
+            self.logger.info(f"updated {cursor.rowcount} order indexes for {user_id}")
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error updating order indexes for {user_id} : {e}")
             return False
 
@@ -930,15 +1121,13 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
 
         # Check if the dividend exists in the portfolio
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Dividends WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND dividend_id = ?",
             (user_id, portfolio_key, ticker, dividend_id,)
         ) as cursor:
@@ -946,26 +1135,34 @@ class UserManager(DatabaseManager):
             return row is not None
 
     # This function is used to add a dividend to a user's portfolio
-    async def add_dividend(self, user_id: int, portfolio_id: int, ticker: str, dividend: float, created: str) -> int:
+    async def add_dividend(self, user_id: int, portfolio_id: int, ticker: str, dividend: float, created: str, transaction: Transaction | None = None) -> int:
         if self.connection is None or self.logger is None:
             return -1
+
+        # Commit together with other writes when the write queue is on
+        if self.should_queue_write(transaction):
+            return await self.queue_write(self.add_dividend, user_id, portfolio_id, ticker, dividend, created)
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-        dividend_id = await self.get_dividend_count(user_id, portfolio_id) # Get the current dividend count
-
         try:
-            # Add the dividend to the database
-            await self.connection.execute(
-                "INSERT INTO Dividends (user_id, portfolio_key, ticker, dividend_id, dividend, created) VALUES (?, ?, ?, ?, ?, ?)",
-                (user_id, portfolio_key, ticker, dividend_id, dividend, created,)
-            )
+            async with self.transaction(transaction):
+                # Read inside the transaction, the stock may have been added by it
+                stock_key = await self.get_stock_key(user_id, portfolio_id, ticker)
+
+                if stock_key is None:
+                    raise ValueError(f"no stock {ticker} in the portfolio")
 
-            await self.connection.commit() # Commit the changes
+                dividend_id = await self.get_dividend_count(user_id, portfolio_id) # Get the current dividend count
+
+                # Add the dividend to the database
+                await self.connection.execute(
+                    "INSERT INTO Dividends (user_id, portfolio_key, stock_key, ticker, dividend_id, dividend, created, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, portfolio_key, stock_key, ticker, dividend_id, dividend, created, toEpoch(created),)
+                )
 
             dividend_object = await self.get_dividend(user_id, portfolio_id, ticker, dividend_id) # Get the dividend
 
@@ -976,39 +1173,38 @@ class UserManager(DatabaseManager):
 
             return dividend_id # Return the dividend index
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error adding dividend to portfolio {portfolio_key} : {e}")
             return -1
 
     # This function is used to delete a dividend from a user's portfolio
-    async def delete_dividend(self, user_id: int, portfolio_id: int, ticker: str, dividend_id: int) -> bool:
+    async def delete_dividend(self, user_id: int, portfolio_id: int, ticker: str, dividend_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
 
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
         dividend_object = await self.get_dividend(user_id, portfolio_id, ticker, dividend_id) # Get the dividend
 
-        if not portfolio or not dividend_object:
+        if portfolio_key is None or not dividend_object:
             return False
-
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
         dividend_key = dividend_object["dividend_key"] # Get the dividend key
 
         try:
-            # Delete the dividend from the database
-            await self.connection.execute(
-                "DELETE FROM Dividends WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND dividend_id = ?",
-                (user_id, portfolio_key, ticker, dividend_id,)
-            )
+            async with self.transaction(transaction) as tx:
+                # Delete the dividend from the database
+                await self.connection.execute(
+                    "DELETE FROM Dividends WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND dividend_id = ?",
+                    (user_id, portfolio_key, ticker, dividend_id,)
+                )
 
-            await self.connection.commit() # Commit the changes
+                # Renumber in the same transaction so both steps commit together
+                if not await self.update_dividend_indexes(user_id, portfolio_id, transaction=tx):
+                    tx.abort() # Rollback the delete as well
+                    return False
 
             self.logger.info(f"{user_id} deleted dividend from portfolio {portfolio_key} : {ticker} <-- {dividend_key}")
-            await self.update_dividend_indexes(user_id, portfolio_id) # Update the dividend indexes
 
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error deleting dividend from portfolio {portfolio_key} : {e}")
             return False
 
@@ -1019,64 +1215,80 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return None
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
         # Get the dividend from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Dividends WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND dividend_id = ?",
             (user_id, portfolio_key, ticker, dividend_id,)
         ) as cursor:
             return await cursor.fetchone()
     
     # This function is used to get all dividends in a user's portfolio
-    async def get_dividends(self, user_id: int, portfolio_id: int) -> Iterable[Row] | None:
+    async def get_dividends(self, user_id: int, portfolio_id: int, limit: int = -1) -> Iterable[Row] | None:
         if self.connection is None:
             return None
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
 
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
-
         # Get all dividends in the portfolio from the database
-        async with self.connection.execute(
-            "SELECT * FROM Dividends WHERE user_id = ? AND portfolio_key = ?",
-            (user_id, portfolio_key,)
+        async with self.read(
+            "SELECT * FROM Dividends WHERE user_id = ? AND portfolio_key = ? ORDER BY created_at DESC, dividend_key DESC LIMIT ?",
+            (user_id, portfolio_key, limit,)
         ) as cursor:
             return await cursor.fetchall()
     
     # This function is used to get all dividends in a user's portfolio for a stock by ticker
-    async def get_dividends_by_ticker(self, user_id: int, portfolio_id: int, ticker: str) -> Iterable[Row] | None:
+    async def get_dividends_by_ticker(self, user_id: int, portfolio_id: int, ticker: str, limit: int = -1) -> Iterable[Row] | None:
         if self.connection is None:
             return None
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
-        
-        portfolio_key = portfolio["portfolio_key"]
 
-        async with self.connection.execute(
-            "SELECT * FROM Dividends WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
-            (user_id, portfolio_key, ticker,)
+        async with self.read(
+            "SELECT * FROM Dividends WHERE user_id = ? AND portfolio_key = ? AND ticker = ? ORDER BY created_at DESC, dividend_key DESC LIMIT ?",
+            (user_id, portfolio_key, ticker, limit,)
         ) as cursor:
             return await cursor.fetchall()
 
+
+    # This function is used to get one page of dividends, newest first, for every stock when ticker is None
+    async def get_dividends_page(self, user_id: int, portfolio_id: int, ticker: str | None = None, after: tuple | None = None, before: tuple | None = None, limit: int = 10) -> list[Row] | None:
+        if self.connection is None:
+            return None
+
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
+
+        if portfolio_key is None:
+            return None
+
+        if ticker is None:
+            return await self.read_page(
+                "Dividends", "dividend_key", "user_id = ? AND portfolio_key = ?",
+                (user_id, portfolio_key,), after, before, limit
+            )
+
+        return await self.read_page(
+            "Dividends", "dividend_key", "user_id = ? AND portfolio_key = ? AND ticker = ?",
+            (user_id, portfolio_key, ticker,), after, before, limit
+        )
+
     # This function is used to get the total number of dividends in the database
     async def get_total_dividend_count(self) -> int:
         if self.connection is None:
             return -1
 
         # Get the total number of dividends in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Dividends"
         ) as cursor:
             all = await cursor.fetchone()
@@ -1087,14 +1299,12 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return -1
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
 
-        portfolio_key = portfolio["portfolio_key"]
-
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Dividends WHERE user_id = ? AND portfolio_key = ?",
             (user_id, portfolio_key,)
         ) as cursor:
@@ -1106,14 +1316,12 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return -1
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
-        
-        portfolio_key = portfolio["portfolio_key"]
 
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Dividends WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
             (user_id, portfolio_key, ticker,)
         ) as cursor:
@@ -1123,31 +1331,33 @@ class UserManager(DatabaseManager):
     # <-- MISC FUNCTIONS -->
 
     # This function is used to update the dividend indexes in the database
-    async def update_dividend_indexes(self, user_id: int, portfolio_id: int) -> bool:
+    async def update_dividend_indexes(self, user_id: int, portfolio_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
 
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
-        dividends = await self.get_dividends(user_id, portfolio_id) # Get all dividends in the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio or not dividends:
+        if portfolio_key is None:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
 
         try:
-            # Update the dividend indexes in the database
-            dividends_list = list(dividends)  # Convert Iterable[Row] to list
-            for i in range(len(dividends_list)):
-                await self.connection.execute(
-                    "UPDATE Dividends SET dividend_id = ? WHERE user_id = ? AND portfolio_key = ?",
-                    (i, user_id, portfolio_key,)
+            async with self.transaction(transaction):
+                # Renumber the dividends of the portfolio in a single statement
+                cursor = await self.connection.execute(
+                    """
+                    UPDATE Dividends SET dividend_id = numbered.new_id
+                    FROM (
+                        SELECT dividend_key, ROW_NUMBER() OVER (ORDER BY dividend_id, dividend_key) - 1 AS new_id
+                        FROM Dividends WHERE user_id = ? AND portfolio_key = ?
+                    ) AS numbered
+                    WHERE Dividends.dividend_key = numbered.dividend_key AND Dividends.dividend_id != numbered.new_id
+                    """,
+                    (user_id, portfolio_key,)
                 )
-                await self.connection.commit() # Commit the changes
-            self.logger.info(f"updated {len(dividends_list)} dividend indexes for {user_id}")
+
+            self.logger.info(f"updated {cursor.rowcount} dividend indexes for {user_id}")
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error updating dividend indexes for {user_id} : {e}")
             return False
         
@@ -1160,15 +1370,13 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
 
         # Check if the option exists in the portfolio
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Options WHERE user_id = ? AND portfolio_key = ? AND option_id = ? AND ticker = ?",
             (user_id, portfolio_key, option_id, ticker,)
         ) as cursor:
@@ -1176,28 +1384,36 @@ class UserManager(DatabaseManager):
             return row is not None
         
     # This function is used to add an option to a user's portfolio
-    async def add_option(self, user_id: int, portfolio_id: int, ticker: str, uOption: UserOption) -> int:
+    async def add_option(self, user_id: int, portfolio_id: int, ticker: str, uOption: UserOption, transaction: Transaction | None = None) -> int:
         if self.connection is None or self.logger is None:
             return -1
+
+        # Commit together with other writes when the write queue is on
+        if self.should_queue_write(transaction):
+            return await self.queue_write(self.add_option, user_id, portfolio_id, ticker, uOption)
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
-        
-        portfolio_key = portfolio["portfolio_key"]
 
-        new_option_id = await self.get_option_count(user_id, portfolio_id) # Get the current option count
         created = datetime.datetime.now().strftime(self.date_format) # Get the current timestamp
 
         try:
-            # Add the option to the database
-            await self.connection.execute(
-                "INSERT INTO Options (user_id, portfolio_key, ticker, option_id, type, strike, expires, quantity, premium, status, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (user_id, portfolio_key, ticker, new_option_id, uOption.optionType, uOption.strike, uOption.expires, uOption.quantity, uOption.premium, uOption.status, created,)
-            )
+            async with self.transaction(transaction):
+                # Read inside the transaction, the stock may have been added by it
+                stock_key = await self.get_stock_key(user_id, portfolio_id, ticker)
+
+                if stock_key is None:
+                    raise ValueError(f"no stock {ticker} in the portfolio")
 
-            await self.connection.commit() # Commit the changes
+                new_option_id = await self.get_option_count(user_id, portfolio_id) # Get the current option count
+
+                # Add the option to the database
+                await self.connection.execute(
+                    "INSERT INTO Options (user_id, portfolio_key, stock_key, ticker, option_id, type, strike, expires, expires_at, quantity, premium, result, created, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, portfolio_key, stock_key, ticker, new_option_id, uOption.optionType, uOption.strike, uOption.expires, uOption.expiresAt(), uOption.quantity, uOption.premium, uOption.status, created, toEpoch(created),)
+                )
 
             option = await self.get_option(user_id, portfolio_id, ticker, new_option_id) # Get the option
 
@@ -1210,69 +1426,63 @@ class UserManager(DatabaseManager):
 
             return new_option_id # Return the option index
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error adding option to portfolio {portfolio_key} : {e}")
             return -1
         
     # This function is used to delete an option from a user's portfolio
-    async def delete_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int) -> bool:
+    async def delete_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
         option = await self.get_option(user_id, portfolio_id, ticker, option_id) # Get the option
 
-        if not portfolio or not option:
+        if portfolio_key is None or not option:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
         option_key = option["option_key"] # Get the option key
 
         try:
-            # Delete the option from the database
-            await self.connection.execute(
-                "DELETE FROM Options WHERE user_id = ? AND portfolio_key = ? AND option_id = ? AND ticker = ?",
-                (user_id, portfolio_key, option_id, ticker,)
-            )
+            async with self.transaction(transaction) as tx:
+                # Delete the option from the database
+                await self.connection.execute(
+                    "DELETE FROM Options WHERE user_id = ? AND portfolio_key = ? AND option_id = ? AND ticker = ?",
+                    (user_id, portfolio_key, option_id, ticker,)
+                )
 
-            await self.connection.commit() # Commit the changes
+                # Renumber in the same transaction so both steps commit together
+                if not await self.update_option_indexes(user_id, portfolio_id, transaction=tx):
+                    tx.abort() # Rollback the delete as well
+                    return False
 
             self.logger.info(f"{user_id} deleted option from portfolio {portfolio_key} : {ticker} <-- {option_key}")
 
-            await self.update_option_indexes(user_id, portfolio_id) # Update the option indexes
-
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error deleting option from portfolio {portfolio_key} : {e}")
             return False
         
     # This function is used to update an option in a user's portfolio
-    async def update_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int, uOption: UserOption) -> bool:
+    async def update_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int, uOption: UserOption, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
 
         try:
-            # Update the option in the database
-            await self.connection.execute(
-                "UPDATE Options SET type = ?, strike = ?, expires = ?, quantity = ?, premium = ?, status = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND option_id = ?",
-                (uOption.optionType, uOption.strike, uOption.expires, uOption.quantity, uOption.premium, uOption.status, user_id, portfolio_key, ticker, option_id,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Update the option in the database
+                await self.connection.execute(
+                    "UPDATE Options SET type = ?, strike = ?, expires = ?, expires_at = ?, quantity = ?, premium = ?, result = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND option_id = ?",
+                    (uOption.optionType, uOption.strike, uOption.expires, uOption.expiresAt(), uOption.quantity, uOption.premium, uOption.status, user_id, portfolio_key, ticker, option_id,)
+                )
 
             self.logger.info(f"{user_id} updated option in portfolio {portfolio_key} : {ticker} <-- {option_id}")
 
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error updating option in portfolio {portfolio_key} : {e}")
             return False
         
@@ -1283,65 +1493,81 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return None
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
-        
-        portfolio_key = portfolio["portfolio_key"]
 
         # Get the option from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Options WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND option_id = ?",
             (user_id, portfolio_key, ticker, option_id,)
         ) as cursor:
             return await cursor.fetchone()
         
     # This function is used to get all options in a user's portfolio
-    async def get_options(self, user_id: int, portfolio_id: int) -> Iterable[Row] | None:
+    async def get_options(self, user_id: int, portfolio_id: int, limit: int = -1) -> Iterable[Row] | None:
         if self.connection is None:
             return None
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
-        
-        portfolio_key = portfolio["portfolio_key"]
 
         # Get all options in the portfolio from the database
-        async with self.connection.execute(
-            "SELECT * FROM Options WHERE user_id = ? AND portfolio_key = ?",
-            (user_id, portfolio_key,)
+        async with self.read(
+            "SELECT * FROM Options WHERE user_id = ? AND portfolio_key = ? ORDER BY created_at DESC, option_key DESC LIMIT ?",
+            (user_id, portfolio_key, limit,)
         ) as cursor:
             return await cursor.fetchall()
         
     # This function is used to get all options in a user's portfolio for a stock by ticker
-    async def get_options_by_ticker(self, user_id: int, portfolio_id: int, ticker: str) -> Iterable[Row] | None:
+    async def get_options_by_ticker(self, user_id: int, portfolio_id: int, ticker: str, limit: int = -1) -> Iterable[Row] | None:
         if self.connection is None:
             return None
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return None
-        
-        portfolio_key = portfolio["portfolio_key"]
 
         # Get all options in the portfolio for the stock from the database
-        async with self.connection.execute(
-            "SELECT * FROM Options WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
-            (user_id, portfolio_key, ticker,)
+        async with self.read(
+            "SELECT * FROM Options WHERE user_id = ? AND portfolio_key = ? AND ticker = ? ORDER BY created_at DESC, option_key DESC LIMIT ?",
+            (user_id, portfolio_key, ticker, limit,)
         ) as cursor:
             return await cursor.fetchall()
         
+
+    # This function is used to get one page of options, newest first, for every stock when ticker is None
+    async def get_options_page(self, user_id: int, portfolio_id: int, ticker: str | None = None, after: tuple | None = None, before: tuple | None = None, limit: int = 10) -> list[Row] | None:
+        if self.connection is None:
+            return None
+
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
+
+        if portfolio_key is None:
+            return None
+
+        if ticker is None:
+            return await self.read_page(
+                "Options", "option_key", "user_id = ? AND portfolio_key = ?",
+                (user_id, portfolio_key,), after, before, limit
+            )
+
+        return await self.read_page(
+            "Options", "option_key", "user_id = ? AND portfolio_key = ? AND ticker = ?",
+            (user_id, portfolio_key, ticker,), after, before, limit
+        )
+
     # This function is used to get the total number of options in the database
     async def get_total_option_count(self) -> int:
         if self.connection is None:
             return -1
         
         # Get the total number of options in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Options"
         ) as cursor:
             all = await cursor.fetchone()
@@ -1352,15 +1578,13 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return -1
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
-        
-        portfolio_key = portfolio["portfolio_key"]
 
         # Get the total number of options in the portfolio from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Options WHERE user_id = ? AND portfolio_key = ?",
             (user_id, portfolio_key,)
         ) as cursor:
@@ -1372,15 +1596,13 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return -1
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
-        
-        portfolio_key = portfolio["portfolio_key"]
 
         # Get the total number of options in the portfolio for the stock from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Options WHERE user_id = ? AND portfolio_key = ? AND ticker = ?",
             (user_id, portfolio_key, ticker,)
         ) as cursor:
@@ -1392,15 +1614,13 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return -1
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
-        
-        portfolio_key = portfolio["portfolio_key"]
 
         # Get the total number of call options in the portfolio for the stock from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Options WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND type = 'Call'",
             (user_id, portfolio_key, ticker,)
         ) as cursor:
@@ -1412,15 +1632,13 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return -1
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return -1
-        
-        portfolio_key = portfolio["portfolio_key"]
 
         # Get the total number of put options in the portfolio for the stock from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Options WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND type = 'Put'",
             (user_id, portfolio_key, ticker,)
         ) as cursor:
@@ -1430,129 +1648,114 @@ class UserManager(DatabaseManager):
     # <-- MISC FUNCTIONS -->
 
     # This function is used to update the option indexes in the database
-    async def update_option_indexes(self, user_id: int, portfolio_id: int) -> bool:
+    async def update_option_indexes(self, user_id: int, portfolio_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
 
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
 
-        if not portfolio:
+        if portfolio_key is None:
             return False
 
-        portfolio_key = portfolio["portfolio_key"]
-
         try:
-            # Update the option indexes in the database
-            options = await self.get_options(user_id, portfolio_id)
-
-            if not options:
-                return False
-
-            options_list = list(options) # Convert Iterable[Row] to list
-
-            for i in range(len(options_list)):
-                await self.connection.execute(
-                    "UPDATE Options SET option_id = ? WHERE user_id = ? AND portfolio_key = ?",
-                    (i, user_id, portfolio_key,)
+            async with self.transaction(transaction):
+                # Renumber the options of the portfolio in a single statement
+                cursor = await self.connection.execute(
+                    """
+                    UPDATE Options SET option_id = numbered.new_id
+                    FROM (
+                        SELECT option_key, ROW_NUMBER() OVER (ORDER BY option_id, option_key) - 1 AS new_id
+                        FROM Options WHERE user_id = ? AND portfolio_key = ?
+                    ) AS numbered
+                    WHERE Options.option_key = numbered.option_key AND Options.option_id != numbered.new_id
+                    """,
+                    (user_id, portfolio_key,)
                 )
-                await self.connection.commit() # Commit the changes
-            self.logger.info(f"updated {len(options_list)} option indexes for {user_id}")
+
+            self.logger.info(f"updated {cursor.rowcount} option indexes for {user_id}")
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error updating option indexes for {user_id} : {e}")
             return False
     
     # This function is used to close an option in a user's portfolio
-    async def close_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int, gain_loss: float) -> bool:
+    async def close_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int, gain_loss: float, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id) # Get the portfolio
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
         option = await self.get_option(user_id, portfolio_id, ticker, option_id) # Get the option
 
-        if not portfolio or not option:
+        if portfolio_key is None or not option:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"] # Get the portfolio key
         option_key = option["option_key"] # Get the option key
 
         try:
-            # Close the option in the database
-            await self.connection.execute(
-                "UPDATE Options SET status = 'Closed', gain_loss = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND option_id = ?",
-                (gain_loss, user_id, portfolio_key, ticker, option_id,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Close the option in the database
+                await self.connection.execute(
+                    "UPDATE Options SET result = 'Closed', gain_loss = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND option_id = ?",
+                    (gain_loss, user_id, portfolio_key, ticker, option_id,)
+                )
 
             self.logger.info(f"{user_id} closed option in portfolio {portfolio_key} : {ticker} <-- {option_key}")
 
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error closing option in portfolio {portfolio_key} : {e}")
             return False
 
     # This function is used to expire an option in a user's portfolio
-    async def expire_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int, gain_loss: float) -> bool:
+    async def expire_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int, gain_loss: float, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
         option = await self.get_option(user_id, portfolio_id, ticker, option_id)
 
-        if not portfolio or not option:
+        if portfolio_key is None or not option:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"]
         option_key = option["option_key"]
 
         try:
-            # Expire the option in the database
-            await self.connection.execute(
-                "UPDATE Options SET status = 'Expired', gain_loss = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND option_id = ?",
-                (gain_loss, user_id, portfolio_key, ticker, option_id,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Expire the option in the database
+                await self.connection.execute(
+                    "UPDATE Options SET result = 'Expired', gain_loss = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND option_id = ?",
+                    (gain_loss, user_id, portfolio_key, ticker, option_id,)
+                )
 
             self.logger.info(f"{user_id} expired option in portfolio {portfolio_key} : {ticker} <-- {option_key}")
 
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error expiring option in portfolio {portfolio_key} : {e}")
             return False
 
     # This function is used to exercise an option in a user's portfolio
-    async def exercise_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int, gain_loss: float) -> bool:
+    async def exercise_option(self, user_id: int, portfolio_id: int, ticker: str, option_id: int, gain_loss: float, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        portfolio = await self.get_portfolio(user_id, portfolio_id)
+        portfolio_key = await self.get_portfolio_key(user_id, portfolio_id) # Get the portfolio key
         option = await self.get_option(user_id, portfolio_id, ticker, option_id)
 
-        if not portfolio or not option:
+        if portfolio_key is None or not option:
             return False
-        
-        portfolio_key = portfolio["portfolio_key"]
         option_key = option["option_key"]
 
         try:
-            # Exercise the option in the database
-            await self.connection.execute(
-                "UPDATE Options SET status = 'Exercised', gain_loss = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND option_id = ?",
-                (gain_loss, user_id, portfolio_key, ticker, option_id,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Exercise the option in the database
+                await self.connection.execute(
+                    "UPDATE Options SET result = 'Exercised', gain_loss = ? WHERE user_id = ? AND portfolio_key = ? AND ticker = ? AND option_id = ?",
+                    (gain_loss, user_id, portfolio_key, ticker, option_id,)
+                )
 
             self.logger.info(f"{user_id} exercised option in portfolio {portfolio_key} : {ticker} <-- {option_key}")
 
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error exercising option in portfolio {portfolio_key} : {e}")
             return False
 
@@ -1566,7 +1769,7 @@ class UserManager(DatabaseManager):
             return False
         
         # Check if the watchlist exists in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Watchlists WHERE user_id = ? AND watchlist_id = ?",
             (user_id, watchlist_id,)
         ) as cursor:
@@ -1579,7 +1782,7 @@ class UserManager(DatabaseManager):
             return False
         
         # Check if the watchlist exists in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Watchlists WHERE user_id = ? AND name = ?",
             (user_id, name,)
         ) as cursor:
@@ -1587,26 +1790,25 @@ class UserManager(DatabaseManager):
             return row is not None
 
     # This function is used to create a watchlist for a user
-    async def create_watchlist(self, user_id: int, name: str = "", description: str = "") -> int:
+    async def create_watchlist(self, user_id: int, name: str = "", description: str = "", transaction: Transaction | None = None) -> int:
         if self.connection is None or self.logger is None:
             return -1
         
 
         try:
-            new_watchlist_id = await self.get_watchlist_count(user_id) # Get the current watchlist count
-            created = datetime.datetime.now().strftime(self.date_format)
+            async with self.transaction(transaction):
+                new_watchlist_id = await self.get_watchlist_count(user_id) # Get the current watchlist count
+                created = datetime.datetime.now().strftime(self.date_format)
 
-            # Check if the watchlist name is empty
-            if name == "":
-                name = f"Watchlist {new_watchlist_id}"
+                # Check if the watchlist name is empty
+                if name == "":
+                    name = f"Watchlist {new_watchlist_id}"
 
-            # Insert the watchlist into the database
-            await self.connection.execute(
-                "INSERT INTO Watchlists (user_id, watchlist_id, name, description, created) VALUES (?, ?, ?, ?, ?)",
-                (user_id, new_watchlist_id, name, description, created,)
-            )
-
-            await self.connection.commit()
+                # Insert the watchlist into the database
+                await self.connection.execute(
+                    "INSERT INTO Watchlists (user_id, watchlist_id, name, description, created, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (user_id, new_watchlist_id, name, description, created, toEpoch(created),)
+                )
 
             watchlist = await self.get_watchlist(user_id, new_watchlist_id) # Get the watchlist
 
@@ -1619,42 +1821,43 @@ class UserManager(DatabaseManager):
 
             return new_watchlist_id
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error creating watchlist for {user_id} : {e}")
 
             return -1
     
     # This function is used to delete a watchlist from the database
-    async def delete_watchlist(self, user_id: int, watchlist_id: int) -> bool:
+    async def delete_watchlist(self, user_id: int, watchlist_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
         try:
-            watchlist = await self.get_watchlist(user_id, watchlist_id) # Get the watchlist
+            async with self.transaction(transaction) as tx:
+                watchlist = await self.get_watchlist(user_id, watchlist_id) # Get the watchlist
 
-            if not watchlist:
-                return False
+                if not watchlist:
+                    return False
 
-            watchlist_key = watchlist["watchlist_key"] # Get the watchlist key
-            # Delete the watchlist from the database
-            await self.connection.execute(
-                "DELETE FROM Watchlists WHERE user_id = ? AND watchlist_id = ?",
-                (user_id, watchlist_id,)
-            )
+                watchlist_key = watchlist["watchlist_key"] # Get the watchlist key
+                # Delete the watchlist from the database
+                await self.connection.execute(
+                    "DELETE FROM Watchlists WHERE user_id = ? AND watchlist_id = ?",
+                    (user_id, watchlist_id,)
+                )
 
-            await self.connection.commit() # Commit the changes
+                # Renumber in the same transaction so both steps commit together
+                if not await self.update_watchlist_indexes(user_id, transaction=tx):
+                    tx.abort() # Rollback the delete as well
+                    return False
 
             self.logger.info(f"{user_id} deleted watchlist {watchlist_key}")
-            await self.update_watchlist_indexes(user_id) # Update the watchlist indexes
 
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error deleting watchlist for {user_id} : {e}")
             return False
 
     # This function is used to rename a watchlist from the database
-    async def rename_watchlist(self, user_id: int, watchlist_id: int, new_name: str) -> bool:
+    async def rename_watchlist(self, user_id: int, watchlist_id: int, new_name: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
@@ -1667,18 +1870,16 @@ class UserManager(DatabaseManager):
         watchlist_old_name = watchlist["name"] # Get the old name
 
         try:
-            # Update the watchlist name in the database
-            await self.connection.execute(
-                "UPDATE Watchlists SET wname = ? WHERE user_id = ? AND watchlist_id = ?",
-                (new_name, user_id, watchlist_id,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Update the watchlist name in the database
+                await self.connection.execute(
+                    "UPDATE Watchlists SET wname = ? WHERE user_id = ? AND watchlist_id = ?",
+                    (new_name, user_id, watchlist_id,)
+                )
 
             self.logger.info(f"{user_id} renamed watchlist {watchlist_key} : {watchlist_old_name} --> {new_name}") # Log the change
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error renaming watchlist for {user_id} : {e}")
             return False
 
@@ -1690,21 +1891,21 @@ class UserManager(DatabaseManager):
             return None
         
         # Get the watchlist from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Watchlists WHERE user_id = ? AND watchlist_id = ?",
             (user_id, watchlist_id,)
         ) as cursor:
             return await cursor.fetchone()
     
     # This function is used to get all watchlists of a user
-    async def get_watchlists(self, user_id: int) -> Iterable[Row] | None:
+    async def get_watchlists(self, user_id: int, limit: int = -1) -> Iterable[Row] | None:
         if self.connection is None:
             return None
         
         # Get all watchlists of the user from the database
-        async with self.connection.execute(
-            "SELECT * FROM Watchlists WHERE user_id = ?",
-            (user_id,)
+        async with self.read(
+            "SELECT * FROM Watchlists WHERE user_id = ? ORDER BY created_at DESC, watchlist_key DESC LIMIT ?",
+            (user_id, limit,)
         ) as cursor:
             return await cursor.fetchall()
     
@@ -1714,7 +1915,7 @@ class UserManager(DatabaseManager):
             return -1
         
         # Get the total number of watchlists in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Watchlists WHERE user_id = ?",
             (user_id,)
         ) as cursor:
@@ -1727,7 +1928,7 @@ class UserManager(DatabaseManager):
             return -1
         
         # Get the total number of watchlists in the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Watchlists"
         ) as cursor:
             all = await cursor.fetchone()
@@ -1739,7 +1940,7 @@ class UserManager(DatabaseManager):
             return None
         
         # Get the watchlist from the database
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Watchlists WHERE user_id = ? AND name = ?",
             (user_id, name,)
         ) as cursor:
@@ -1748,7 +1949,7 @@ class UserManager(DatabaseManager):
     # <-- MISC FUNCTIONS -->
 
     # This function is used to rename the description of a watchlist
-    async def update_watchlist_description(self, user_id: int, watchlist_id: int, description: str) -> bool:
+    async def update_watchlist_description(self, user_id: int, watchlist_id: int, description: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
@@ -1761,46 +1962,43 @@ class UserManager(DatabaseManager):
         watchlist_old_description = watchlist["description"] # Get the old description
 
         try:
-        # Update the watchlist description in the database
-            await self.connection.execute(
-                "UPDATE Watchlists SET description = ? WHERE user_id = ? AND watchlist_id = ?",
-                (description, user_id, watchlist_id,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+            # Update the watchlist description in the database
+                await self.connection.execute(
+                    "UPDATE Watchlists SET description = ? WHERE user_id = ? AND watchlist_id = ?",
+                    (description, user_id, watchlist_id,)
+                )
 
             self.logger.info(f"{user_id} updated watchlist {watchlist_key}'s description : \"{watchlist_old_description}\" --> \"{description}\"") # Log the change
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error updating watchlist {watchlist_key}'s description for {user_id} : {e}")
             return False
         
     # This function is used to update the watchlist indexes in the database
-    async def update_watchlist_indexes(self, user_id: int) -> bool:
+    async def update_watchlist_indexes(self, user_id: int, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
-        watchlists = await self.get_watchlists(user_id) # Get all watchlists of the user
-
-        if not watchlists:
-            return False
-        
         try:
-            watchlists = list(watchlists) # Convert Iterable[Row] to list
-            # Update the watchlist indexes in the database
-            for i in range(len(watchlists)):
-                await self.connection.execute(
-                    "UPDATE Watchlists SET watchlist_id = ? WHERE user_id = ?",
-                    (i, user_id,)
+            async with self.transaction(transaction):
+                # Renumber the watchlists of the user in a single statement
+                cursor = await self.connection.execute(
+                    """
+                    UPDATE Watchlists SET watchlist_id = numbered.new_id
+                    FROM (
+                        SELECT watchlist_key, ROW_NUMBER() OVER (ORDER BY watchlist_id, watchlist_key) - 1 AS new_id
+                        FROM Watchlists WHERE user_id = ?
+                    ) AS numbered
+                    WHERE Watchlists.watchlist_key = numbered.watchlist_key AND Watchlists.watchlist_id != numbered.new_id
+                    """,
+                    (user_id,)
                 )
-                await self.connection.commit() # Commit the changes
 
-            self.logger.info(f"Updated {len(watchlists)} watchlist indexes for {user_id}")
+            self.logger.info(f"Updated {cursor.rowcount} watchlist indexes for {user_id}")
 
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error updating watchlist indexes for {user_id} : {e}")
             return False
    
@@ -1821,7 +2019,7 @@ class UserManager(DatabaseManager):
         watchlist_key = watchlist["watchlist_key"] # Get the watchlist key
 
         # Check if the stock is being watched by the user
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Watching WHERE user_id = ? AND watchlist_key = ? AND ticker = ?",
             (user_id, watchlist_key, ticker,)
         ) as cursor:
@@ -1840,7 +2038,7 @@ class UserManager(DatabaseManager):
         
         watchlist_key = watchlist["watchlist_key"]
 
-        async with self.connection.execute(
+        async with self.read(
             "SELECT * FROM Watching WHERE user_id = ? AND watchlist_key = ? AND ticker = ?",
             (user_id, watchlist_key, ticker,)
         ) as cursor:
@@ -1848,7 +2046,7 @@ class UserManager(DatabaseManager):
             return row is not None
         
     # This function is used to add a stock to a user's watchlist
-    async def add_stock_to_watchlist(self, user_id: int, watchlist_id: int, ticker: str) -> bool:
+    async def add_stock_to_watchlist(self, user_id: int, watchlist_id: int, ticker: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
@@ -1859,24 +2057,24 @@ class UserManager(DatabaseManager):
 
         watchlist_key = watchlist["watchlist_key"] # Get the watchlist key
 
-        try:
-            # Add the stock to the watchlist
-            await self.connection.execute(
-                "INSERT INTO Watching (user_id, watchlist_key, ticker) VALUES (?, ?, ?)",
-                (user_id, watchlist_key, ticker,)
-            )
+        created = datetime.datetime.now().strftime(self.date_format) # Get the current timestamp
 
-            await self.connection.commit() # Commit the changes
+        try:
+            async with self.transaction(transaction):
+                # Add the stock to the watchlist
+                await self.connection.execute(
+                    "INSERT INTO Watching (user_id, watchlist_key, ticker, created, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, watchlist_key, ticker, created, toEpoch(created),)
+                )
 
             self.logger.info(f"{user_id} added stock to watchlist {watchlist_key} : {ticker}")
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error adding stock to watchlist for {user_id} : {e}")
             return False
     
     # This function is used to add a stock to a user's watchlist by name
-    async def add_stock_to_watchlist_by_name(self, user_id: int, watchlist_name: str, ticker: str) -> bool:
+    async def add_stock_to_watchlist_by_name(self, user_id: int, watchlist_name: str, ticker: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
@@ -1887,24 +2085,24 @@ class UserManager(DatabaseManager):
         
         watchlist_key = watchlist["watchlist_key"]
 
-        try:
-            # Add the stock to the watchlist
-            await self.connection.execute(
-                "INSERT INTO Watching (user_id, watchlist_key, ticker) VALUES (?, ?, ?)",
-                (user_id, watchlist_key, ticker,)
-            )
+        created = datetime.datetime.now().strftime(self.date_format) # Get the current timestamp
 
-            await self.connection.commit() # Commit the changes
+        try:
+            async with self.transaction(transaction):
+                # Add the stock to the watchlist
+                await self.connection.execute(
+                    "INSERT INTO Watching (user_id, watchlist_key, ticker, created, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, watchlist_key, ticker, created, toEpoch(created),)
+                )
 
             self.logger.info(f"{user_id} added stock to watchlist {watchlist_key} : {ticker}")
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error adding stock to watchlist for {user_id} : {e}")
             return False
 
     # This function is used to remove a stock from a user's watchlist
-    async def remove_stock_from_watchlist(self, user_id: int, watchlist_id: int, ticker: str) -> bool:
+    async def remove_stock_from_watchlist(self, user_id: int, watchlist_id: int, ticker: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
@@ -1916,23 +2114,21 @@ class UserManager(DatabaseManager):
         watchlist_key = watchlist["watchlist_key"]
 
         try:
-            # Remove the stock from the watchlist
-            await self.connection.execute(
-                "DELETE FROM Watching WHERE user_id = ? AND watchlist_key = ? AND ticker = ?",
-                (user_id, watchlist_key, ticker,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Remove the stock from the watchlist
+                await self.connection.execute(
+                    "DELETE FROM Watching WHERE user_id = ? AND watchlist_key = ? AND ticker = ?",
+                    (user_id, watchlist_key, ticker,)
+                )
 
             self.logger.info(f"{user_id} removed stock from watchlist {watchlist_key} : {ticker}")
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error removing stock from watchlist for {user_id} : {e}")
             return False
 
     # This function is used to remove a stock from a user's watchlist by name
-    async def remove_stock_from_watchlist_by_name(self, user_id: int, watchlist_name: str, ticker: str) -> bool:
+    async def remove_stock_from_watchlist_by_name(self, user_id: int, watchlist_name: str, ticker: str, transaction: Transaction | None = None) -> bool:
         if self.connection is None or self.logger is None:
             return False
         
@@ -1944,25 +2140,23 @@ class UserManager(DatabaseManager):
         watchlist_key = watchlist["watchlist_key"]
 
         try:
-            # Remove the stock from the watchlist
-            await self.connection.execute(
-                "DELETE FROM Watching WHERE user_id = ? AND watchlist_key = ? AND ticker = ?",
-                (user_id, watchlist_key, ticker,)
-            )
-
-            await self.connection.commit() # Commit the changes
+            async with self.transaction(transaction):
+                # Remove the stock from the watchlist
+                await self.connection.execute(
+                    "DELETE FROM Watching WHERE user_id = ? AND watchlist_key = ? AND ticker = ?",
+                    (user_id, watchlist_key, ticker,)
+                )
 
             self.logger.info(f"{user_id} removed stock from watchlist {watchlist_key} : {ticker}")
             return True
         except Exception as e:
-            await self.connection.rollback()
             self.logger.error(f"error removing stock from watchlist for {user_id} : {e}")
             return False
 
     # <-- GETTERS -->
 
     # This function is used to get all stocks in a user's watchlist
-    async def get_watchlist_stocks(self, user_id: int, watchlist_id: int) -> Iterable[Row] | None:
+    async def get_watchlist_stocks(self, user_id: int, watchlist_id: int, limit: int = -1) -> Iterable[Row] | None:
         if self.connection is None:
             return None
         
@@ -1974,12 +2168,28 @@ class UserManager(DatabaseManager):
         watchlist_key = watchlist["watchlist_key"]
 
         # Get all stocks in the watchlist from the database
-        async with self.connection.execute(
-            "SELECT * FROM Watching WHERE user_id = ? AND watchlist_key = ?",
-            (user_id, watchlist_key,)
+        async with self.read(
+            "SELECT * FROM Watching WHERE user_id = ? AND watchlist_key = ? ORDER BY created_at DESC, watching_key DESC LIMIT ?",
+            (user_id, watchlist_key, limit,)
         ) as cursor:
             return await cursor.fetchall()
     
+
+    # This function is used to get one page of the stocks in a user's watchlist, newest first
+    async def get_watchlist_stocks_page(self, user_id: int, watchlist_id: int, after: tuple | None = None, before: tuple | None = None, limit: int = 10) -> list[Row] | None:
+        if self.connection is None:
+            return None
+
+        watchlist = await self.get_watchlist(user_id, watchlist_id) # Get the watchlist
+
+        if not watchlist:
+            return None
+
+        return await self.read_page(
+            "Watching", "watching_key", "user_id = ? AND watchlist_key = ?",
+            (user_id, watchlist["watchlist_key"],), after, before, limit
+        )
+
     # This function is used to get the total number of stocks in a user's watchlist
     async def get_watchlist_stock_count(self, user_id: int, watchlist_id: int) -> int:
         if self.connection is None:
@@ -1992,7 +2202,7 @@ class UserManager(DatabaseManager):
         
         watchlist_key = watchlist["watchlist_key"]
 
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Watching WHERE user_id = ? AND watchlist_key = ?",
             (user_id, watchlist_key,)
         ) as cursor:
@@ -2004,8 +2214,50 @@ class UserManager(DatabaseManager):
         if self.connection is None:
             return -1
         
-        async with self.connection.execute(
+        async with self.read(
             "SELECT COUNT(*) FROM Watching"
         ) as cursor:
             all = await cursor.fetchone()
             return all[0] if all else 0
+
+    # ========================================================================================================================================================================
+    # Tracked Tickers
+    # ========================================================================================================================================================================
+
+    # This function is used to get every ticker held in a portfolio or watched in a watchlist, most held first
+    async def get_tracked_tickers(self, limit: int | None = None) -> list[Row]:
+        if self.connection is None:
+            return []
+
+        # One pass over both tables, counting how many stocks hold and watch each ticker
+        async with self.read(
+            """
+            SELECT ticker, SUM(held) AS held, SUM(watched) AS watched FROM (
+                SELECT UPPER(ticker) AS ticker, 1 AS held, 0 AS watched FROM Stocks
+                UNION ALL
+                SELECT UPPER(ticker) AS ticker, 0 AS held, 1 AS watched FROM Watching
+            )
+            GROUP BY ticker
+            ORDER BY held DESC, watched DESC, ticker
+            LIMIT ?
+            """,
+            (limit if limit is not None else -1,)
+        ) as cursor:
+            return list(await cursor.fetchall())
+
+    # This function is used to count how many orders and watched stocks use each ticker
+    async def get_ticker_popularity(self) -> dict[str, int]:
+        if self.connection is None:
+            return {}
+
+        async with self.read(
+            """
+            SELECT ticker, COUNT(*) AS uses FROM (
+                SELECT UPPER(ticker) AS ticker FROM Orders
+                UNION ALL
+                SELECT UPPER(ticker) AS ticker FROM Watching
+            )
+            GROUP BY ticker
+            """
+        ) as cursor:
+            return {row["ticker"]: row["uses"] for row in await cursor.fetchall()}
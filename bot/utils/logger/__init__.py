@@ -1 +1,2 @@
-from .formater import LoggingFormatter
\ No newline at end of file
+from .formater import LoggingFormatter
+from .pipeline import LogPipeline, log_pipeline
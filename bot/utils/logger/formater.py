@@ -22,12 +22,19 @@ class LoggingFormatter(logging.Formatter):
         logging.CRITICAL: red + bold,
     }
 
+    def __init__(self) -> None:
+        super().__init__()
+
+        # One formatter per level, built once instead of for every record
+        template = "(black){asctime}(reset) (levelcolor){levelname:<8}(reset) (green){name}(reset) {message}"
+        template = template.replace("(black)", self.black + self.bold)
+        template = template.replace("(reset)", self.reset)
+        template = template.replace("(green)", self.green + self.bold)
+        self.formatters = {
+            level: logging.Formatter(template.replace("(levelcolor)", color), "%m-%d-%Y %I:%M:%S %p", style="{")
+            for level, color in self.COLORS.items()
+        }
+
     def format(self, record):
-        log_color = self.COLORS[record.levelno]
-        format = "(black){asctime}(reset) (levelcolor){levelname:<8}(reset) (green){name}(reset) {message}"
-        format = format.replace("(black)", self.black + self.bold)
-        format = format.replace("(reset)", self.reset)
-        format = format.replace("(levelcolor)", log_color)
-        format = format.replace("(green)", self.green + self.bold)
-        formatter = logging.Formatter(format, "%m-%d-%Y %I:%M:%S %p", style="{")
+        formatter = self.formatters.get(record.levelno) or self.formatters[logging.INFO]
         return formatter.format(record)
@@ -0,0 +1,93 @@
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+# ========================================================================================================================================================================
+# Constants
+# ========================================================================================================================================================================
+
+LOG_FORMAT = "[{asctime}] [{levelname}] {name}: {message}"
+DATE_FORMAT = "%m-%d-%Y %I:%M:%S %p"
+
+# ========================================================================================================================================================================
+# Log Pipeline
+# ========================================================================================================================================================================
+
+class RecordQueueHandler(QueueHandler):
+    # This function is used to resolve the message before the record is queued, the formatting is left to the background thread
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage() # The arguments could change before the thread gets to the record
+        record.args = None
+        return record
+
+"""
+Loggers only put their records on a queue, a single background thread formats them and writes them to the files and
+the console. A slow disk or terminal never holds up the event loop. Every handler only takes the records of the logger
+it was attached to, so each log file keeps getting only its own records.
+"""
+
+class LogPipeline:
+    def __init__(self) -> None:
+        self.queue: queue.SimpleQueue = queue.SimpleQueue() # Records waiting to be written
+        self.handlers: list[logging.Handler] = [] # Every handler the background thread writes to
+        self.queue_handler: QueueHandler = RecordQueueHandler(self.queue) # Shared by every attached logger
+        self.listener: QueueListener | None = None
+        self.max_bytes: int = 10 * 1024 * 1024 # Size a log file rotates at, 0 to never rotate on size
+        self.backup_count: int = 5 # Rotated files kept
+        self.when: str = "" # Time based rotation instead, like "midnight", see TimedRotatingFileHandler
+
+    # This function is used to set how log files rotate, before any file handler is made
+    def configure(self, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, when: str = ""):
+        self.max_bytes = max(max_bytes, 0)
+        self.backup_count = max(backup_count, 0)
+        self.when = when
+
+    # This function is used to make a rotating file handler, the last run's log is rotated out so every run starts a fresh file
+    def file_handler(self, path: str, formatter: logging.Formatter | None = None) -> logging.Handler:
+        if self.when:
+            handler = TimedRotatingFileHandler(path, when=self.when, backupCount=self.backup_count, encoding="utf-8", delay=True)
+        else:
+            handler = RotatingFileHandler(path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8", delay=True)
+
+        if self.backup_count > 0 and os.path.isfile(path) and os.path.getsize(path) > 0:
+            handler.doRollover()
+
+        handler.setFormatter(formatter or logging.Formatter(LOG_FORMAT, DATE_FORMAT, style="{"))
+        return handler
+
+    # This function is used to send the records of a logger to handlers through the queue
+    def attach(self, logger: logging.Logger, *handlers: logging.Handler):
+        for handler in handlers:
+            handler.addFilter(logging.Filter(logger.name)) # Only this logger's records, and its children's
+            self.handlers.append(handler)
+
+        if self.queue_handler not in logger.handlers:
+            logger.addHandler(self.queue_handler)
+
+        if self.listener is not None:
+            self.listener.handlers = tuple(self.handlers) # The thread reads the handlers for every record
+
+    # This function is used to start the background thread
+    def start(self):
+        if self.listener is not None:
+            return
+
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop) # Write what is still queued when the bot exits
+
+    # This function is used to write the queued records and stop the background thread
+    def stop(self):
+        if self.listener is None:
+            return
+
+        self.listener.stop()
+        self.listener = None
+
+        for handler in self.handlers:
+            handler.flush()
+
+# Every logger of the bot goes through this one
+log_pipeline = LogPipeline()
@@ -0,0 +1,4 @@
+from .registry import Histogram, CommandRecord, Metrics, current_command, metrics
+from .database import InstrumentedConnection
+from .server import MetricsServer
+from .watchdog import LoopWatchdog
@@ -0,0 +1,63 @@
+import time
+import aiosqlite
+from typing import Any
+from .registry import Metrics, metrics as default_metrics
+
+# ========================================================================================================================================================================
+# Instrumented Connection
+# ========================================================================================================================================================================
+
+"""
+Wraps an aiosqlite connection so every statement is counted and timed. A statement used as "async with" is timed until
+the block ends, so the rows it fetched are part of its time. Everything else goes straight to the connection.
+"""
+
+class TimedQuery:
+    def __init__(self, result: Any, database: str, metrics: Metrics) -> None:
+        self.result = result # What aiosqlite returned, it can be awaited or used as "async with"
+        self.database: str = database
+        self.metrics: Metrics = metrics
+        self.started: float = 0.0
+
+    def __await__(self):
+        return self.run().__await__()
+
+    # This function is used to await the statement and time it
+    async def run(self) -> aiosqlite.Cursor:
+        started = time.perf_counter()
+
+        try:
+            return await self.result
+        finally:
+            self.metrics.record_query(self.database, time.perf_counter() - started)
+
+    async def __aenter__(self) -> aiosqlite.Cursor:
+        self.started = time.perf_counter()
+        return await self.result.__aenter__()
+
+    async def __aexit__(self, *exc_info) -> None:
+        try:
+            await self.result.__aexit__(*exc_info)
+        finally:
+            self.metrics.record_query(self.database, time.perf_counter() - self.started)
+
+class InstrumentedConnection:
+    def __init__(self, connection: aiosqlite.Connection, database: str, metrics: Metrics = default_metrics) -> None:
+        object.__setattr__(self, "connection", connection)
+        object.__setattr__(self, "database", database) # Label the statements are recorded under
+        object.__setattr__(self, "metrics", metrics)
+
+    def execute(self, sql: str, parameters: Any = None) -> TimedQuery:
+        return TimedQuery(self.connection.execute(sql, parameters), self.database, self.metrics)
+
+    def executemany(self, sql: str, parameters: Any) -> TimedQuery:
+        return TimedQuery(self.connection.executemany(sql, parameters), self.database, self.metrics)
+
+    def executescript(self, script: str) -> TimedQuery:
+        return TimedQuery(self.connection.executescript(script), self.database, self.metrics)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.connection, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.connection, name, value) # row_factory and the like belong to the connection
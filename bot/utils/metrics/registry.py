@@ -0,0 +1,227 @@
+import time
+import asyncio
+from weakref import WeakKeyDictionary
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# ========================================================================================================================================================================
+# Constants
+# ========================================================================================================================================================================
+
+# Upper bounds of the histogram buckets in seconds, the same ones Prometheus clients use by default
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the event loop lag buckets in seconds, a healthy loop is late by a millisecond or less
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# ========================================================================================================================================================================
+# Histogram
+# ========================================================================================================================================================================
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets: tuple[float, ...] = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1) # Observations in each bucket, the last one is +Inf
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.max: float = 0.0
+
+    # This function is used to record one observation
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    # This function is used to estimate a quantile from the buckets, like histogram_quantile does
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count > 0:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = min(self.buckets[index], self.max) if index < len(self.buckets) else self.max # Never past the slowest observation
+                return lower + (upper - lower) * (rank - seen) / count # Spread the observations evenly inside the bucket
+
+            seen += count
+
+        return self.max
+
+    # This function is used to get the cumulative bucket counts as (upper bound, count) in the Prometheus format
+    def cumulative(self) -> list[tuple[str, int]]:
+        total = 0
+        rows = []
+
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            rows.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+
+        return rows
+
+# ========================================================================================================================================================================
+# Command Record
+# ========================================================================================================================================================================
+
+"""
+A command record follows one command while it runs. The database connections and the market data service add to the
+record of the command that is running in their task, so every interaction knows what it cost.
+"""
+
+class CommandRecord:
+    __slots__ = ("command", "user", "started", "queries", "query_time", "upstream_calls")
+
+    def __init__(self, command: str, user: str = "") -> None:
+        self.command: str = command
+        self.user: str = user # Who ran the command, for the logs
+        self.started: float = time.perf_counter()
+        self.queries: int = 0 # SQLite statements run for the command
+        self.query_time: float = 0.0 # Seconds spent in them
+        self.upstream_calls: int = 0 # Market data provider calls made for the command
+
+# The record of the command running in the current task, None outside of commands
+current_command: ContextVar[CommandRecord | None] = ContextVar("current_command", default=None)
+
+# ========================================================================================================================================================================
+# Metrics
+# ========================================================================================================================================================================
+
+class Metrics:
+    def __init__(self) -> None:
+        self.started: float = time.time()
+
+        # Commands
+        self.command_time: dict[str, Histogram] = {} # Wall time by command
+        self.command_results: dict[tuple[str, str], int] = {} # Runs by (command, status)
+        self.command_queries: dict[str, int] = {} # SQLite statements by command
+        self.command_query_time: dict[str, float] = {} # Seconds in SQLite by command
+        self.command_upstream: dict[str, int] = {} # Provider calls by command
+
+        # Database and upstream
+        self.query_time: dict[str, Histogram] = {} # Statement time by database
+        self.upstream_time: dict[tuple[str, str], Histogram] = {} # Call time by (provider, call)
+        self.upstream_results: dict[tuple[str, str, str], int] = {} # Calls by (provider, call, outcome)
+
+        # Event loop
+        self.loop_lag: Histogram = Histogram(LAG_BUCKETS) # How late the loop woke up the watchdog
+        self.loop_stalls: int = 0 # Times the loop was blocked for longer than the watchdog threshold
+        self.active: WeakKeyDictionary[asyncio.Task, CommandRecord] = WeakKeyDictionary() # Commands running by task, so the watchdog knows who blocked the loop
+
+    # This function is used to start following a command in the current task
+    def start_command(self, command: str, user: str = "") -> CommandRecord:
+        record = CommandRecord(command, user)
+        current_command.set(record)
+
+        try:
+            self.active[asyncio.current_task()] = record
+        except (RuntimeError, TypeError):
+            pass # Not running in a task
+
+        return record
+
+    # This function is used to record a command that finished, with "ok" or "error"
+    def finish_command(self, record: CommandRecord, status: str):
+        for task, active in list(self.active.items()):
+            if active is record:
+                del self.active[task]
+
+        self.command_time.setdefault(record.command, Histogram()).observe(time.perf_counter() - record.started)
+        self.command_results[(record.command, status)] = self.command_results.get((record.command, status), 0) + 1
+        self.command_queries[record.command] = self.command_queries.get(record.command, 0) + record.queries
+        self.command_query_time[record.command] = self.command_query_time.get(record.command, 0.0) + record.query_time
+        self.command_upstream[record.command] = self.command_upstream.get(record.command, 0) + record.upstream_calls
+
+    # This function is used to record one SQLite statement
+    def record_query(self, database: str, seconds: float):
+        self.query_time.setdefault(database, Histogram()).observe(seconds)
+        record = current_command.get()
+
+        if record is not None:
+            record.queries += 1
+            record.query_time += seconds
+
+    # This function is used to record one market data provider call, with "ok", "error" or "timeout"
+    def record_upstream(self, provider: str, call: str, seconds: float, outcome: str):
+        self.upstream_time.setdefault((provider, call), Histogram()).observe(seconds)
+        self.upstream_results[(provider, call, outcome)] = self.upstream_results.get((provider, call, outcome), 0) + 1
+        record = current_command.get()
+
+        if record is not None:
+            record.upstream_calls += 1
+
+    # This function is used to summarize every command, slowest in total first
+    def command_summary(self) -> list[dict]:
+        summary = []
+
+        for command, histogram in self.command_time.items():
+            summary.append({
+                "command": command,
+                "count": histogram.count,
+                "errors": self.command_results.get((command, "error"), 0),
+                "average": histogram.sum / histogram.count,
+                "p50": histogram.quantile(0.5),
+                "p95": histogram.quantile(0.95),
+                "max": histogram.max,
+                "total": histogram.sum,
+                "queries": self.command_queries.get(command, 0) / histogram.count,
+                "query_time": self.command_query_time.get(command, 0.0) / histogram.count,
+                "upstream": self.command_upstream.get(command, 0) / histogram.count
+            })
+
+        return sorted(summary, key=lambda row: row["total"], reverse=True)
+
+    # This function is used to export every metric in the Prometheus text format
+    def render(self) -> str:
+        lines = [
+            "# HELP bot_uptime_seconds Seconds since the bot started.",
+            "# TYPE bot_uptime_seconds gauge",
+            f"bot_uptime_seconds {time.time() - self.started:.3f}"
+        ]
+
+        renderHistograms(lines, "bot_command_duration_seconds", "Wall time of each command.", {(command,): histogram for command, histogram in self.command_time.items()}, ("command",))
+        renderCounters(lines, "bot_commands_total", "Commands run by status.", self.command_results, ("command", "status"))
+        renderCounters(lines, "bot_command_db_queries_total", "SQLite statements run by each command.", {(command,): count for command, count in self.command_queries.items()}, ("command",))
+        renderCounters(lines, "bot_command_db_seconds_total", "Seconds each command spent in SQLite.", {(command,): seconds for command, seconds in self.command_query_time.items()}, ("command",))
+        renderCounters(lines, "bot_command_upstream_calls_total", "Market data calls made by each command.", {(command,): count for command, count in self.command_upstream.items()}, ("command",))
+        renderHistograms(lines, "bot_db_query_duration_seconds", "Time of each SQLite statement.", {(database,): histogram for database, histogram in self.query_time.items()}, ("database",))
+        renderHistograms(lines, "bot_upstream_duration_seconds", "Time of each market data call.", self.upstream_time, ("provider", "call"))
+        renderCounters(lines, "bot_upstream_calls_total", "Market data calls by outcome.", self.upstream_results, ("provider", "call", "outcome"))
+        renderHistograms(lines, "bot_event_loop_lag_seconds", "How late the event loop ran the watchdog.", {(): self.loop_lag} if self.loop_lag.count else {}, ())
+        renderCounters(lines, "bot_event_loop_stalls_total", "Times the event loop was blocked past the watchdog threshold.", {(): self.loop_stalls}, ())
+
+        return "\n".join(lines) + "\n"
+
+# This function is used to escape a label value the way the text format expects
+def escapeLabel(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# This function is used to format the labels of a sample
+def formatLabels(names: tuple[str, ...], values: tuple) -> str:
+    labels = [f'{name}="{escapeLabel(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+# This function is used to add a counter family to the exported lines
+def renderCounters(lines: list[str], name: str, help: str, values: dict[tuple, float], labels: tuple[str, ...]):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} counter")
+
+    for key, value in sorted(values.items()):
+        lines.append(f"{name}{formatLabels(labels, key)} {value:g}")
+
+# This function is used to add a histogram family to the exported lines
+def renderHistograms(lines: list[str], name: str, help: str, histograms: dict[tuple, Histogram], labels: tuple[str, ...]):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} histogram")
+
+    for key, histogram in sorted(histograms.items()):
+        for bound, count in histogram.cumulative():
+            lines.append(f"{name}_bucket{formatLabels((*labels, 'le'), (*key, bound))} {count}")
+
+        lines.append(f"{name}_sum{formatLabels(labels, key)} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{formatLabels(labels, key)} {histogram.count}")
+
+# Every part of the bot records into this one
+metrics = Metrics()
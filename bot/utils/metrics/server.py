@@ -0,0 +1,57 @@
+import logging
+from aiohttp import web
+from .registry import Metrics, metrics as default_metrics
+
+# ========================================================================================================================================================================
+# Metrics Server
+# ========================================================================================================================================================================
+
+"""
+Serves the metrics in the Prometheus text format on http://{host}:{port}/metrics. It runs on the bot's event loop and
+binds to localhost by default, so only a scraper on the same machine can read it.
+"""
+
+class MetricsServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 9108, metrics: Metrics = default_metrics, logger: logging.Logger | None = None) -> None:
+        self.host: str = host
+        self.port: int = port
+        self.metrics: Metrics = metrics
+        self.logger: logging.Logger | None = logger
+        self.runner: web.AppRunner | None = None
+
+    # This function is used to answer a scrape
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.metrics.render(), content_type="text/plain", charset="utf-8", headers={"X-Content-Type-Options": "nosniff"})
+
+    # This function is used to start listening, False if the port could not be opened
+    async def start(self) -> bool:
+        if self.runner is not None:
+            return True
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            await runner.cleanup()
+
+            if self.logger is not None:
+                self.logger.error(f"could not serve metrics on {self.host}:{self.port} : {e}")
+
+            return False
+
+        self.runner = runner
+
+        if self.logger is not None:
+            self.logger.info(f"serving metrics on http://{self.host}:{self.port}/metrics")
+
+        return True
+
+    # This function is used to stop listening
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
@@ -0,0 +1,136 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from .registry import Metrics, metrics as default_metrics
+
+# ========================================================================================================================================================================
+# Loop Watchdog
+# ========================================================================================================================================================================
+
+"""
+A task on the event loop wakes up every interval and notes the time, how late it wakes up is the loop lag. A helper
+thread checks that time, when the loop is late by more than the threshold the loop thread is stuck in something and
+its stack is captured right then, while the blocking call is still on it. The command that was running is logged with it.
+"""
+
+class LoopWatchdog:
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, samples: int = 3000, metrics: Metrics = default_metrics, logger: logging.Logger | None = None) -> None:
+        self.interval: float = interval # Seconds between two wake ups of the loop task
+        self.threshold: float = threshold # Lag in seconds that counts as a stall and gets its stack captured
+        self.metrics: Metrics = metrics
+        self.logger: logging.Logger | None = logger
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.loop_thread: int | None = None # Id of the thread running the loop
+        self.task: asyncio.Task | None = None
+        self.thread: threading.Thread | None = None
+        self.stopping: threading.Event = threading.Event()
+        self.beat: float = time.monotonic() # Monotonic time the loop task last woke up
+        self.captured_beat: float = 0.0 # Beat of the last captured stall, so one stall is captured once
+
+        # Statistics
+        self.lags: deque[float] = deque(maxlen=samples) # Most recent lags, for the percentiles
+        self.stalls: deque[dict] = deque(maxlen=10) # Most recent captured stalls
+        self.stall_count: int = 0
+        self.blocked_time: float = 0.0 # Seconds lost to lags past the threshold
+        self.max_lag: float = 0.0
+
+    # This function is used to start the loop task and the helper thread
+    async def start(self):
+        if self.task is not None:
+            return
+
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.beat = time.monotonic()
+        self.stopping.clear()
+        self.task = asyncio.create_task(self.beat_loop())
+        self.thread = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    # This function is used to stop the loop task and the helper thread
+    async def close(self):
+        self.stopping.set()
+
+        if self.task is not None:
+            self.task.cancel()
+
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+            self.task = None
+
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+            self.thread = None
+
+    # This function is used to measure how late the event loop wakes up, a late wake up means something blocked it
+    async def beat_loop(self):
+        while True:
+            started = time.monotonic()
+            self.beat = started
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - started - self.interval
+            self.record(lag)
+
+            # The stack was captured while the stall was still going, now its full length is known
+            if self.captured_beat == started and self.stalls:
+                self.stalls[-1]["lag"] = lag
+
+    # This function is used to record one lag
+    def record(self, lag: float):
+        lag = max(lag, 0.0)
+        self.lags.append(lag)
+        self.metrics.loop_lag.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+
+        if lag > self.threshold:
+            self.stall_count += 1
+            self.blocked_time += lag
+            self.metrics.loop_stalls += 1
+
+    # This function is used to check the loop from the helper thread
+    def watch(self):
+        while not self.stopping.wait(min(self.interval, self.threshold / 2)):
+            beat = self.beat
+            late = time.monotonic() - beat - self.interval
+
+            if late > self.threshold and beat != self.captured_beat:
+                self.captured_beat = beat
+                self.capture(late)
+
+    # This function is used to capture the stack of the loop thread while it is blocked
+    def capture(self, late: float):
+        frame = sys._current_frames().get(self.loop_thread) if self.loop_thread is not None else None
+        stack = "".join(traceback.format_stack(frame, limit=25)) if frame is not None else "unavailable"
+
+        # The task that is running is the one blocking the loop
+        try:
+            task = asyncio.current_task(self.loop)
+        except Exception:
+            task = None
+
+        record = self.metrics.active.get(task) if task is not None else None
+        command = f"/{record.command} by {record.user}" if record is not None else (task.get_name() if task is not None else "no task")
+
+        self.stalls.append({"time": time.time(), "lag": late, "command": command, "stack": stack})
+
+        if self.logger is not None:
+            self.logger.warning(f"event loop blocked for {late * 1000:.0f} ms+ in {command}\n{stack}")
+
+    # This function is used to get the lag percentiles of the recent samples in seconds
+    def percentiles(self) -> dict[str, float]:
+        lags = sorted(self.lags)
+
+        if not lags:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+        def at(q: float) -> float:
+            return lags[min(len(lags) - 1, int(q * len(lags)))]
+
+        return {"p50": at(0.5), "p95": at(0.95), "p99": at(0.99), "max": lags[-1]}
@@ -1 +1,2 @@
-from .bot_misc import all_cog_choices, Statuses
\ No newline at end of file
+from .bot_misc import all_cog_choices, ticker_autocomplete, Statuses
+from .paginator import Paginator
@@ -1,10 +1,11 @@
 import os
 import sys
 import json
-import pytz
 import random
-from datetime import datetime, time
+from datetime import datetime
+from discord import Interaction
 from discord.app_commands import Choice
+from utils.stocker.MarketHours import marketSession
 
 """
 ==============================================================================================================
@@ -57,6 +58,22 @@ def all_cog_choices():
     cogChoices.append(Choice(name="All", value="all")) # Add the choice to get all cogs
     return cogChoices # Return the list of choices
 
+"""
+==============================================================================================================
+This function suggests tickers as the user types them, from the bot's ticker index.
+==============================================================================================================
+"""
+
+# This function will return up to 25 tickers that match what the user typed so far.
+async def ticker_autocomplete(interaction: Interaction, current: str) -> list[Choice[str]]:
+    """
+    This function will return up to 25 tickers that match what the user typed so far.
+    """
+    tickers = getattr(interaction.client, "tickers", None) # The TickerIndex of the bot
+    if tickers is None:
+        return []
+    return [Choice(name=ticker, value=ticker) for ticker in tickers.search(current, 25)]
+
 """
 ==============================================================================================================
 This function will return all the statuses that the bot can use from the all_statuses.json file.
@@ -95,31 +112,17 @@ class Statuses:
 
         return new_status.message # Return the new status
     
-    # This function is used to check if a time is between two other times
-    async def betweenTime(self, start_time, end_time, check_time, timezone='America/Chicago'):
-        # Convert times to datetime objects
-        start = datetime.combine(datetime.today(), start_time)
-        end = datetime.combine(datetime.today(), end_time)
-        check = datetime.combine(datetime.today(), check_time)
-        
-        # Convert start and end times to specified timezone
-        tz = pytz.timezone(timezone)
-        start = tz.localize(start)
-        end = tz.localize(end)
-        check = tz.localize(check)
-        
-        # Check if check_time is between start_time and end_time
-        return start <= check <= end
-    
-    # This function is used to check if the market is open
-    async def isItOpen(self, mType: str) -> int:
+    # This function is used to check if the market is open, the windows are shared with the quote cache
+    async def isItOpen(self, mType: str, now: datetime | None = None) -> int:
+        session = marketSession(now) # Closed on weekends, a window includes its start but not its end
+
         if (mType == "anytime"):
             return 0
-        elif (mType == "markethours" and await self.betweenTime(time(8, 30), time(16, 0), datetime.now().time())):
+        elif (mType == "markethours" and session == "markethours"):
             return 1
-        elif (mType == "afterhours" and await self.betweenTime(time(16, 0), time(20, 0), datetime.now().time())):
+        elif (mType == "afterhours" and session == "afterhours"):
             return 2
-        elif (mType == "premarket" and await self.betweenTime(time(4, 0), time(8, 30), datetime.now().time())):
+        elif (mType == "premarket" and session == "premarket"):
             return 3
         else:
             return -1
@@ -0,0 +1,107 @@
+import discord
+from discord.ext.commands import Context
+from typing import Any, Awaitable, Callable
+
+"""
+==============================================================================================================
+This file contains the view used to page through long listings, one database page at a time.
+==============================================================================================================
+"""
+
+# fetch_page(after, before, limit) returns the rows of a page, newest first
+FetchPage = Callable[[tuple | None, tuple | None, int], Awaitable[list | None]]
+
+# build_embed(rows, page) returns the embed that shows the rows of a page
+BuildEmbed = Callable[[list, int], discord.Embed]
+
+
+class Paginator(discord.ui.View):
+    def __init__(self, author_id: int, fetch_page: FetchPage, build_embed: BuildEmbed, key: str, per_page: int = 10, timeout: float = 180) -> None:
+        super().__init__(timeout=timeout)
+        self.author_id: int = author_id # Only this user can turn the pages
+        self.fetch_page: FetchPage = fetch_page
+        self.build_embed: BuildEmbed = build_embed
+        self.key: str = key # Unique key column, breaks ties between rows created in the same second
+        self.per_page: int = per_page
+        self.page: int = 1
+        self.rows: list = [] # Rows of the current page
+        self.has_next: bool = False
+        self.has_previous: bool = False
+        self.message: discord.Message | None = None
+
+    # This function is used to get the cursor of a row
+    def cursor(self, row: Any) -> tuple:
+        return (row["created_at"], row[self.key])
+
+    # This function is used to load a page, one extra row is read to know if there is another page past it
+    async def load(self, after: tuple | None = None, before: tuple | None = None) -> bool:
+        rows = await self.fetch_page(after, before, self.per_page + 1)
+
+        if not rows:
+            return False
+
+        if before is not None:
+            # Moving back, the extra row is the oldest of the page before
+            self.has_previous = len(rows) > self.per_page
+            self.rows = rows[-self.per_page:]
+            self.has_next = True
+        else:
+            self.has_next = len(rows) > self.per_page
+            self.rows = rows[:self.per_page]
+            self.has_previous = after is not None
+
+        self.previous_page.disabled = not self.has_previous
+        self.next_page.disabled = not self.has_next
+        return True
+
+    # This function is used to send the first page, the buttons are only added when there is more than one page
+    async def start(self, context: Context) -> bool:
+        if not await self.load():
+            return False
+
+        embed = self.build_embed(self.rows, self.page)
+
+        if not self.has_next:
+            await context.send(embed=embed)
+            self.stop()
+            return True
+
+        self.message = await context.send(embed=embed, view=self)
+        return True
+
+    # This function is used to show a page after a button was pressed
+    async def show(self, interaction: discord.Interaction, after: tuple | None = None, before: tuple | None = None, step: int = 1):
+        if not await self.load(after, before):
+            # The rows were deleted since the last page, go back to the newest
+            self.page = 0
+            step = 1
+            await self.load()
+
+        self.page += step
+        await interaction.response.edit_message(embed=self.build_embed(self.rows, self.page), view=self)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the user who ran the command can turn the pages.", ephemeral=True)
+            return False
+
+        return True
+
+    async def on_timeout(self) -> None:
+        for item in self.children:
+            if isinstance(item, discord.ui.Button):
+                item.disabled = True
+
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass # The message was deleted
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, disabled=True)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, before=self.cursor(self.rows[0]), step=-1)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, after=self.cursor(self.rows[-1]))
@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import shutil
+import asyncio
+import logging
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions
+
+# ========================================================================================================================================================================
+# Constants
+# ========================================================================================================================================================================
+
+assets_folder = os.path.join(os.path.dirname(__file__), "..", "..", "assets")
+
+FEAR_GREED_URL = "https://money.cnn.com/data/fear-and-greed/"
+FEAR_GREED_ELEMENT = (By.NAME, "fng-index") # The index element, its parent is the part that is captured
+
+# This function is used to find geckodriver: the config path, the GECKODRIVER_PATH variable, the assets folder, then the PATH
+def findGeckodriver(path: str = "") -> str | None:
+    executable = "geckodriver.exe" if sys.platform.startswith("win") else "geckodriver"
+
+    for candidate in (path, os.environ.get("GECKODRIVER_PATH", ""), os.path.join(assets_folder, executable)):
+        if candidate and os.path.isfile(candidate):
+            return candidate
+
+    return shutil.which(executable) # None lets Selenium download a matching driver itself
+
+# ========================================================================================================================================================================
+# Fear & Greed Capture
+# ========================================================================================================================================================================
+
+"""
+Starting Firefox takes seconds, so one headless browser is kept open and reused for every capture. Selenium drivers
+can't be shared between threads, so the browser lives on its own single thread. The screenshot is cached for ttl
+seconds and callers that ask while a capture is running wait on that capture instead of starting another one.
+"""
+
+class FearGreedCapture:
+    def __init__(self, url: str = FEAR_GREED_URL, driver_path: str = "", ttl: float = 300.0, page_timeout: float = 10.0, logger: logging.Logger | None = None) -> None:
+        self.url: str = url # Page the index is captured from
+        self.driver_path: str | None = findGeckodriver(driver_path)
+        self.ttl: float = ttl # Seconds a screenshot is served before it is captured again
+        self.page_timeout: float = page_timeout # Seconds to wait for the page to load and show the index
+        self.logger: logging.Logger | None = logger
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feargreed") # The only thread that touches the browser
+        self.driver: webdriver.Firefox | None = None
+        self.image: bytes | None = None # Last screenshot as a PNG
+        self.captured: float = 0.0 # Monotonic time of the last screenshot
+        self.pending: asyncio.Task | None = None # Capture in flight
+
+        # Statistics
+        self.captures: int = 0
+        self.failures: int = 0
+        self.browser_starts: int = 0
+        self.cache_hits: int = 0
+
+    # This function is used to start the headless browser, on the browser thread
+    def start_driver(self) -> webdriver.Firefox:
+        options = Options()
+        options.add_argument("--headless")
+        service = Service(self.driver_path) if self.driver_path is not None else Service()
+
+        driver = webdriver.Firefox(service=service, options=options)
+        driver.set_window_size(1920, 1080)
+        driver.set_page_load_timeout(self.page_timeout)
+        self.browser_starts += 1
+        return driver
+
+    # This function is used to close the browser, on the browser thread
+    def quit_driver(self):
+        if self.driver is None:
+            return
+
+        try:
+            self.driver.quit()
+        except Exception:
+            pass # The browser is already gone
+
+        self.driver = None
+
+    # This function is used to screenshot the index, on the browser thread
+    def capture(self) -> bytes:
+        if self.driver is None:
+            self.driver = self.start_driver()
+
+        try:
+            self.driver.get(self.url)
+
+            # Wait until the index is on the page instead of sleeping a fixed time
+            element = WebDriverWait(self.driver, self.page_timeout).until(expected_conditions.presence_of_element_located(FEAR_GREED_ELEMENT))
+            return element.find_element(By.XPATH, "..").screenshot_as_png
+        except Exception:
+            self.quit_driver() # The browser may be broken, the next capture starts a new one
+            raise
+
+    # This function is used to capture a new screenshot and cache it
+    async def refresh(self) -> bytes | None:
+        loop = asyncio.get_running_loop()
+
+        try:
+            image = await loop.run_in_executor(self.executor, self.capture)
+        except Exception as e:
+            self.failures += 1
+
+            if self.logger is not None:
+                self.logger.error(f"error capturing the fear and greed index : {e}")
+
+            return self.image # The last screenshot is better than nothing
+
+        self.image = image
+        self.captured = time.monotonic()
+        self.captures += 1
+        return image
+
+    # This function is used to get the Fear and Greed Index as a PNG, None if it could never be captured
+    async def get(self) -> BytesIO | None:
+        if self.image is not None and time.monotonic() - self.captured < self.ttl:
+            self.cache_hits += 1
+            return BytesIO(self.image)
+
+        # Everyone asking while a capture is running shares it
+        if self.pending is None or self.pending.done():
+            self.pending = asyncio.create_task(self.refresh())
+
+        image = await asyncio.shield(self.pending)
+        return BytesIO(image) if image is not None else None
+
+    # This function is used to close the browser and its thread
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.quit_driver)
+        self.executor.shutdown(wait=False)
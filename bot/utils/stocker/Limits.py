@@ -0,0 +1,99 @@
+import time
+import asyncio
+
+# ========================================================================================================================================================================
+# Token Bucket
+# ========================================================================================================================================================================
+
+"""
+Every upstream call takes a token. Tokens come back at a steady rate up to a burst, so short bursts go straight
+through while a long one is slowed down to the rate the provider allows.
+"""
+
+class TokenBucket:
+    def __init__(self, rate: float = 5.0, burst: int = 10) -> None:
+        self.rate: float = rate # Tokens added every second, 0 or less disables the limit
+        self.burst: float = max(burst, 1) # Most tokens the bucket holds
+        self.tokens: float = self.burst # Goes below 0 when callers are waiting for tokens that are already promised to them
+        self.updated: float = time.monotonic()
+
+    # This function is used to add the tokens that came back since the last call
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # This function is used to take a token, waiting up to max_wait seconds for one: None if one was free, the wait if it had to wait, False if it gave up
+    async def acquire(self, max_wait: float) -> float | bool | None:
+        if self.rate <= 0:
+            return None
+
+        self.refill()
+        self.tokens -= 1 # Promise the next token, callers queue up in the order they asked
+
+        if self.tokens >= 0:
+            return None
+
+        wait = -self.tokens / self.rate
+
+        if wait > max_wait:
+            self.tokens += 1 # Waiting would take longer than the caller is willing to, give the promise back
+            return False
+
+        await asyncio.sleep(wait)
+        return wait
+
+# ========================================================================================================================================================================
+# Circuit Breaker
+# ========================================================================================================================================================================
+
+"""
+After enough failures in a row the breaker opens and calls are refused straight away instead of waiting on a provider
+that is throttling us. After reset_timeout one trial call is let through, it closes the breaker again if it works.
+"""
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold: int = max(failure_threshold, 1) # Failures in a row that open the breaker
+        self.reset_timeout: float = reset_timeout # Seconds the breaker stays open before a trial call
+        self.state: str = "closed" # closed, open or half-open
+        self.failures: int = 0 # Failures in a row
+        self.opened: float = 0.0 # Monotonic time the breaker last opened
+        self.open_count: int = 0 # Times the breaker opened
+
+    # This function is used to check if a call can go through
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+
+        if self.state == "open" and time.monotonic() - self.opened >= self.reset_timeout:
+            self.state = "half-open" # Let a single trial call through
+            return True
+
+        return False # Open, or a trial call is already running
+
+    # This function is used to give back a trial call that was never made, the next call becomes the trial
+    def release(self):
+        if self.state == "half-open":
+            self.state = "open"
+
+    # This function is used to record a call that worked
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+
+    # This function is used to record a call that failed
+    def record_failure(self):
+        self.failures += 1
+
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.open_count += 1
+
+            self.state = "open"
+            self.opened = time.monotonic()
+
+    # This function is used to record a call the provider answered with an error about the request itself, a trial call closes the breaker
+    def record_answer(self):
+        if self.state == "half-open":
+            self.record_success()
@@ -0,0 +1,415 @@
+import time
+import asyncio
+import logging
+import datetime
+import pandas as pd
+from typing import Any, Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from .Providers import MarketDataProvider, YahooProvider, periodStart, historyFromBars, isUpstreamFailure
+from .QuoteCache import QuoteCache
+from .Limits import TokenBucket, CircuitBreaker
+from .MarketHours import marketSession
+from ..metrics import metrics
+
+# This function is used to mark a result that is served from an expired cache entry
+def markStale(value: Any) -> Any:
+    if isinstance(value, pd.DataFrame):
+        value = value.copy(deep=False)
+        value.attrs["stale"] = True
+    elif isinstance(value, dict):
+        value = {**value, "stale": True}
+    elif isinstance(value, tuple) and value and isinstance(value[0], pd.DataFrame):
+        value = (markStale(value[0]), *value[1:])
+
+    return value
+
+# This function is used to check if a result was served from an expired cache entry
+def isStale(value: Any) -> bool:
+    if isinstance(value, pd.DataFrame):
+        return bool(value.attrs.get("stale"))
+
+    if isinstance(value, dict):
+        return bool(value.get("stale"))
+
+    if isinstance(value, tuple) and value:
+        return isStale(value[0])
+
+    return False
+
+# ========================================================================================================================================================================
+# Market Data Service
+# ========================================================================================================================================================================
+
+"""
+The market data providers are blocking HTTP clients. This service runs them on a small thread pool so the event loop,
+and with it the Discord heartbeat, keeps running while a quote is being downloaded.
+Every call goes through the provider, so Yahoo Finance can be swapped for recorded data.
+"""
+
+class MarketDataService:
+    def __init__(self,
+                 max_workers: int = 4,
+                 timeout: float = 15.0,
+                 provider: MarketDataProvider | None = None,
+                 logger: logging.Logger | None = None,
+                 cache_size: int = 1024,
+                 batch_size: int = 100,
+                 rate: float = 5.0,
+                 burst: int = 10,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0) -> None:
+        self.provider: MarketDataProvider = provider if provider is not None else YahooProvider() # Where the market data comes from
+        self.batch_size: int = max(batch_size, 1) # Most tickers in one batched call
+        self.history: Any = None # HistoryManager that keeps downloaded bars on disk, None downloads every period in full
+        self.cache: QuoteCache = QuoteCache(cache_size) # Recent results by (ticker, period, interval)
+        self.pending: dict[tuple, asyncio.Task] = {} # Fetches in flight by (ticker, period, interval)
+        self.max_workers: int = max(max_workers, 1) # Most provider calls running at once
+        self.timeout: float = timeout # Seconds a caller waits for a provider call
+        self.logger: logging.Logger | None = logger
+        self.executor: ThreadPoolExecutor | None = None
+        self.bucket: TokenBucket = TokenBucket(rate, burst) # Spaces out upstream calls so the provider doesn't throttle us
+        self.breaker: CircuitBreaker = CircuitBreaker(failure_threshold, reset_timeout) # Stops calling a provider that keeps failing
+
+        # Statistics
+        self.requests: int = 0
+        self.errors: int = 0
+        self.timeouts: int = 0
+        self.in_flight: int = 0
+        self.coalesced: int = 0 # Callers that joined a fetch already in flight
+        self.throttled: int = 0 # Calls that waited for a token
+        self.rejected: int = 0 # Calls refused by the breaker or the token bucket
+        self.stale_served: int = 0 # Stale cached results served in place of a failed call
+        self.fetch_time: float = 0.0 # Seconds spent in finished provider calls
+
+        # Pre-warming
+        self.prewarm_cycles: int = 0 # Pre-warm cycles that ran
+        self.prewarm_skipped: int = 0 # Cycles skipped because the breaker was open
+        self.prewarm_time: float = 0.0 # Seconds the last cycle took
+        self.prewarm_tickers: int = 0 # Tickers the last cycle refreshed
+        self.prewarm_coverage: float = 0.0 # Share of them with a fresh quote after the last cycle
+
+    # This function is used to start the thread pool
+    async def start(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="market-data")
+
+        if self.logger is not None:
+            self.logger.info(f"market data service started with {self.max_workers} workers")
+
+    # This function is used to stop the thread pool, running provider calls are left to finish on their own
+    async def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    # This function is used to run a provider call on the thread pool, None if it failed, took longer than the timeout or was refused
+    async def run(self, function: Callable, *args) -> Any:
+        if self.executor is None:
+            await self.start()
+
+        # Don't wait on a provider that keeps failing, the caller falls back to what is cached
+        if not self.breaker.allow():
+            self.rejected += 1
+            return None
+
+        waited = await self.bucket.acquire(self.timeout)
+
+        if waited is False:
+            self.breaker.release()
+            self.rejected += 1
+            return None
+
+        if waited is not None:
+            self.throttled += 1
+
+        loop = asyncio.get_running_loop()
+        self.requests += 1
+        self.in_flight += 1
+        started = time.perf_counter()
+        outcome = "error"
+
+        try:
+            # The thread keeps running after a timeout, the pool size bounds how many can pile up
+            value = await asyncio.wait_for(loop.run_in_executor(self.executor, function, *args), self.timeout)
+            self.breaker.record_success()
+            outcome = "ok"
+            return value
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            outcome = "timeout"
+            self.breaker.record_failure()
+
+            if self.logger is not None:
+                self.logger.warning(f"market data call timed out after {self.timeout:g}s : {args}")
+
+            return None
+        except Exception as e:
+            self.errors += 1
+
+            # Only throttling and transport errors open the breaker, an unknown ticker says nothing about the provider
+            if isUpstreamFailure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_answer()
+
+            if self.logger is not None:
+                self.logger.error(f"market data call failed : {args} : {e}")
+
+            return None
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight -= 1
+            self.fetch_time += elapsed
+            metrics.record_upstream(self.provider.name, getattr(function, "__name__", "call"), elapsed, outcome)
+
+    # This function is used to share one task between every caller asking for the same key while it runs
+    def single_flight(self, key: tuple, factory: Callable[[], Awaitable[Any]]) -> Awaitable[Any]:
+        task = self.pending.get(key)
+
+        if task is None:
+            task = asyncio.create_task(factory())
+            self.pending[key] = task
+            task.add_done_callback(lambda done: self.pending.pop(key) if self.pending.get(key) is done else None)
+        else:
+            self.coalesced += 1
+
+        # A caller that gives up doesn't cancel the call for the others
+        return asyncio.shield(task)
+
+    # This function is used to run a provider call once for every caller of a key, served from the cache while it is fresh
+    async def cached_call(self, key: tuple, function: Callable, *args) -> Any:
+        value = self.cache.get(key)
+
+        if value is not None:
+            return value
+
+        return await self.single_flight(key, lambda: self.fetch_cached(key, function, *args))
+
+    # This function is used to run a provider call and cache its result, the last result is served as stale when the call fails
+    async def fetch_cached(self, key: tuple, function: Callable, *args) -> Any:
+        value = await self.run(function, *args)
+
+        if value is None:
+            return self.serve_stale(key)
+
+        self.cache.put(key, value)
+        return value
+
+    # This function is used to get an expired cached value marked as stale, None if there is none
+    def serve_stale(self, key: tuple) -> Any:
+        value = self.cache.get_stale(key)
+
+        if value is None:
+            return None
+
+        self.stale_served += 1
+        return markStale(value)
+
+    # This function is used to get the price history and the info of a stock
+    async def get_stock(self, ticker: str, period: str = "1d", interval: str = "1d") -> tuple | None:
+        if self.history is not None:
+            # Only the bars that are not on disk yet are downloaded
+            history, info = await asyncio.gather(self.get_history(ticker, period, interval), self.get_info(ticker))
+            return (history, info) if history is not None else None
+
+        key = (ticker.upper(), period, interval)
+        return await self.cached_call(key, self.provider.get_stock, *key)
+
+    # This function is used to get the info of a stock
+    async def get_info(self, ticker: str) -> dict:
+        return await self.cached_call((ticker.upper(), "info"), self.provider.get_info, ticker.upper()) or {}
+
+    # This function is used to get the latest news of a stock
+    async def get_news(self, ticker: str) -> list[dict]:
+        return await self.cached_call((ticker.upper(), "news"), self.provider.get_news, ticker.upper()) or []
+
+    # This function is used to get the dividends a stock paid
+    async def get_dividends(self, ticker: str) -> list[tuple]:
+        return await self.cached_call((ticker.upper(), "dividends"), self.provider.get_dividends, ticker.upper()) or []
+
+    # This function is used to get the price history of a stock from the history store, downloading only the bars it is missing
+    async def get_history(self, ticker: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame | None:
+        ticker = ticker.upper()
+        start = periodStart(period, int(time.time()))
+        key = (ticker, period, interval, "history")
+
+        # Callers asking for the same range wait on the same download
+        stored, fresh = await self.single_flight(key, lambda: self.sync_history(ticker, start, interval))
+
+        if not stored:
+            return None
+
+        bars = await self.history.get_bars(ticker, interval, start)
+
+        if not bars:
+            return None
+
+        if not fresh:
+            self.stale_served += 1
+            return markStale(historyFromBars(bars)) # A download failed, only what was stored before is served
+
+        return historyFromBars(bars)
+
+    # This function is used to download the bars of a ticker that the history store is missing, as (anything stored, every download worked)
+    async def sync_history(self, ticker: str, start: int | None, interval: str) -> tuple[bool, bool]:
+        coverage = await self.history.get_coverage(ticker, interval)
+        now = int(time.time())
+        ranges: list[tuple[int | None, int | None]] = []
+
+        if coverage is None:
+            ranges.append((start, None)) # Nothing stored yet
+        else:
+            # Older bars than the stored ones, unless every bar since the listing is stored
+            if not coverage["complete"] and (start is None or start < coverage["first"]):
+                ranges.append((start, coverage["first"]))
+
+            # Newer bars, the last stored bar is downloaded again since it may have still been trading
+            updated = datetime.datetime.fromtimestamp(coverage["updated"], datetime.timezone.utc)
+            if now - coverage["updated"] >= self.cache.ttl() or marketSession(updated) != marketSession():
+                ranges.append((coverage["last"], None))
+
+        stored = coverage is not None
+        fresh = True
+
+        for range_start, range_end in ranges:
+            bars = await self.run(self.provider.get_history, ticker, range_start, range_end, interval)
+
+            if bars is None:
+                fresh = False
+                continue # Failed, serve what is stored and try again next time
+
+            if not bars and not stored:
+                return False, True # Unknown ticker, nothing is stored for it
+
+            times = [bar[0] for bar in bars]
+            first = range_start if range_start is not None else min(times, default=now)
+            last = max(times, default=first)
+
+            stored = await self.history.store_bars(ticker, interval, bars, first, last, range_start is None) or stored
+
+        return stored, fresh
+
+    # This function is used to get the quotes of many stocks, what isn't cached is downloaded in as few calls as possible
+    async def get_quotes(self, tickers: list[str], period: str = "1d", interval: str = "1d") -> dict[str, dict]:
+        quotes: dict[str, dict] = {}
+        waiting: dict[str, asyncio.Task] = {} # Ticker to the batch that is downloading it
+        missing: list[str] = []
+
+        for ticker in dict.fromkeys(ticker.upper() for ticker in tickers):
+            key = (ticker, period, interval, "quote")
+            quote = self.cache.get(key)
+
+            if quote is not None:
+                quotes[ticker] = quote
+            elif key in self.pending:
+                waiting[ticker] = self.pending[key] # Another caller is already downloading it
+                self.coalesced += 1
+            else:
+                missing.append(ticker)
+
+        # Split the missing tickers into batches, each one is a single download
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            task = self.start_batch(batch, period, interval)
+            waiting.update(dict.fromkeys(batch, task))
+
+        # Every batch runs at the same time on the thread pool
+        batches = list(dict.fromkeys(waiting.values()))
+        results = dict(zip(batches, await asyncio.gather(*(asyncio.shield(batch) for batch in batches))))
+
+        for ticker, batch in waiting.items():
+            quote = results[batch].get(ticker)
+
+            if quote is not None:
+                quotes[ticker] = quote
+
+        return quotes
+
+    # This function is used to start downloading a batch of quotes, callers asking for them meanwhile wait on the same download
+    def start_batch(self, tickers: list[str], period: str, interval: str) -> asyncio.Task:
+        task = asyncio.create_task(self.fetch_quotes(tickers, period, interval))
+
+        for ticker in tickers:
+            key = (ticker, period, interval, "quote")
+            self.pending[key] = task
+            task.add_done_callback(lambda done, key=key: self.pending.pop(key) if self.pending.get(key) is done else None)
+
+        return task
+
+    # This function is used to download the quotes of a batch of stocks and cache them, stale quotes fill in when the download fails
+    async def fetch_quotes(self, tickers: list[str], period: str, interval: str) -> dict[str, dict]:
+        quotes = await self.run(self.provider.get_quotes, tickers, period, interval)
+
+        if quotes is None:
+            stale = {ticker: self.serve_stale((ticker, period, interval, "quote")) for ticker in tickers}
+            return {ticker: quote for ticker, quote in stale.items() if quote is not None}
+
+        for ticker, quote in quotes.items():
+            self.cache.put((ticker, period, interval, "quote"), quote)
+
+        return quotes
+
+    # ====================================================================================================================================================================
+    # Pre-warming
+    # ====================================================================================================================================================================
+
+    # This function is used to refresh the quotes of stocks before anyone asks for them, in the order given so the most held go first
+    async def prewarm(self, tickers: list[str], period: str = "1d", interval: str = "1d") -> float:
+        if self.breaker.state == "open":
+            self.prewarm_skipped += 1
+            return 0.0 # The provider is failing, don't spend the cycle on stale quotes
+
+        started = time.perf_counter()
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+
+        # One batch at a time, so the token bucket keeps room for the commands people are running
+        for start in range(0, len(tickers), self.batch_size):
+            batch = [ticker for ticker in tickers[start:start + self.batch_size] if (ticker, period, interval, "quote") not in self.pending]
+
+            if batch:
+                await asyncio.shield(self.start_batch(batch, period, interval))
+
+        fresh = sum(self.cache.fresh((ticker, period, interval, "quote")) for ticker in tickers)
+
+        self.prewarm_cycles += 1
+        self.prewarm_time = time.perf_counter() - started
+        self.prewarm_tickers = len(tickers)
+        self.prewarm_coverage = fresh / len(tickers) if tickers else 1.0
+        return self.prewarm_time
+
+    # This function is used to get how many seconds to wait before the next pre-warm cycle
+    def prewarm_interval(self, minimum: float = 5.0) -> float:
+        self.cache.ttl() # Looks up the current session
+        until_change = self.cache.session_ends - time.monotonic()
+
+        # Refresh a bit before the quotes expire, and right after the session changes
+        return max(min(self.cache.ttls[self.cache.session] * 0.8, until_change + 1.0), minimum)
+
+    # This function is used to get the statistics of the service
+    def stats(self) -> dict:
+        finished = self.requests - self.in_flight
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "provider": self.provider.name,
+            "in_flight": self.in_flight,
+            "coalesced": self.coalesced,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "stale_served": self.stale_served,
+            "breaker": self.breaker.state,
+            "breaker_opened": self.breaker.open_count,
+            "average_fetch": self.fetch_time / finished if finished else 0.0,
+            "prewarm_cycles": self.prewarm_cycles,
+            "prewarm_skipped": self.prewarm_skipped,
+            "prewarm_time": self.prewarm_time,
+            "prewarm_tickers": self.prewarm_tickers,
+            "prewarm_coverage": self.prewarm_coverage,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "cache_expired": self.cache.expired,
+            "cache_evictions": self.cache.evictions,
+            "cache_size": len(self.cache)
+        }
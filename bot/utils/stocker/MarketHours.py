@@ -0,0 +1,61 @@
+import pytz
+from datetime import datetime, time, timedelta
+
+# ========================================================================================================================================================================
+# Constants
+# ========================================================================================================================================================================
+
+MARKET_TIMEZONE = pytz.timezone("America/Chicago") # The session windows are in this timezone
+
+# Start and end of each trading session, outside of them the market is closed
+SESSION_WINDOWS = {
+    "premarket": (time(4, 0), time(8, 30)),
+    "markethours": (time(8, 30), time(16, 0)),
+    "afterhours": (time(16, 0), time(20, 0))
+}
+
+# ========================================================================================================================================================================
+# Functions
+# ========================================================================================================================================================================
+
+# This function is used to get the current time in the market timezone
+def marketNow() -> datetime:
+    return datetime.now(MARKET_TIMEZONE)
+
+# This function is used to convert a time to the market timezone, naive times are taken as market times
+def toMarketTime(now: datetime | None = None) -> datetime:
+    if now is None:
+        return marketNow()
+
+    return now.astimezone(MARKET_TIMEZONE) if now.tzinfo is not None else MARKET_TIMEZONE.localize(now)
+
+# This function is used to get the trading session of a time, "closed" outside of the windows and on weekends
+def marketSession(now: datetime | None = None) -> str:
+    now = toMarketTime(now)
+
+    if now.weekday() >= 5:
+        return "closed"
+
+    for session, (start, end) in SESSION_WINDOWS.items():
+        if start <= now.time() < end:
+            return session
+
+    return "closed"
+
+# This function is used to get the seconds until the trading session changes
+def secondsUntilSessionChange(now: datetime | None = None) -> float:
+    now = toMarketTime(now)
+    session = marketSession(now)
+
+    # Every window edge of the next week, the first one that changes the session is the answer
+    for offset in range(8):
+        day = now.date() + timedelta(days=offset)
+
+        for start, end in SESSION_WINDOWS.values():
+            for edge in (start, end):
+                moment = MARKET_TIMEZONE.localize(datetime.combine(day, edge))
+
+                if moment > now and marketSession(moment) != session:
+                    return (moment - now).total_seconds()
+
+    return 0.0
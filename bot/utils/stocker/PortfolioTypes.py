@@ -1,4 +1,5 @@
 import json
+import datetime
 from sqlite3 import Row
 
 """
@@ -7,6 +8,18 @@ PortfolioTypes
     Easy to pass in a dictionary and convert it to an object.
 """
 
+date_format = "%m-%d-%Y %I:%M:%S %p" # Format of the created and expires strings
+
+# Convert a created or expires string to unix epoch seconds, the value stored in the *_at columns
+def toEpoch(date: str | None) -> int | None:
+    if date is None:
+        return None
+
+    try:
+        return int(datetime.datetime.strptime(date, date_format).timestamp())
+    except ValueError:
+        return None
+
 class UserOrder:
     def __init__(self, 
                  price: float | None = None, 
@@ -49,6 +62,10 @@ class UserOrder:
         self.orderType = data['orderType']
         self.gain_loss = data['gain_loss']
 
+    # Get the order time as unix epoch seconds
+    def createdAt(self) -> int | None:
+        return toEpoch(self.created)
+
     # Convert the order to a string
     def __str__(self) -> str:
         return json.dumps(self.__dict__)
@@ -99,10 +116,18 @@ class UserOption:
         self.premium = data['premium']
         self.created = data['created']
         self.expires = data['expires']
-        self.status = data['status']
-        self.optionType = data['optionType']
+        self.status = data['result']
+        self.optionType = data['type']
         self.gain_loss = data['gain_loss']
 
+    # Get the option order time as unix epoch seconds
+    def createdAt(self) -> int | None:
+        return toEpoch(self.created)
+
+    # Get the expiration date as unix epoch seconds
+    def expiresAt(self) -> int | None:
+        return toEpoch(self.expires)
+
     # Convert the option to a string
     def __str__(self) -> str:
         return json.dumps(self.__dict__)
\ No newline at end of file
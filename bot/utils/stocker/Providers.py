@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import zlib
+import random
+import datetime
+import threading
+import pandas as pd
+from typing import Protocol
+from yfinance.exceptions import YFRateLimitError
+from .Stock import (
+    fetchStockFromTicker, fetchQuotesFromTickers, fetchHistoryRange, fetchInfoFromTicker,
+    fetchNewsFromTicker, fetchDividendsFromTicker, quoteFromBars
+)
+
+# ========================================================================================================================================================================
+# Constants
+# ========================================================================================================================================================================
+
+fixture_folder = os.path.join(os.path.dirname(__file__), "..", "..", "assets", "fixtures") # Recorded market data
+
+# Seconds of history in each Yahoo Finance period, "ytd" and "max" are worked out when asked for
+PERIOD_SECONDS = {
+    "1d": 1 * 86400,
+    "5d": 5 * 86400,
+    "1mo": 31 * 86400,
+    "3mo": 92 * 86400,
+    "6mo": 183 * 86400,
+    "1y": 366 * 86400,
+    "2y": 731 * 86400,
+    "5y": 1827 * 86400,
+    "10y": 3653 * 86400
+}
+
+# Seconds between two bars of each interval
+INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600, "90m": 5400, "1h": 3600,
+    "1d": 86400, "5d": 5 * 86400, "1wk": 7 * 86400, "1mo": 30 * 86400, "3mo": 91 * 86400
+}
+
+# This function is used to get the epoch time a period starts at, None for every bar
+def periodStart(period: str, now: int) -> int | None:
+    if period == "max":
+        return None
+
+    if period == "ytd":
+        year = datetime.datetime.fromtimestamp(now, datetime.timezone.utc).year
+        return int(datetime.datetime(year, 1, 1, tzinfo=datetime.timezone.utc).timestamp())
+
+    return now - PERIOD_SECONDS.get(period, PERIOD_SECONDS["1d"])
+
+# This function is used to turn bars as (time, open, high, low, close, volume) into a price history frame
+def historyFromBars(bars) -> pd.DataFrame:
+    history = pd.DataFrame(bars, columns=["time", "Open", "High", "Low", "Close", "Volume"])
+    history.index = pd.to_datetime(history.pop("time"), unit="s", utc=True)
+    return history
+
+# ========================================================================================================================================================================
+# Provider Protocol
+# ========================================================================================================================================================================
+
+"""
+A provider is where the market data comes from. Every call blocks, the MarketDataService runs them on its thread pool.
+Bars are (time, open, high, low, close, volume) tuples with epoch times, oldest first.
+"""
+
+class ProviderError(Exception):
+    pass
+
+# The provider is throttling us, Yahoo Finance answers 429 Too Many Requests
+class ProviderThrottled(ProviderError):
+    pass
+
+# The provider couldn't be reached or didn't answer
+class ProviderUnavailable(ProviderError):
+    pass
+
+# This function is used to check if an error means the provider is struggling, throttling or transport, and not that the request was bad like a typo ticker
+def isUpstreamFailure(error: BaseException) -> bool:
+    if isinstance(error, (ProviderThrottled, ProviderUnavailable, YFRateLimitError, TimeoutError)):
+        return True
+
+    # HTTP errors carry the response, only 429 and server errors are the provider's fault
+    status = getattr(getattr(error, "response", None), "status_code", None)
+
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+
+    return isinstance(error, OSError) # Connection, socket and curl errors
+
+class MarketDataProvider(Protocol):
+    name: str
+
+    # This function is used to get the price history frame and the info of a stock
+    def get_stock(self, ticker: str, period: str, interval: str) -> tuple: ...
+
+    # This function is used to get the quotes of many stocks, stocks without data are left out
+    def get_quotes(self, tickers: list[str], period: str, interval: str) -> dict[str, dict]: ...
+
+    # This function is used to get the bars of a stock between two epoch times, every bar when start is None
+    def get_history(self, ticker: str, start: int | None, end: int | None, interval: str) -> list[tuple]: ...
+
+    # This function is used to get the info of a stock
+    def get_info(self, ticker: str) -> dict: ...
+
+    # This function is used to get the latest news of a stock as a list of {title, link, publisher, time}
+    def get_news(self, ticker: str) -> list[dict]: ...
+
+    # This function is used to get the dividends a stock paid as (time, amount), oldest first
+    def get_dividends(self, ticker: str) -> list[tuple]: ...
+
+# ========================================================================================================================================================================
+# Yahoo Finance Provider
+# ========================================================================================================================================================================
+
+class YahooProvider:
+    name = "yahoo"
+
+    def get_stock(self, ticker: str, period: str, interval: str) -> tuple:
+        return fetchStockFromTicker(ticker, period, interval)
+
+    def get_quotes(self, tickers: list[str], period: str, interval: str) -> dict[str, dict]:
+        return fetchQuotesFromTickers(tickers, period, interval)
+
+    def get_history(self, ticker: str, start: int | None, end: int | None, interval: str) -> list[tuple]:
+        return fetchHistoryRange(ticker, start, end, interval)
+
+    def get_info(self, ticker: str) -> dict:
+        return fetchInfoFromTicker(ticker)
+
+    def get_news(self, ticker: str) -> list[dict]:
+        return fetchNewsFromTicker(ticker)
+
+    def get_dividends(self, ticker: str) -> list[tuple]:
+        return fetchDividendsFromTicker(ticker)
+
+# ========================================================================================================================================================================
+# Fixture Provider
+# ========================================================================================================================================================================
+
+"""
+The fixture provider replays market data recorded to {folder}/{TICKER}.json, so the bot can run and be load tested
+without the network. The same seed always gives the same latencies, errors and made up stocks.
+"""
+
+class FixtureProvider:
+    name = "fixture"
+
+    def __init__(self, folder: str = fixture_folder, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0, synthesize: bool = False, align: bool = True) -> None:
+        self.folder: str = folder # Folder of the recorded stocks
+        self.latency: float = latency # Seconds every call takes
+        self.jitter: float = jitter # Up to this many more seconds are added at random
+        self.error_rate: float = error_rate # Chance that a call raises a ProviderUnavailable
+        self.synthesize: bool = synthesize # Make up a stock for tickers that were not recorded
+        self.align: bool = align # Move the recorded bars so the last one is today
+        self.random: random.Random = random.Random(seed)
+        self.lock: threading.Lock = threading.Lock() # Calls come from several pool threads
+        self.fixtures: dict[str, dict | None] = {} # Loaded fixtures by ticker
+        self.calls: int = 0
+
+    # This function is used to wait like a real provider would and fail as often as asked to
+    def simulate(self, call: str, ticker: str):
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + self.random.random() * self.jitter
+            failed = self.random.random() < self.error_rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if failed:
+            raise ProviderUnavailable(f"injected {call} error for {ticker}")
+
+    # This function is used to load the fixture of a ticker, None if it was not recorded
+    def load(self, ticker: str) -> dict | None:
+        if ticker in self.fixtures:
+            return self.fixtures[ticker]
+
+        path = os.path.join(self.folder, f"{ticker}.json")
+
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                fixture = json.load(f)
+        elif self.synthesize:
+            fixture = self.make_fixture(ticker)
+        else:
+            fixture = None
+
+        if fixture is not None and self.align:
+            self.align_fixture(fixture)
+
+        with self.lock:
+            self.fixtures[ticker] = fixture
+
+        return fixture
+
+    # This function is used to shift every recorded time so the newest daily bar is today
+    def align_fixture(self, fixture: dict):
+        daily = fixture["bars"].get("1d") or next(iter(fixture["bars"].values()), [])
+
+        if not daily:
+            return
+
+        today = int(time.time()) // 86400 * 86400
+        shift = today - daily[-1][0] // 86400 * 86400
+
+        for interval, bars in fixture["bars"].items():
+            fixture["bars"][interval] = [[bar[0] + shift, *bar[1:]] for bar in bars]
+
+        fixture["dividends"] = [[dividend[0] + shift, dividend[1]] for dividend in fixture.get("dividends", [])]
+
+        for item in fixture.get("news", []):
+            if item.get("time") is not None:
+                item["time"] += shift
+
+    # This function is used to make up a deterministic random walk for a ticker
+    def make_fixture(self, ticker: str) -> dict:
+        walk = random.Random(zlib.crc32(ticker.encode())) # The same ticker always gets the same stock
+        today = int(time.time()) // 86400 * 86400
+        price = walk.uniform(5, 500)
+        bars = []
+
+        for day in range(walk.randint(250, 2500), 0, -1):
+            open_price = price
+            price = max(price * (1 + walk.gauss(0, 0.02)), 0.01)
+            high = max(open_price, price) * (1 + walk.random() * 0.01)
+            low = min(open_price, price) * (1 - walk.random() * 0.01)
+            bars.append([today - day * 86400, round(open_price, 4), round(high, 4), round(low, 4), round(price, 4), walk.randint(10_000, 5_000_000)])
+
+        return {
+            "info": {"symbol": ticker, "shortName": ticker, "longName": f"{ticker} (synthetic)"},
+            "bars": {"1d": bars},
+            "news": [],
+            "dividends": []
+        }
+
+    # This function is used to get the recorded bars of a ticker between two epoch times
+    def bars(self, ticker: str, start: int | None, end: int | None, interval: str) -> list[tuple]:
+        fixture = self.load(ticker)
+
+        if fixture is None:
+            return []
+
+        return [
+            tuple(bar) for bar in fixture["bars"].get(interval, [])
+            if (start is None or bar[0] >= start) and (end is None or bar[0] < end)
+        ]
+
+    # This function is used to get the bars of a period, the last bar when nothing traded in it
+    def period_bars(self, ticker: str, period: str, interval: str) -> list[tuple]:
+        bars = self.bars(ticker, None, None, interval)
+        start = periodStart(period, int(time.time()))
+        sliced = [bar for bar in bars if start is None or bar[0] >= start]
+        return sliced or bars[-1:]
+
+    def get_stock(self, ticker: str, period: str, interval: str) -> tuple:
+        self.simulate("stock", ticker)
+        return historyFromBars(self.period_bars(ticker, period, interval)), self.info(ticker)
+
+    def get_quotes(self, tickers: list[str], period: str, interval: str) -> dict[str, dict]:
+        self.simulate("quotes", ",".join(tickers))
+        quotes = {}
+
+        for ticker in tickers:
+            bars = self.period_bars(ticker, period, interval)
+
+            if bars:
+                quotes[ticker] = quoteFromBars(bars)
+
+        return quotes
+
+    def get_history(self, ticker: str, start: int | None, end: int | None, interval: str) -> list[tuple]:
+        self.simulate("history", ticker)
+        return self.bars(ticker, start, end, interval)
+
+    def get_info(self, ticker: str) -> dict:
+        self.simulate("info", ticker)
+        return self.info(ticker)
+
+    def get_news(self, ticker: str) -> list[dict]:
+        self.simulate("news", ticker)
+        fixture = self.load(ticker)
+        return [dict(item) for item in fixture.get("news", [])] if fixture is not None else []
+
+    def get_dividends(self, ticker: str) -> list[tuple]:
+        self.simulate("dividends", ticker)
+        fixture = self.load(ticker)
+        return [tuple(dividend) for dividend in fixture.get("dividends", [])] if fixture is not None else []
+
+    # This function is used to get the recorded info of a ticker
+    def info(self, ticker: str) -> dict:
+        fixture = self.load(ticker)
+        return dict(fixture["info"]) if fixture is not None else {}
+
+# This function is used to record stocks from a provider into fixture files that the fixture provider can replay
+def recordFixtures(provider: MarketDataProvider, tickers: list[str], folder: str = fixture_folder, intervals: tuple[str, ...] = ("1d",)) -> int:
+    os.makedirs(folder, exist_ok=True)
+    recorded = 0
+
+    for ticker in tickers:
+        bars = {interval: [list(bar) for bar in provider.get_history(ticker, None, None, interval)] for interval in intervals}
+
+        if not any(bars.values()):
+            continue # Nothing to replay for this ticker
+
+        fixture = {
+            "info": provider.get_info(ticker),
+            "bars": bars,
+            "news": provider.get_news(ticker),
+            "dividends": [list(dividend) for dividend in provider.get_dividends(ticker)]
+        }
+
+        with open(os.path.join(folder, f"{ticker}.json"), "w", encoding="utf-8") as f:
+            json.dump(fixture, f, default=str)
+
+        recorded += 1
+
+    return recorded
@@ -0,0 +1,101 @@
+import time
+from typing import Any
+from collections import OrderedDict
+from .MarketHours import marketSession, secondsUntilSessionChange
+
+# ========================================================================================================================================================================
+# Constants
+# ========================================================================================================================================================================
+
+# Seconds a quote stays fresh in each trading session
+DEFAULT_TTLS = {
+    "premarket": 60.0,
+    "markethours": 15.0,
+    "afterhours": 60.0,
+    "closed": 6 * 60 * 60.0
+}
+
+# ========================================================================================================================================================================
+# Quote Cache
+# ========================================================================================================================================================================
+
+class QuoteCache:
+    def __init__(self, max_size: int = 1024, ttls: dict[str, float] | None = None) -> None:
+        self.entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict() # (expires, value), least recently used first
+        self.max_size: int = max(max_size, 1) # Most entries kept before the oldest is dropped
+        self.ttls: dict[str, float] = {**DEFAULT_TTLS, **(ttls or {})}
+        self.hits: int = 0 # Lookups answered from the cache
+        self.misses: int = 0 # Lookups that had to go to the provider
+        self.expired: int = 0 # Misses caused by a stale entry
+        self.evictions: int = 0 # Entries dropped to stay under max_size
+        self.session: str = "closed" # Trading session of the last lookup
+        self.session_ends: float = 0.0 # Monotonic time the session changes
+
+    # This function is used to get how long a quote stays fresh right now, it never outlives the current session
+    def ttl(self) -> float:
+        now = time.monotonic()
+
+        # The session is only looked up again once it has ended
+        if now >= self.session_ends:
+            self.session = marketSession()
+            self.session_ends = now + secondsUntilSessionChange()
+
+        return min(self.ttls[self.session], self.session_ends - now)
+
+    # This function is used to get a fresh cached value, None if it is missing or stale
+    def get(self, key: tuple) -> Any:
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires, value = entry
+
+        if expires <= time.monotonic():
+            self.expired += 1 # Kept until it is evicted, in case it has to be served stale
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key) # Mark the entry as recently used
+        self.hits += 1
+        return value
+
+    # This function is used to check if a fresh value is cached, without counting it as a lookup
+    def fresh(self, key: tuple) -> bool:
+        entry = self.entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    # This function is used to get a cached value even if it has expired, None if it is not cached
+    def get_stale(self, key: tuple) -> Any:
+        entry = self.entries.get(key)
+        return entry[1] if entry is not None else None
+
+    # This function is used to cache a value until the end of its time to live
+    def put(self, key: tuple, value: Any, ttl: float | None = None):
+        if value is None:
+            return # Failed lookups are not cached
+
+        ttl = ttl if ttl is not None else self.ttl()
+
+        if ttl <= 0:
+            return
+
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False) # Drop the least recently used entry
+            self.evictions += 1
+
+    # This function is used to drop every cached value
+    def clear(self):
+        self.entries.clear()
+
+    # This function is used to get the hit rate of the cache
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self.entries)
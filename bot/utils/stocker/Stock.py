@@ -1,53 +1,118 @@
-import os
 import asyncio
+import datetime
 import yfinance as yf
-from io import BytesIO
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.firefox.options import Options
-
-# ========================================================================================================================================================================
-# Constants
-# ========================================================================================================================================================================
-
-# Selenium Constants
-geckodriver_path = os.path.join(os.path.dirname(__file__), "..", "..", "assets", "geckodriver.exe")
-firefox_options = Options()
-firefox_options.add_argument("--headless")
 
 # ========================================================================================================================================================================
 # Functions
 # ========================================================================================================================================================================
 
-# This function is used to get the stock data from the ticker
-async def generateStockFromTicker(ticker, period='1d') -> tuple:
-    stock_panda = yf.download(ticker, period=period, prepost=True)
-    stock_info = yf.Ticker(ticker)
+# This function is used to get the stock data from the ticker, it blocks on HTTP so it has to run off the event loop
+def fetchStockFromTicker(ticker, period='1d', interval='1d') -> tuple:
+    stock = yf.Ticker(ticker)
+    stock_panda = stock.history(period=period, interval=interval, prepost=True)
+
+    # The info is downloaded lazily, read it here so it doesn't block whoever reads it later
+    try:
+        stock_info = dict(stock.info)
+    except Exception:
+        stock_info = {}
 
     return stock_panda, stock_info
-    
 
-# This function is used to get the Fear and Greed Index
-async def getFearGreedIndex() -> BytesIO | None:
-    # Initialize WebDriver
+# This function is used to get the quote of a stock from its price history
+def quoteFromHistory(history) -> dict:
+    first = float(history["Open"].iloc[0])
+    price = float(history["Close"].iloc[-1])
+
+    return {
+        "price": price,
+        "open": first,
+        "high": float(history["High"].max()),
+        "low": float(history["Low"].min()),
+        "volume": int(history["Volume"].sum()),
+        "change": price - first,
+        "percent": (price - first) / first * 100 if first else 0.0
+    }
+
+# This function is used to get the quote of a stock from its bars as (time, open, high, low, close, volume)
+def quoteFromBars(bars) -> dict:
+    first = float(bars[0][1])
+    price = float(bars[-1][4])
+
+    return {
+        "price": price,
+        "open": first,
+        "high": max(float(bar[2]) for bar in bars),
+        "low": min(float(bar[3]) for bar in bars),
+        "volume": sum(int(bar[5] or 0) for bar in bars),
+        "change": price - first,
+        "percent": (price - first) / first * 100 if first else 0.0
+    }
+
+# This function is used to get the quotes of many stocks with a single download, stocks without data are left out
+def fetchQuotesFromTickers(tickers, period='1d', interval='1d') -> dict:
+    stock_panda = yf.download(list(tickers), period=period, interval=interval, group_by='ticker', prepost=True, progress=False)
+    quotes = {}
+
+    for ticker in tickers:
+        try:
+            history = stock_panda[ticker].dropna(how="all")
+        except KeyError:
+            continue # Yahoo had nothing for this ticker
+
+        if not history.empty:
+            quotes[ticker] = quoteFromHistory(history)
+
+    return quotes
+
+# This function is used to get the bars of a stock between two epoch times as (time, open, high, low, close, volume), every bar when start is None
+def fetchHistoryRange(ticker, start=None, end=None, interval='1d') -> list:
+    stock = yf.Ticker(ticker)
+
+    if start is None:
+        stock_panda = stock.history(period="max", interval=interval, prepost=True)
+    else:
+        stock_panda = stock.history(start=start, end=end, interval=interval, prepost=True)
+
+    return [
+        (int(index.timestamp()), float(row.Open), float(row.High), float(row.Low), float(row.Close), int(row.Volume) if row.Volume == row.Volume else None)
+        for index, row in zip(stock_panda.index, stock_panda.itertuples())
+    ]
+
+# This function is used to get the info of a stock
+def fetchInfoFromTicker(ticker) -> dict:
     try:
-        service = Service(geckodriver_path)
-        driver = webdriver.Firefox(service=service, options=firefox_options)
-        driver.maximize_window()
+        return dict(yf.Ticker(ticker).info)
+    except Exception:
+        return {}
+
+# This function is used to get the latest news of a stock as a list of {title, link, publisher, time}
+def fetchNewsFromTicker(ticker) -> list:
+    news = []
+
+    for item in yf.Ticker(ticker).news or []:
+        content = item.get("content") or item # Newer versions of Yahoo nest the article under "content"
+        link = content.get("canonicalUrl") or content.get("clickThroughUrl") or {}
+        provider = content.get("provider") or {}
+        published = content.get("pubDate") or content.get("providerPublishTime")
 
-        # Get webpage
-        driver.get(f'https://money.cnn.com/data/fear-and-greed/')
-        await asyncio.sleep(1)
+        if isinstance(published, str):
+            published = int(datetime.datetime.fromisoformat(published.replace("Z", "+00:00")).timestamp())
 
-        # Get Fear and Greed Index
-        element = driver.find_element(By.NAME, 'fng-index').find_element(By.XPATH, '..')
-        screenshot = element.screenshot_as_png
-        image = BytesIO(screenshot)
+        news.append({
+            "title": content.get("title", ""),
+            "link": link.get("url") if isinstance(link, dict) else content.get("link", ""),
+            "publisher": provider.get("displayName") if isinstance(provider, dict) else content.get("publisher", ""),
+            "time": published
+        })
 
-        # Close WebDriver
-        driver.quit()
+    return news
 
-        return image
-    except:
-        return None
\ No newline at end of file
+# This function is used to get the dividends a stock paid as (time, amount), oldest first
+def fetchDividendsFromTicker(ticker) -> list:
+    dividends = yf.Ticker(ticker).dividends
+    return [(int(index.timestamp()), float(amount)) for index, amount in dividends.items()]
+
+# This function is used to get the stock data from the ticker without blocking the event loop
+async def generateStockFromTicker(ticker, period='1d') -> tuple:
+    return await asyncio.to_thread(fetchStockFromTicker, ticker, period)
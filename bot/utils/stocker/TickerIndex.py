@@ -0,0 +1,131 @@
+import os
+import heapq
+from bisect import bisect_left
+
+# ========================================================================================================================================================================
+# Constants
+# ========================================================================================================================================================================
+
+tickers_file = os.path.join(os.path.dirname(__file__), "..", "..", "assets", "tickers.txt") # Known tickers, biggest companies first
+
+# ========================================================================================================================================================================
+# Ticker Index
+# ========================================================================================================================================================================
+
+"""
+Discord only shows 25 suggestions, so the tickers are kept sorted and a prefix is found with a binary search instead of
+sending every ticker as a choice. Matches are ranked by how often our users trade and watch them, then by the order of
+the tickers file. A query that matches nothing falls back to tickers one typo away from it.
+"""
+
+class TickerIndex:
+    def __init__(self, tickers: list[str] | None = None) -> None:
+        self.order: dict[str, int] = {} # Ticker to its line in the tickers file, used to break ties
+        self.tickers: list[str] = [] # Every ticker, sorted
+        self.popularity: dict[str, int] = {} # Ticker to how many orders and watched stocks use it
+        self.ranked: dict[str, list[str]] = {} # First letter to its tickers, most used first, "" holds every ticker
+        self.deletions: dict[str, list[str]] | None = None # Ticker with one letter removed to the tickers, built on the first typo
+        self.results: dict[tuple[str, int], list[str]] = {} # Recent answers by (query, limit)
+
+        if tickers is not None:
+            self.load(tickers)
+
+    # This function is used to read the tickers from a file, one per line
+    @classmethod
+    def from_file(cls, path: str = tickers_file) -> "TickerIndex":
+        try:
+            with open(path, "r") as f:
+                return cls(f.read().splitlines())
+        except OSError:
+            return cls([])
+
+    # This function is used to index a list of tickers
+    def load(self, tickers: list[str]):
+        self.order = {}
+
+        for ticker in tickers:
+            ticker = ticker.strip().upper()
+
+            if ticker and ticker not in self.order:
+                self.order[ticker] = len(self.order)
+
+        self.tickers = sorted(self.order)
+        self.rank_tickers()
+        self.deletions = None
+        self.results.clear()
+
+    # This function is used to replace how often each ticker is used, the counts come from the database
+    def set_popularity(self, popularity: dict[str, int]):
+        self.popularity = {ticker.upper(): count for ticker, count in popularity.items()}
+        self.rank_tickers()
+        self.results.clear() # The ranking changed
+
+    # This function is used to get the sort key of a ticker, most used first
+    def rank(self, ticker: str) -> tuple[int, int]:
+        return (-self.popularity.get(ticker, 0), self.order.get(ticker, len(self.order)))
+
+    # This function is used to sort the tickers by use, so an empty or one letter query is answered with a slice
+    def rank_tickers(self):
+        self.ranked = {"": sorted(self.tickers, key=self.rank)}
+
+        for ticker in self.ranked[""]:
+            self.ranked.setdefault(ticker[0], []).append(ticker)
+
+    # This function is used to get the tickers that start with a prefix, or one typo away from it when none do
+    def search(self, query: str, limit: int = 25) -> list[str]:
+        query = query.strip().upper()
+        key = (query, limit)
+        found = self.results.get(key)
+
+        if found is not None:
+            return found
+
+        if len(query) <= 1:
+            return self.ranked.get(query, [])[:limit]
+
+        # Every ticker with the prefix sits in one run of the sorted list
+        start = bisect_left(self.tickers, query)
+        end = bisect_left(self.tickers, query + "\uffff", start)
+
+        if end > start:
+            found = heapq.nsmallest(limit, self.tickers[start:end], key=self.rank)
+        else:
+            found = sorted(self.close_matches(query), key=self.rank)[:limit]
+
+        # Keystrokes repeat the same short prefixes, so the answers are kept
+        if len(self.results) >= 4096:
+            self.results.clear()
+
+        self.results[key] = found
+        return found
+
+    # This function is used to get the tickers about one typo away from a query
+    def close_matches(self, query: str) -> list[str]:
+        if not query:
+            return []
+
+        if self.deletions is None:
+            self.deletions = {}
+
+            for ticker in self.tickers:
+                for variant in {ticker, *deletes(ticker)}:
+                    self.deletions.setdefault(variant, []).append(ticker)
+
+        # Strings that share themselves or a one letter deletion are an insertion, deletion, substitution or swap apart
+        matches: dict[str, None] = {}
+
+        for variant in (query, *deletes(query)):
+            for ticker in self.deletions.get(variant, ()):
+                matches[ticker] = None
+
+        return list(matches)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker.upper() in self.order
+
+# This function is used to get every way to remove one letter from a string
+def deletes(text: str) -> set[str]:
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
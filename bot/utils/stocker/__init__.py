@@ -1,2 +1,3 @@
 from .PortfolioTypes import *
 from .Stock import *
+from .MarketData import MarketDataService
@@ -0,0 +1,27 @@
+-- One row per bar, clustered by ticker and interval so a period is one range scan
+CREATE TABLE IF NOT EXISTS Bars (
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    time INTEGER NOT NULL,
+
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume INTEGER,
+
+    PRIMARY KEY (ticker, interval, time)
+) WITHOUT ROWID;
+
+-- The range of bars that is stored for a ticker, everything between first and last has been downloaded
+CREATE TABLE IF NOT EXISTS Coverage (
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+
+    first INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL,
+
+    PRIMARY KEY (ticker, interval)
+) WITHOUT ROWID;
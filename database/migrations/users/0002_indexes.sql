@@ -0,0 +1,23 @@
+-- Portfolios are looked up by id or by name for a user
+CREATE INDEX IF NOT EXISTS idx_portfolios_user_id ON Portfolios (user_id, portfolio_id);
+CREATE INDEX IF NOT EXISTS idx_portfolios_user_name ON Portfolios (user_id, name);
+
+-- Stocks are looked up by ticker inside a portfolio
+CREATE INDEX IF NOT EXISTS idx_stocks_portfolio_ticker ON Stocks (user_id, portfolio_key, ticker);
+
+-- Orders, dividends and options are looked up by ticker and id inside a portfolio
+CREATE INDEX IF NOT EXISTS idx_orders_portfolio_ticker ON Orders (user_id, portfolio_key, ticker, order_id);
+CREATE INDEX IF NOT EXISTS idx_dividends_portfolio_ticker ON Dividends (user_id, portfolio_key, ticker, dividend_id);
+CREATE INDEX IF NOT EXISTS idx_options_portfolio_ticker ON Options (user_id, portfolio_key, ticker, option_id);
+
+-- Watchlists are looked up by id or by name for a user
+CREATE INDEX IF NOT EXISTS idx_watchlists_user_id ON Watchlists (user_id, watchlist_id);
+CREATE INDEX IF NOT EXISTS idx_watchlists_user_name ON Watchlists (user_id, name);
+
+-- Watched stocks are looked up by ticker inside a watchlist
+CREATE INDEX IF NOT EXISTS idx_watching_watchlist_ticker ON Watching (user_id, watchlist_key, ticker);
+
+-- Child keys used by ON DELETE CASCADE when a stock is deleted
+CREATE INDEX IF NOT EXISTS idx_orders_stock ON Orders (stock_key);
+CREATE INDEX IF NOT EXISTS idx_dividends_stock ON Dividends (stock_key);
+CREATE INDEX IF NOT EXISTS idx_options_stock ON Options (stock_key);
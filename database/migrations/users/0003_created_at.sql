@@ -0,0 +1,24 @@
+-- Unix epoch copies of the "%m-%d-%Y %I:%M:%S %p" columns, so rows can be sorted and paged in SQL
+-- Existing rows are backfilled in chunks by UserManager.backfill_timestamps
+ALTER TABLE Users ADD COLUMN created_at INTEGER;
+ALTER TABLE Portfolios ADD COLUMN created_at INTEGER;
+ALTER TABLE Stocks ADD COLUMN created_at INTEGER;
+ALTER TABLE Orders ADD COLUMN created_at INTEGER;
+ALTER TABLE Dividends ADD COLUMN created_at INTEGER;
+ALTER TABLE Options ADD COLUMN created_at INTEGER;
+ALTER TABLE Options ADD COLUMN expires_at INTEGER;
+ALTER TABLE Watchlists ADD COLUMN created_at INTEGER;
+ALTER TABLE Watching ADD COLUMN created_at INTEGER;
+
+-- Newest first listings
+CREATE INDEX IF NOT EXISTS idx_portfolios_user_created ON Portfolios (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_ticker_created ON Orders (user_id, portfolio_key, ticker, created_at);
+CREATE INDEX IF NOT EXISTS idx_dividends_created ON Dividends (user_id, portfolio_key, created_at);
+CREATE INDEX IF NOT EXISTS idx_dividends_ticker_created ON Dividends (user_id, portfolio_key, ticker, created_at);
+CREATE INDEX IF NOT EXISTS idx_options_created ON Options (user_id, portfolio_key, created_at);
+CREATE INDEX IF NOT EXISTS idx_options_ticker_created ON Options (user_id, portfolio_key, ticker, created_at);
+CREATE INDEX IF NOT EXISTS idx_watchlists_user_created ON Watchlists (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_watching_watchlist_created ON Watching (user_id, watchlist_key, created_at);
+
+-- Options that are about to expire
+CREATE INDEX IF NOT EXISTS idx_options_expires ON Options (expires_at);
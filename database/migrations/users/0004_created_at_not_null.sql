@@ -0,0 +1,42 @@
+-- created_at is never NULL, the listings page with (created_at, key) cursors and a NULL would end a listing early
+-- A date that can't be read is stored as 0 like in UserManager.backfill_timestamps, the row is listed as the oldest
+
+CREATE TRIGGER IF NOT EXISTS trg_users_created_at_insert AFTER INSERT ON Users WHEN NEW.created_at IS NULL
+BEGIN UPDATE Users SET created_at = 0 WHERE user_id = NEW.user_id; END;
+CREATE TRIGGER IF NOT EXISTS trg_users_created_at_update AFTER UPDATE OF created_at ON Users WHEN NEW.created_at IS NULL
+BEGIN UPDATE Users SET created_at = 0 WHERE user_id = NEW.user_id; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_portfolios_created_at_insert AFTER INSERT ON Portfolios WHEN NEW.created_at IS NULL
+BEGIN UPDATE Portfolios SET created_at = 0 WHERE portfolio_key = NEW.portfolio_key; END;
+CREATE TRIGGER IF NOT EXISTS trg_portfolios_created_at_update AFTER UPDATE OF created_at ON Portfolios WHEN NEW.created_at IS NULL
+BEGIN UPDATE Portfolios SET created_at = 0 WHERE portfolio_key = NEW.portfolio_key; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stocks_created_at_insert AFTER INSERT ON Stocks WHEN NEW.created_at IS NULL
+BEGIN UPDATE Stocks SET created_at = 0 WHERE stock_key = NEW.stock_key; END;
+CREATE TRIGGER IF NOT EXISTS trg_stocks_created_at_update AFTER UPDATE OF created_at ON Stocks WHEN NEW.created_at IS NULL
+BEGIN UPDATE Stocks SET created_at = 0 WHERE stock_key = NEW.stock_key; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_created_at_insert AFTER INSERT ON Orders WHEN NEW.created_at IS NULL
+BEGIN UPDATE Orders SET created_at = 0 WHERE order_key = NEW.order_key; END;
+CREATE TRIGGER IF NOT EXISTS trg_orders_created_at_update AFTER UPDATE OF created_at ON Orders WHEN NEW.created_at IS NULL
+BEGIN UPDATE Orders SET created_at = 0 WHERE order_key = NEW.order_key; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dividends_created_at_insert AFTER INSERT ON Dividends WHEN NEW.created_at IS NULL
+BEGIN UPDATE Dividends SET created_at = 0 WHERE dividend_key = NEW.dividend_key; END;
+CREATE TRIGGER IF NOT EXISTS trg_dividends_created_at_update AFTER UPDATE OF created_at ON Dividends WHEN NEW.created_at IS NULL
+BEGIN UPDATE Dividends SET created_at = 0 WHERE dividend_key = NEW.dividend_key; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_options_created_at_insert AFTER INSERT ON Options WHEN NEW.created_at IS NULL
+BEGIN UPDATE Options SET created_at = 0 WHERE option_key = NEW.option_key; END;
+CREATE TRIGGER IF NOT EXISTS trg_options_created_at_update AFTER UPDATE OF created_at ON Options WHEN NEW.created_at IS NULL
+BEGIN UPDATE Options SET created_at = 0 WHERE option_key = NEW.option_key; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_watchlists_created_at_insert AFTER INSERT ON Watchlists WHEN NEW.created_at IS NULL
+BEGIN UPDATE Watchlists SET created_at = 0 WHERE watchlist_key = NEW.watchlist_key; END;
+CREATE TRIGGER IF NOT EXISTS trg_watchlists_created_at_update AFTER UPDATE OF created_at ON Watchlists WHEN NEW.created_at IS NULL
+BEGIN UPDATE Watchlists SET created_at = 0 WHERE watchlist_key = NEW.watchlist_key; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_watching_created_at_insert AFTER INSERT ON Watching WHEN NEW.created_at IS NULL
+BEGIN UPDATE Watching SET created_at = 0 WHERE watching_key = NEW.watching_key; END;
+CREATE TRIGGER IF NOT EXISTS trg_watching_created_at_update AFTER UPDATE OF created_at ON Watching WHEN NEW.created_at IS NULL
+BEGIN UPDATE Watching SET created_at = 0 WHERE watching_key = NEW.watching_key; END;
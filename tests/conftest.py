@@ -0,0 +1,43 @@
+import os
+import sys
+import shutil
+import pytest
+
+repository_folder = os.path.dirname(os.path.dirname(os.path.realpath(__file__))) # The folder the bot runs from
+bot_folder = os.path.join(repository_folder, "bot") # The folder bot.py is in
+sys.path.insert(0, bot_folder)
+
+from utils.db_manager.user_manager import UserManager
+
+"""
+==============================================================================================================
+Shared fixtures of the tests.
+
+The bot runs from the repository folder with bot/ on the path, and finds database/ and logs/ in the working
+folder. The tests do the same in a temporary folder that holds a copy of the migrations, so every test starts
+from an empty database. Coroutines are run with asyncio.run, nothing else than pytest is needed.
+
+    python -m pytest -q tests
+==============================================================================================================
+"""
+
+# This function is used to make a folder the bot can run from, with the migrations and an empty logs folder
+def prepareFolder(folder: str):
+    shutil.copytree(os.path.join(repository_folder, "database", "migrations"), os.path.join(folder, "database", "migrations"))
+    os.makedirs(os.path.join(folder, "logs"), exist_ok=True)
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    prepareFolder(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+# Opens a migrated users.db in the temporary folder, await users_database() inside the test's event loop
+@pytest.fixture
+def users_database(workdir):
+    async def open(reader_count: int = 2) -> UserManager:
+        database = UserManager()
+        await database.start("users.db", "users", "TestUsersManager", "users", reader_count)
+        return database
+
+    return open
@@ -0,0 +1,93 @@
+import asyncio
+from contextlib import asynccontextmanager
+from utils.db_manager.caches import KeyCache
+
+"""
+KeyCache drops a value that was read before the key was forgotten, a reader that started before a commit can't
+cache the key the commit replaced.
+"""
+
+USER_ID = 1_000_001
+
+def test_put_drops_values_read_before_forget():
+    cache = KeyCache()
+    key = (USER_ID, 0, "AAPL")
+
+    generation = cache.generation(key)
+    cache.forget(key) # A write committed while the value was read
+    cache.put(key, 10, generation)
+    assert cache.get(key) is None
+
+    cache.put(key, 11, cache.generation(key))
+    assert cache.get(key) == 11
+
+def test_put_drops_values_read_before_forget_user_and_clear():
+    cache = KeyCache()
+    key = (USER_ID, 0, "AAPL")
+
+    generation = cache.generation(key)
+    cache.forget_user(USER_ID)
+    cache.put(key, 10, generation)
+    assert cache.get(key) is None
+
+    generation = cache.generation(key)
+    cache.forget_user(USER_ID + 1) # Another user's keys don't matter
+    cache.put(key, 10, generation)
+    assert cache.get(key) == 10
+
+    generation = cache.generation(key)
+    cache.clear()
+    cache.put(key, 12, generation)
+    assert cache.get(key) is None
+
+def test_generation_counters_stay_bounded():
+    cache = KeyCache(max_size=8)
+    generation = cache.generation((USER_ID, 0, "AAPL"))
+
+    for index in range(100):
+        cache.forget((USER_ID, 0, f"T{index}"))
+
+    assert len(cache.key_generations) <= 8
+    cache.put((USER_ID, 0, "AAPL"), 10, generation) # Dropped, the reads in progress can't be told apart anymore
+    assert cache.get((USER_ID, 0, "AAPL")) is None
+
+def test_stock_key_read_during_a_delete_is_not_cached(users_database):
+    async def main():
+        database = await users_database()
+
+        try:
+            await database.create_user(USER_ID, "tester")
+            await database.create_portfolio(USER_ID)
+            await database.add_stock(USER_ID, 0, "AAPL")
+            old_key = (await database.get_stock(USER_ID, 0, "AAPL"))["stock_key"]
+            database.stock_keys.clear()
+
+            # Hold the first stock key read after it fetched its row, until the delete has committed
+            fetched, resume = asyncio.Event(), asyncio.Event()
+            read = database.read
+
+            @asynccontextmanager
+            async def held_read(sql, parameters=()):
+                async with read(sql, parameters) as cursor:
+                    yield cursor
+
+                if "SELECT stock_key FROM Stocks" in sql and not fetched.is_set():
+                    fetched.set()
+                    await resume.wait()
+
+            database.read = held_read
+            reader = asyncio.create_task(database.get_stock_key(USER_ID, 0, "AAPL"))
+            await fetched.wait()
+
+            assert await database.delete_stock(USER_ID, 0, "AAPL")
+            resume.set()
+            assert await reader == old_key # The reader still answers with what it read
+            database.read = read
+
+            assert database.stock_keys.get((USER_ID, 0, "AAPL")) is None
+            await database.add_stock(USER_ID, 0, "AAPL")
+            assert await database.get_stock_key(USER_ID, 0, "AAPL") not in (None, old_key)
+        finally:
+            await database.close()
+
+    asyncio.run(main())
@@ -0,0 +1,326 @@
+import time
+import asyncio
+import logging
+from types import SimpleNamespace
+from yfinance.exceptions import YFRateLimitError
+import utils.stocker.Providers as providers
+from utils.stocker.MarketData import MarketDataService, isStale
+from utils.stocker.Providers import (
+    FixtureProvider, ProviderError, ProviderThrottled, ProviderUnavailable, historyFromBars, isUpstreamFailure, recordFixtures
+)
+
+"""
+Concurrent lookups of the same stock share one provider call, a burst of /yahoo commands for a ticker that isn't
+cached makes a single upstream request. While the provider answers 429 the breaker opens and the last quotes are
+served marked as stale, typo tickers don't count as provider failures. A provider that blocks runs on the thread
+pool, so the event loop keeps running while it sleeps. Recorded fixtures replay what was recorded, and the same
+seed injects the same latencies and errors. Pre-warming fills the cache with the held and watched tickers.
+"""
+
+DAY = 86400
+RECORDED_DAY = 1_700_006_400 # Midnight UTC of the last recorded bar
+
+# Answers like Yahoo Finance would for AAPL, and with nothing for any other ticker
+class RecordedProvider:
+    name = "recorded"
+
+    def get_history(self, ticker: str, start: int | None, end: int | None, interval: str) -> list[tuple]:
+        if ticker != "AAPL":
+            return []
+
+        return [(RECORDED_DAY - day * DAY, 100.0 + day, 102.0 + day, 99.0 + day, 101.0 + day, 1000 * day) for day in range(5, -1, -1)]
+
+    def get_info(self, ticker: str) -> dict:
+        return {"symbol": ticker, "shortName": "Apple Inc."}
+
+    def get_news(self, ticker: str) -> list[dict]:
+        return [{"title": "Apple reports", "link": "https://example.com/aapl", "publisher": "Example", "time": RECORDED_DAY - DAY}]
+
+    def get_dividends(self, ticker: str) -> list[tuple]:
+        return [(RECORDED_DAY - 3 * DAY, 0.24)]
+
+# Blocks like a yfinance download does
+class SleepingProvider:
+    name = "sleeping"
+
+    def __init__(self, delay: float) -> None:
+        self.delay: float = delay
+
+    def get_stock(self, ticker: str, period: str, interval: str) -> tuple:
+        time.sleep(self.delay)
+        return historyFromBars([(1_700_000_000, 10.0, 12.0, 9.0, 11.0, 100)]), {"symbol": ticker}
+
+# This function is used to tick every interval until it is cancelled, the most it was late is kept in lag
+async def ticker(lag: list[float], interval: float = 0.01):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag[0] = max(lag[0], time.perf_counter() - started - interval)
+
+# Answers every lookup until it is told to throttle, then raises what Yahoo Finance answers with a 429
+class ThrottlingProvider:
+    name = "throttling"
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.throttling: bool = False
+
+    def get_stock(self, ticker: str, period: str, interval: str) -> tuple:
+        self.calls += 1
+
+        if self.throttling:
+            raise ProviderThrottled("429 Too Many Requests")
+
+        if ticker.startswith("TYPO"):
+            raise ProviderError(f"{ticker} not found")
+
+        return historyFromBars([(1_700_000_000, 10.0, 12.0, 9.0, 11.0, 100)]), {"symbol": ticker}
+
+def test_concurrent_lookups_make_one_upstream_call(tmp_path):
+    async def main():
+        provider = FixtureProvider(str(tmp_path), latency=0.2, synthesize=True) # Slow enough for every lookup to start while it runs
+        service = MarketDataService(provider=provider)
+
+        try:
+            results = await asyncio.gather(*(service.get_stock("aapl") for _ in range(500)))
+
+            assert provider.calls == 1
+            assert service.coalesced == 499
+            assert results[0] is not None and all(result is results[0] for result in results)
+
+            await asyncio.gather(*(service.get_stock("AAPL") for _ in range(500))) # Cached now
+            assert provider.calls == 1
+            assert not service.pending
+        finally:
+            await service.close()
+
+    asyncio.run(main())
+
+def test_throttled_provider_opens_the_breaker_and_serves_stale_quotes():
+    async def main():
+        provider = ThrottlingProvider()
+        service = MarketDataService(provider=provider, rate=0, failure_threshold=3, reset_timeout=60)
+        service.cache.ttl = lambda: 0.01 # Quotes expire right away
+
+        try:
+            fresh = await service.get_stock("AAPL")
+            assert not isStale(fresh)
+            await asyncio.sleep(0.02)
+            provider.throttling = True
+
+            for _ in range(3):
+                stale = await service.get_stock("AAPL")
+                assert isStale(stale) and not isStale(fresh)
+                assert stale[0]["Close"].iloc[-1] == 11.0 and stale[1] == fresh[1]
+
+            assert service.breaker.state == "open" and service.breaker.open_count == 1
+            assert provider.calls == 4
+
+            # Open, the provider isn't called and the stale quote is still served
+            assert isStale(await service.get_stock("AAPL"))
+            assert await service.get_stock("MSFT") is None # Nothing cached to fall back to
+            assert provider.calls == 4
+
+            assert (service.errors, service.rejected, service.stale_served) == (3, 2, 4)
+            assert service.stats()["breaker"] == "open"
+        finally:
+            await service.close()
+
+    asyncio.run(main())
+
+def test_token_bucket_counts_throttled_and_rejected_calls():
+    async def main():
+        provider = ThrottlingProvider()
+        service = MarketDataService(provider=provider, rate=20, burst=1, timeout=0.5)
+
+        try:
+            # The first call takes the only token, the next two wait 50 and 100 ms for theirs
+            await asyncio.gather(*(service.get_stock(ticker) for ticker in ("AAPL", "MSFT", "NVDA")))
+            assert (service.throttled, service.rejected, provider.calls) == (2, 0, 3)
+
+            # Waiting longer than the timeout is refused without calling the provider or counting against it
+            service.timeout = 0.01
+            assert await asyncio.gather(*(service.get_stock(ticker) for ticker in ("AMD", "INTC"))) == [None, None]
+            assert (service.throttled, service.rejected, provider.calls) == (2, 2, 3)
+            assert service.breaker.failures == 0 and service.breaker.state == "closed"
+        finally:
+            await service.close()
+
+    asyncio.run(main())
+
+def test_unknown_tickers_do_not_open_the_breaker():
+    async def main():
+        provider = ThrottlingProvider()
+        service = MarketDataService(provider=provider, rate=0, failure_threshold=3, reset_timeout=0.05)
+
+        try:
+            for index in range(10):
+                assert await service.get_stock(f"TYPO{index}") is None
+
+            assert service.errors == 10 and provider.calls == 10
+            assert service.breaker.state == "closed" and service.breaker.failures == 0
+
+            provider.throttling = True
+
+            for index in range(3):
+                await service.get_stock(f"MISS{index}")
+
+            assert service.breaker.state == "open"
+
+            # A trial call the provider answers, even with a typo ticker, closes the breaker again
+            await asyncio.sleep(0.06)
+            provider.throttling = False
+            assert await service.get_stock("TYPO") is None
+            assert service.breaker.state == "closed"
+        finally:
+            await service.close()
+
+    asyncio.run(main())
+
+def test_upstream_failures_are_throttling_and_transport_errors():
+    class HTTPError(OSError):
+        def __init__(self, status_code: int) -> None:
+            super().__init__(f"HTTP {status_code}")
+            self.response = type("Response", (), {"status_code": status_code})()
+
+    assert isUpstreamFailure(ProviderThrottled("429"))
+    assert isUpstreamFailure(YFRateLimitError())
+    assert isUpstreamFailure(ConnectionResetError())
+    assert isUpstreamFailure(TimeoutError())
+    assert isUpstreamFailure(HTTPError(429)) and isUpstreamFailure(HTTPError(503))
+
+    assert not isUpstreamFailure(HTTPError(404))
+    assert not isUpstreamFailure(ProviderError("TYPO not found"))
+    assert not isUpstreamFailure(KeyError("regularMarketPrice"))
+
+def test_sleeping_provider_leaves_the_loop_responsive():
+    async def main():
+        provider = SleepingProvider(0.3)
+        service = MarketDataService(max_workers=8, provider=provider, rate=0)
+        lag = [0.0]
+        ticking = asyncio.create_task(ticker(lag))
+
+        try:
+            started = time.perf_counter()
+            results = await asyncio.gather(*(service.get_stock(f"T{index}") for index in range(8)))
+            elapsed = time.perf_counter() - started
+
+            assert all(result is not None for result in results)
+            assert elapsed < 0.3 * 2 # The lookups overlap, 8 sleeps one after another would take 2.4 s
+            assert lag[0] < 0.1 # The loop kept ticking while the provider slept
+        finally:
+            ticking.cancel()
+            await service.close()
+
+    asyncio.run(main())
+
+def test_provider_sleeping_past_the_timeout_times_out(caplog):
+    async def main():
+        provider = SleepingProvider(1.0)
+        service = MarketDataService(provider=provider, rate=0, timeout=0.1, logger=logging.getLogger("TestMarketData"))
+        lag = [0.0]
+        ticking = asyncio.create_task(ticker(lag))
+
+        try:
+            started = time.perf_counter()
+            assert await service.get_stock("AAPL") is None # The timeout error is caught, callers fall back to what is cached
+            assert time.perf_counter() - started < 0.5
+            assert (service.timeouts, service.errors, service.breaker.failures) == (1, 0, 1)
+            assert lag[0] < 0.1
+        finally:
+            ticking.cancel()
+            await service.close()
+
+    with caplog.at_level(logging.WARNING, "TestMarketData"):
+        asyncio.run(main())
+
+    assert "market data call timed out after 0.1s" in caplog.text
+
+def test_recorded_fixtures_replay_from_disk(tmp_path):
+    recorded = RecordedProvider()
+    assert recordFixtures(recorded, ["AAPL", "NOPE"], str(tmp_path)) == 1 # Nothing to replay for NOPE
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["AAPL.json"]
+
+    replay = FixtureProvider(str(tmp_path), align=False)
+    assert replay.get_history("AAPL", None, None, "1d") == recorded.get_history("AAPL", None, None, "1d")
+    assert replay.get_history("AAPL", RECORDED_DAY - DAY, None, "1d") == recorded.get_history("AAPL", None, None, "1d")[-2:]
+    assert replay.get_dividends("AAPL") == recorded.get_dividends("AAPL")
+    assert replay.get_news("AAPL") == recorded.get_news("AAPL")
+    assert replay.get_info("AAPL") == recorded.get_info("AAPL")
+    assert replay.get_history("NOPE", None, None, "1d") == [] and replay.get_info("NOPE") == {}
+
+    # Aligned, every time moves by the same shift so the last bar is today
+    aligned = FixtureProvider(str(tmp_path))
+    today = int(time.time()) // DAY * DAY
+    shift = today - RECORDED_DAY
+
+    assert aligned.get_history("AAPL", None, None, "1d") == [(bar[0] + shift, *bar[1:]) for bar in recorded.get_history("AAPL", None, None, "1d")]
+    assert aligned.get_dividends("AAPL") == [(RECORDED_DAY - 3 * DAY + shift, 0.24)]
+    assert aligned.get_news("AAPL")[0]["time"] == RECORDED_DAY - DAY + shift
+    assert aligned.get_stock("AAPL", "1d", "1d")[0]["Close"].iloc[-1] == 101.0 # The newest bar falls in the last day
+
+def test_fixture_errors_and_latencies_follow_the_seed(tmp_path, monkeypatch):
+    recordFixtures(RecordedProvider(), ["AAPL"], str(tmp_path))
+    delays: list[float] = []
+    monkeypatch.setattr(providers, "time", SimpleNamespace(sleep=delays.append, time=time.time)) # Keep the delays instead of sleeping
+
+    # This function is used to replay 50 calls, as the calls that failed and the delays they took
+    def replay(seed: int) -> tuple[list[bool], list[float]]:
+        provider = FixtureProvider(str(tmp_path), latency=0.05, jitter=0.1, error_rate=0.3, seed=seed)
+        delays.clear()
+        failed = []
+
+        for _ in range(50):
+            try:
+                provider.get_info("AAPL")
+                failed.append(False)
+            except ProviderUnavailable as e:
+                assert isUpstreamFailure(e) and "injected info error for AAPL" in str(e)
+                failed.append(True)
+
+        assert provider.calls == 50
+        return failed, list(delays)
+
+    failed, slept = replay(7)
+    assert 0 < sum(failed) < 50 # Some calls failed, not all of them
+    assert len(slept) == 50 and all(0.05 <= delay <= 0.15 for delay in slept)
+    assert replay(7) == (failed, slept)
+    assert replay(8) != (failed, slept)
+
+def test_prewarm_caches_the_tracked_tickers(users_database, tmp_path):
+    async def main():
+        database = await users_database()
+        provider = FixtureProvider(str(tmp_path / "fixtures"), synthesize=True)
+        service = MarketDataService(provider=provider, rate=0)
+
+        try:
+            # AAPL is held twice, MSFT and AMD once, TSLA is only watched
+            for user_id, held, watched in ((1, ["AAPL", "MSFT"], ["AAPL", "TSLA"]), (2, ["aapl", "AMD"], ["TSLA", "MSFT"])):
+                await database.create_user(user_id, f"user{user_id}")
+                await database.create_portfolio(user_id)
+
+                for ticker in held:
+                    await database.add_stock(user_id, 0, ticker)
+
+                watchlist_id = await database.create_watchlist(user_id, "watching")
+
+                for ticker in watched:
+                    assert await database.add_stock_to_watchlist(user_id, watchlist_id, ticker)
+
+            tracked = [row["ticker"] for row in await database.get_tracked_tickers()]
+            assert tracked == ["AAPL", "MSFT", "AMD", "TSLA"] # Most held first, then most watched
+            assert [row["ticker"] for row in await database.get_tracked_tickers(2)] == ["AAPL", "MSFT"]
+
+            await service.prewarm(tracked)
+            assert provider.calls == 1 # One batch
+            assert service.prewarm_coverage == 1.0 and service.prewarm_tickers == 4
+
+            hits = service.cache.hits
+            quotes = await service.get_quotes(["tsla", "AAPL", "AMD", "MSFT"])
+            assert sorted(quotes) == sorted(tracked)
+            assert provider.calls == 1 and service.cache.hits == hits + 4
+        finally:
+            await service.close()
+            await database.close()
+
+    asyncio.run(main())
@@ -0,0 +1,35 @@
+import asyncio
+import datetime
+from utils.misc.bot_misc import Statuses
+
+"""
+The timed statuses follow the trading sessions of the quote cache: times are read in America/Chicago, weekends are
+closed and a window includes its start but not its end.
+"""
+
+FRIDAY = datetime.date(2024, 1, 5)
+SATURDAY = datetime.date(2024, 1, 6)
+
+# This function is used to check which status types can be shown at a market time
+def allowed(day: datetime.date, hour: int, minute: int = 0) -> dict[str, int]:
+    statuses = Statuses()
+    now = datetime.datetime.combine(day, datetime.time(hour, minute))
+    return {mType: asyncio.run(statuses.isItOpen(mType, now)) for mType in ("anytime", "premarket", "markethours", "afterhours")}
+
+def test_status_windows_include_their_start_only():
+    assert allowed(FRIDAY, 3, 59) == {"anytime": 0, "premarket": -1, "markethours": -1, "afterhours": -1}
+    assert allowed(FRIDAY, 4) == {"anytime": 0, "premarket": 3, "markethours": -1, "afterhours": -1}
+    assert allowed(FRIDAY, 8, 30) == {"anytime": 0, "premarket": -1, "markethours": 1, "afterhours": -1}
+    assert allowed(FRIDAY, 16) == {"anytime": 0, "premarket": -1, "markethours": -1, "afterhours": 2}
+    assert allowed(FRIDAY, 20) == {"anytime": 0, "premarket": -1, "markethours": -1, "afterhours": -1}
+
+def test_status_windows_are_closed_on_weekends():
+    for hour in (5, 10, 17):
+        assert allowed(SATURDAY, hour) == {"anytime": 0, "premarket": -1, "markethours": -1, "afterhours": -1}
+
+def test_status_windows_are_read_in_chicago_time():
+    statuses = Statuses()
+    opening = datetime.datetime(2024, 1, 5, 14, 30, tzinfo=datetime.timezone.utc) # 08:30 in Chicago
+
+    assert asyncio.run(statuses.isItOpen("markethours", opening)) == 1
+    assert asyncio.run(statuses.isItOpen("markethours", opening - datetime.timedelta(minutes=1))) == -1
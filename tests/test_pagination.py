@@ -0,0 +1,208 @@
+import os
+import time
+import asyncio
+import discord
+import statistics
+import pytest
+from conftest import prepareFolder
+from benchmarks import generate_dataset
+from utils.db_manager.user_manager import UserManager
+from utils.misc.paginator import Paginator
+from utils.stocker.PortfolioTypes import UserOrder
+
+"""
+The listings read one page at a time with a (created_at, key) cursor, so the last page of a long history costs
+as much as the first. A 10k row history is made with generate_dataset.py, then every page is read through the
+get_*_page functions and through the Paginator. The work SQLite does is counted with a progress handler, which
+is exact on any machine, and the time of the deepest pages is compared with the first ones. A row whose date can't
+be read is stored with a created_at of 0, so it is paged as the oldest row instead of ending the listing.
+"""
+
+HISTORY = 10_000 # Orders, dividends and options of the one portfolio
+PAGE = 10 # Rows shown on a page
+OPCODES = 10 # SQLite instructions between two progress handler calls
+
+@pytest.fixture(scope="module")
+def history(tmp_path_factory):
+    folder = str(tmp_path_factory.mktemp("history"))
+    prepareFolder(folder)
+    generate_dataset.main([
+        os.path.join(folder, "database", "users.db"), "--users", "1", "--portfolios", "1", "--stocks", "1",
+        "--orders", str(HISTORY), "--dividends", str(HISTORY), "--options", str(HISTORY), "--watchlists", "0", "--seed", "1"
+    ])
+    return folder
+
+# This function is used to open the generated database, reads go to the writer so the progress handler sees them
+async def openHistory() -> tuple[UserManager, int, str]:
+    database = UserManager()
+    await database.start("users.db", "users", "TestHistoryManager", "history", 0)
+
+    async with database.read("SELECT user_id, ticker FROM Stocks") as cursor:
+        row = await cursor.fetchone()
+
+    return database, row["user_id"], row["ticker"]
+
+class PageCost:
+    def __init__(self, database: UserManager) -> None:
+        self.database: UserManager = database
+        self.steps: int = 0
+        self.costs: list[tuple[int, float]] = [] # (progress handler calls, seconds) of every page
+
+    async def __aenter__(self):
+        await self.database.connection.set_progress_handler(self.step, OPCODES)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.database.connection.set_progress_handler(None, 0)
+
+    def step(self) -> int:
+        self.steps += 1
+        return 0 # Keep running the statement
+
+    # This function is used to read one page and record what it cost
+    async def measure(self, fetch):
+        steps = self.steps
+        started = time.perf_counter()
+        rows = await fetch()
+        self.costs.append((self.steps - steps, time.perf_counter() - started))
+        return rows
+
+    # This function is used to check that no page costs more than the first ones, and that the deepest pages take as long
+    def assertConstant(self, deepest: int = -1):
+        assert len(self.costs) >= HISTORY // PAGE
+
+        deepest = deepest % len(self.costs)
+        head, deep = self.costs[:20], self.costs[deepest - 19:deepest + 1]
+        assert max(steps for steps, _ in self.costs) <= 2 * max(steps for steps, _ in head)
+        assert statistics.median(seconds for _, seconds in deep) <= 5 * statistics.median(seconds for _, seconds in head) + 0.002
+
+# This function is used to walk every page of a listing from the newest row to the oldest
+async def walkPages(cost: PageCost, fetch_page, key: str) -> int:
+    seen = 0
+    rows = await cost.measure(lambda: fetch_page(None, None, PAGE))
+
+    while rows:
+        seen += len(rows)
+        cursor = (rows[-1]["created_at"], rows[-1][key])
+        rows = await cost.measure(lambda: fetch_page(cursor, None, PAGE))
+
+    return seen
+
+@pytest.mark.parametrize("table, key", [("orders", "order_key"), ("dividends", "dividend_key"), ("options", "option_key")])
+def test_get_page_cost_is_constant(history, monkeypatch, table, key):
+    monkeypatch.chdir(history)
+
+    async def main():
+        database, user_id, ticker = await openHistory()
+
+        try:
+            if table == "orders":
+                fetch_page = lambda after, before, limit: database.get_orders_page(user_id, 0, ticker, after, before, limit)
+            elif table == "dividends":
+                fetch_page = lambda after, before, limit: database.get_dividends_page(user_id, 0, None, after, before, limit)
+            else:
+                fetch_page = lambda after, before, limit: database.get_options_page(user_id, 0, None, after, before, limit)
+
+            async with PageCost(database) as cost:
+                assert await walkPages(cost, fetch_page, key) == HISTORY
+
+            cost.assertConstant()
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+def test_paginator_page_cost_is_constant(history, monkeypatch):
+    monkeypatch.chdir(history)
+
+    async def main():
+        database, user_id, ticker = await openHistory()
+
+        try:
+            paginator = Paginator(
+                user_id,
+                lambda after, before, limit: database.get_orders_page(user_id, 0, ticker, after, before, limit),
+                lambda rows, page: discord.Embed(title=f"Page {page}"),
+                "order_key",
+                per_page=PAGE
+            )
+
+            async with PageCost(database) as cost:
+                assert await cost.measure(paginator.load)
+                pages = 1
+
+                # Forward to the oldest page, like pressing Next
+                while paginator.has_next:
+                    cursor = paginator.cursor(paginator.rows[-1])
+                    assert await cost.measure(lambda: paginator.load(after=cursor))
+                    pages += 1
+
+                assert pages == HISTORY // PAGE
+                assert not paginator.has_next and paginator.has_previous
+                oldest = len(cost.costs) - 1
+
+                # Back to the newest page, like pressing Previous
+                while paginator.has_previous:
+                    cursor = paginator.cursor(paginator.rows[0])
+                    assert await cost.measure(lambda: paginator.load(before=cursor))
+                    pages -= 1
+
+                assert pages == 1
+
+            cost.assertConstant(oldest)
+        finally:
+            paginator.stop()
+            await database.close()
+
+    asyncio.run(main())
+
+def test_rows_without_a_date_are_paged_as_the_oldest(users_database):
+    async def main():
+        database = await users_database()
+        paginator = None
+
+        try:
+            await database.create_user(1, "user1")
+            await database.create_portfolio(1)
+            await database.add_stock(1, 0, "AAPL")
+
+            for day in range(1, 6):
+                await database.add_order(1, 0, "AAPL", UserOrder(100.0, 1.0, f"01-0{day}-2024 10:00:00 AM", "filled", "buy"))
+
+            await database.add_order(1, 0, "AAPL", UserOrder(100.0, 1.0, "yesterday", "filled", "buy")) # Unreadable date
+
+            async with database.transaction():
+                await database.connection.execute("UPDATE Orders SET created_at = NULL WHERE order_id = 2")
+
+            async with database.read("SELECT COUNT(*) FROM Orders WHERE created_at IS NULL") as cursor:
+                assert (await cursor.fetchone())[0] == 0
+
+            fetch_page = lambda after, before, limit: database.get_orders_page(1, 0, "AAPL", after, before, limit)
+            seen = []
+            rows = await fetch_page(None, None, 2)
+
+            while rows:
+                seen += [row["order_id"] for row in rows]
+                rows = await fetch_page((rows[-1]["created_at"], rows[-1]["order_key"]), None, 2)
+
+            assert seen == [4, 3, 1, 0, 5, 2] # Newest first, the two rows without a date last
+
+            paginator = Paginator(1, fetch_page, lambda rows, page: discord.Embed(title=f"Page {page}"), "order_key", per_page=2)
+            assert await paginator.load()
+
+            while paginator.has_next:
+                assert await paginator.load(after=paginator.cursor(paginator.rows[-1]))
+
+            assert [row["order_id"] for row in paginator.rows] == [5, 2]
+
+            while paginator.has_previous:
+                assert await paginator.load(before=paginator.cursor(paginator.rows[0]))
+
+            assert [row["order_id"] for row in paginator.rows] == [4, 3]
+        finally:
+            if paginator is not None:
+                paginator.stop()
+
+            await database.close()
+
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+import asyncio
+import discord
+from types import SimpleNamespace
+from cogs.portfolio import Portfolio
+from benchmarks.load_test import FakeContext, FakeUser
+from utils.stocker.PortfolioTypes import UserOption
+
+"""
+The option commands render rows read from the Options table, these run them against a real database through
+the fake Discord layer of the load test.
+"""
+
+USER_ID = 1_000_001
+
+# This function is used to add a user with one stock and two options, one still open and one closed
+async def seedOptions(database):
+    await database.create_user(USER_ID, "tester")
+    await database.create_portfolio(USER_ID)
+    await database.add_stock(USER_ID, 0, "AAPL")
+
+    opened = UserOption("AAPL", 150.0, 2, 3.5, "01-02-2024 10:00:00 AM", "06-21-2024 04:00:00 PM", "Filled", "call", 0.0)
+    closed = UserOption("AAPL", 140.0, 1, 2.0, "01-03-2024 10:00:00 AM", "03-15-2024 04:00:00 PM", "Filled", "put", 0.0)
+    assert await database.add_option(USER_ID, 0, "AAPL", opened) == 0
+    assert await database.add_option(USER_ID, 0, "AAPL", closed) == 1
+    assert await database.close_option(USER_ID, 0, "AAPL", 1, 42.5)
+
+def makeCog(database) -> Portfolio:
+    return Portfolio(SimpleNamespace(database_users=database, colors=None))
+
+def test_list_options_renders_a_page(users_database):
+    async def main():
+        database = await users_database()
+
+        try:
+            await seedOptions(database)
+            cog = makeCog(database)
+            user = FakeUser(USER_ID, "tester")
+            context = FakeContext(None, cog.list_options, user)
+
+            await cog.list_options.callback(cog, context, "all", 0, user)
+
+            assert len(context.sent) == 1
+            embed = context.sent[0].embed
+            assert embed.color == discord.Color.blue()
+            assert embed.title == "2 Options Found!"
+
+            # Two fields per option, newest first
+            fields = [(field.name, field.value) for field in embed.fields]
+            assert len(fields) == 4
+            assert fields[0][0].startswith("AAPL [1] put")
+            assert fields[1] == ("Closed", "$42.5")
+            assert fields[2][0].startswith("AAPL [0] call")
+            assert fields[3] == ("Filled", "Still active.")
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+def test_view_option_renders_the_result(users_database):
+    async def main():
+        database = await users_database()
+
+        try:
+            await seedOptions(database)
+            cog = makeCog(database)
+            user = FakeUser(USER_ID, "tester")
+
+            context = FakeContext(None, cog.view_option, user)
+            await cog.view_option.callback(cog, context, "AAPL", 1, 0, user)
+            embed = context.sent[0].embed
+            assert embed.color == discord.Color.green()
+            assert (embed.fields[0].name, embed.fields[0].value) == ("Closed", "$42.5")
+
+            context = FakeContext(None, cog.view_option, user)
+            await cog.view_option.callback(cog, context, "AAPL", 0, 0, user)
+            embed = context.sent[0].embed
+            assert (embed.fields[0].name, embed.fields[0].value) == ("Filled", "Still active.")
+        finally:
+            await database.close()
+
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+import asyncio
+from utils.db_manager.caches import MembershipCache
+from utils.stocker.PortfolioTypes import UserOrder
+
+"""
+UserManager against a migrated users.db.
+"""
+
+USER_ID = 1_000_001
+
+def test_portfolio_summary_matches_the_per_stock_totals(users_database):
+    async def main():
+        database = await users_database()
+
+        try:
+            await database.create_user(USER_ID, "tester")
+            await database.create_portfolio(USER_ID)
+
+            async with database.transaction() as transaction:
+                for ticker, orders in (("AAPL", [(10.0, 5, "Filled", "Buy"), (12.5, 2, "Filled", "Sell")]), ("MSFT", [(300.0, 1, "Filled", "Buy"), (310.0, 1, "Pending", "Buy")])):
+                    await database.add_stock(USER_ID, 0, ticker, transaction=transaction)
+
+                    for price, quantity, status, orderType in orders:
+                        await database.add_order(USER_ID, 0, ticker, UserOrder(price, quantity, "01-02-2024 10:00:00 AM", status, orderType), transaction=transaction)
+
+                await database.add_dividend(USER_ID, 0, "AAPL", 1.25, "01-03-2024 10:00:00 AM", transaction=transaction)
+
+            summary = await database.get_portfolio_summary(USER_ID, 0)
+
+            assert summary["investment"] == await database.get_portfolio_investment(USER_ID, 0) == 325.0
+            assert summary["quantity"] == await database.get_portfolio_quantity(USER_ID, 0) == 4
+            assert summary["gain_loss"] == await database.get_portfolio_gain_loss(USER_ID, 0)
+            assert summary["dividends"] == await database.get_portfolio_dividends(USER_ID, 0) == 1.25
+
+            for stock in summary["tickers"]:
+                assert stock["investment"] == await database.get_stock_investment(USER_ID, 0, stock["ticker"])
+                assert stock["quantity"] == await database.get_stock_quantity(USER_ID, 0, stock["ticker"])
+                assert stock["gain_loss"] == await database.get_stock_gain_loss(USER_ID, 0, stock["ticker"])
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+"""
+Every per user query the commands run has to find its rows through an index. The queries are recorded with a trace
+callback while the getters run against a database made by generate_dataset.py, then each one is explained.
+"""
+
+# Tables of users.db, a SCAN of one of them reads every row of every user
+TABLES = ("Users", "Portfolios", "Stocks", "Orders", "Dividends", "Options", "Watchlists", "Watching")
+
+# This function is used to call every getter the commands use, with and without a page cursor
+async def callHotQueries(database, user_id: int, ticker: str):
+    cursor = (1_700_000_000, 1)
+
+    await database.get_user(user_id)
+    await database.get_user_gain_loss(user_id)
+    await database.get_portfolio(user_id, 0)
+    await database.get_portfolio_byname(user_id, "Portfolio 0")
+    await database.get_first_portfolio(user_id)
+    await database.get_portfolios(user_id)
+    await database.get_portfolio_count(user_id)
+    await database.get_portfolio_summary(user_id, 0)
+    await database.get_stock(user_id, 0, ticker)
+    await database.get_stocks(user_id, 0)
+    await database.get_stock_count(user_id, 0)
+    await database.get_portfolio_tickers(user_id, 0)
+    await database.get_order(user_id, 0, ticker, 0)
+    await database.get_orders(user_id, 0, ticker)
+    await database.get_order_count(user_id, 0)
+    await database.get_order_count_by_ticker(user_id, 0, ticker)
+    await database.get_dividend(user_id, 0, ticker, 0)
+    await database.get_dividends(user_id, 0)
+    await database.get_dividends_by_ticker(user_id, 0, ticker)
+    await database.get_dividend_count(user_id, 0)
+    await database.get_dividend_count_by_ticker(user_id, 0, ticker)
+    await database.get_option(user_id, 0, ticker, 0)
+    await database.get_options(user_id, 0)
+    await database.get_options_by_ticker(user_id, 0, ticker)
+    await database.get_option_count(user_id, 0)
+    await database.get_option_count_by_ticker(user_id, 0, ticker)
+    await database.get_call_count(user_id, 0, ticker)
+    await database.get_put_count(user_id, 0, ticker)
+    await database.get_watchlist(user_id, 0)
+    await database.get_watchlists(user_id)
+    await database.get_watchlist_count(user_id)
+    await database.get_watchlist_by_name(user_id, "Watchlist 0")
+    await database.is_stock_watched(user_id, 0, ticker)
+    await database.get_watchlist_stocks(user_id, 0)
+    await database.get_watchlist_stock_count(user_id, 0)
+
+    for after, before in ((None, None), (cursor, None), (None, cursor)):
+        await database.get_orders_page(user_id, 0, ticker, after, before)
+        await database.get_dividends_page(user_id, 0, None, after, before)
+        await database.get_dividends_page(user_id, 0, ticker, after, before)
+        await database.get_options_page(user_id, 0, None, after, before)
+        await database.get_options_page(user_id, 0, ticker, after, before)
+        await database.get_watchlist_stocks_page(user_id, 0, after, before)
+
+def test_hot_queries_use_indexes(workdir):
+    from benchmarks import generate_dataset
+    from utils.db_manager.user_manager import UserManager
+
+    generate_dataset.main(["database/users.db", "--users", "50", "--orders", "40", "--dividends", "10", "--options", "10", "--seed", "2"])
+
+    async def main():
+        database = UserManager()
+        await database.start("users.db", "users", "TestUsersManager", "users", 0) # Every read on the writer, so the trace sees it
+
+        try:
+            async with database.read("SELECT user_id, ticker FROM Stocks ORDER BY stock_key LIMIT 1") as cursor:
+                row = await cursor.fetchone()
+
+            statements: list[str] = []
+            await database.connection.set_trace_callback(statements.append)
+            await callHotQueries(database, row["user_id"], row["ticker"])
+            await database.connection.set_trace_callback(None)
+
+            queries = sorted({sql.strip() for sql in statements if sql.lstrip().upper().startswith(("SELECT", "WITH"))})
+            assert len(queries) >= 30
+
+            problems = []
+
+            for sql in queries:
+                async with database.connection.execute(f"EXPLAIN QUERY PLAN {sql}") as cursor:
+                    plan = [step["detail"] for step in await cursor.fetchall()]
+
+                for detail in plan:
+                    words = detail.split()
+
+                    if words[0] == "SCAN" and words[1] in TABLES:
+                        problems.append(f"{detail}\n    {sql}")
+                    elif words[0] == "SEARCH" and words[1] in TABLES and not ("USING INDEX" in detail or "USING COVERING INDEX" in detail or "USING INTEGER PRIMARY KEY" in detail):
+                        problems.append(f"{detail}\n    {sql}")
+                    elif "TEMP B-TREE FOR ORDER BY" in detail and "LIMIT" in sql.upper():
+                        problems.append(f"{detail}\n    {sql}") # A page sorted after reading every row
+
+            assert not problems, "\n".join(problems)
+        finally:
+            await database.close()
+
+    asyncio.run(main())
+
+def test_registered_users_load_in_chunks_into_a_set_or_a_filter(users_database):
+    async def main():
+        database = await users_database()
+
+        try:
+            async with database.transaction():
+                await database.connection.executemany(
+                    "INSERT INTO Users (user_id, created) VALUES (?, '01-02-2024 10:00:00 AM')",
+                    [(USER_ID + index,) for index in range(25_000)] # More than one chunk
+                )
+
+            for set_limit, mode in ((100_000, "set"), (1_000, "filter")):
+                database.registered_users = MembershipCache(set_limit=set_limit)
+                await database.load_registered_users()
+
+                assert (database.registered_users.members is not None) == (mode == "set")
+                assert all(database.registered_users.check(USER_ID + index) is not False for index in (0, 9_999, 10_000, 24_999))
+                assert await database.does_user_exist(USER_ID + 24_999)
+                assert not await database.does_user_exist(USER_ID - 1)
+        finally:
+            await database.close()
+
+    asyncio.run(main())